@@ -64,6 +64,15 @@ class DaosClient(object):
     """
     _instance = None
 
+    # Functions called before DAOS is finalized, to release resources held
+    # by the other modules.
+    _cleanups = []
+
+    @classmethod
+    def register_cleanup(cls, func):
+        """Call func before DAOS is finalized."""
+        cls._cleanups.append(func)
+
     @classmethod
     def cleanup(cls):
         """Trigger the instance cleanup process."""
@@ -89,6 +98,8 @@ class DaosClient(object):
     def _close(self):
         if not self.connected:
             return
+        for func in self._cleanups:
+            func()
         _rc = pydaos_shim.daos_fini(DAOS_MAGIC)
         if _rc != pydaos_shim.DER_SUCCESS:
             raise PyDError("Failed to cleanup DAOS", _rc)
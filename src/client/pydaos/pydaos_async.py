@@ -0,0 +1,150 @@
+# (C) Copyright 2020 Intel Corporation.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# GOVERNMENT LICENSE RIGHTS-OPEN SOURCE SOFTWARE
+# The Government's rights to use, modify, reproduce, release, perform, display,
+# or disclose this software are subject to the terms of the Apache License as
+# provided in Contract No. B609815.
+# Any reproduction of computer software, computer software documentation, or
+# portions thereof marked with this legend must also reproduce the markings.
+"""
+Drive a DAOS event queue from an asyncio event loop.
+
+This module only talks to the shim passed to it, and does not import the
+rest of pydaos, so it can be used against a stand-in shim which implements
+eq_poll(), eq_destroy() and the *_async() operations.
+"""
+
+import asyncio
+import itertools
+
+class EventQueue():
+    """
+    Class representing a DAOS event queue polled by an asyncio event loop
+
+    Operations are submitted through shim functions taking the magic number,
+    the event queue handle and a token, followed by their own arguments, and
+    returning a DAOS error code. Each submission returns a future which is
+    resolved with (rc, value) once eq_poll() reports the token as completed.
+
+    The queue is polled without blocking from callbacks scheduled on the loop
+    for as long as operations are in flight, backing off while none complete.
+
+    Methods
+    -------
+    submit(name, *args)
+        Submit shim operation name, and return a future for its result.
+    close()
+        Cancel the futures of any in-flight operations and destroy the event
+        queue.
+    """
+
+    # Maximum number of completions to handle per poll.
+    POLL_MAX = 256
+
+    # Range of delays between polls when nothing completes.
+    MIN_INTERVAL = 0.00001
+    MAX_INTERVAL = 0.001
+
+    def __init__(self, shim, magic, eq, loop):
+        self._shim = shim
+        self._magic = magic
+        self.eq = eq
+        self._loop = loop
+        self._tokens = itertools.count()
+        self._pending = {}
+        self._handle = None
+        self._interval = self.MIN_INTERVAL
+
+    def submit(self, name, *args):
+        """Submit shim operation name, and return a future for its result."""
+        fut = self._loop.create_future()
+        token = next(self._tokens)
+        ret = getattr(self._shim, name)(self._magic, self.eq, token, *args)
+        if ret != 0:
+            fut.set_result((ret, None))
+            return fut
+        self._pending[token] = fut
+        if self._handle is None:
+            self._interval = self.MIN_INTERVAL
+            self._handle = self._loop.call_soon(self._poll)
+        return fut
+
+    def _poll(self):
+        self._handle = None
+        (ret, done) = self._shim.eq_poll(self._magic, self.eq, self.POLL_MAX)
+        if ret != 0:
+            # Fail everything rather than leave futures which never complete.
+            for fut in self._pending.values():
+                if not fut.done():
+                    fut.set_result((ret, None))
+            self._pending.clear()
+            return
+
+        for (token, rc, value) in done:
+            fut = self._pending.pop(token)
+            if not fut.done():
+                fut.set_result((rc, value))
+
+        if not self._pending:
+            return
+        if done:
+            self._interval = self.MIN_INTERVAL
+            self._handle = self._loop.call_soon(self._poll)
+        else:
+            self._handle = self._loop.call_later(self._interval, self._poll)
+            self._interval = min(self._interval * 2, self.MAX_INTERVAL)
+
+    def close(self):
+        """Cancel the in-flight futures and destroy the event queue.
+
+        The futures of the pending operations are cancelled, their results
+        are never delivered. The operations themselves cannot be aborted:
+        eq_destroy waits for them to complete inside the shim, without
+        releasing the GIL, before destroying the event queue.
+        """
+        if self.eq is None:
+            return 0
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if not self._loop.is_closed():
+            for fut in self._pending.values():
+                fut.cancel()
+        self._pending.clear()
+        ret = self._shim.eq_destroy(self._magic, self.eq)
+        self.eq = None
+        return ret
+
+async def run_window(submits, depth):
+    """Run operations with at most depth of them in flight.
+
+    submits is an iterator of (key, future) pairs, which is only advanced
+    while there is room in the window, and a dictionary of the results is
+    returned once every future has completed.
+    """
+    results = {}
+    pending = {}
+    for (key, fut) in submits:
+        pending[fut] = key
+        if len(pending) >= depth:
+            (done, _) = await asyncio.wait(pending,
+                                           return_when=asyncio.FIRST_COMPLETED)
+            for fut in done:
+                results[pending.pop(fut)] = fut.result()
+    if pending:
+        (done, _) = await asyncio.wait(pending)
+        for fut in done:
+            results[pending.pop(fut)] = fut.result()
+    return results
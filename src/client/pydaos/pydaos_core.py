@@ -26,6 +26,10 @@ import enum
 import uuid
 import pickle
 import sys
+import time
+import asyncio
+import threading
+from collections import OrderedDict
 
 # pylint: disable=no-name-in-module
 if sys.version_info < (3, 0):
@@ -37,6 +41,7 @@ else:
 from . import DAOS_MAGIC
 from . import PyDError
 from . import DaosClient
+from .pydaos_async import EventQueue, run_window
 
 # Import Object class as an enumeration
 ObjClassID = enum.Enum(
@@ -44,6 +49,105 @@ ObjClassID = enum.Enum(
     {key: value for key, value in pydaos_shim.__dict__.items()
      if key.startswith("OC_")})
 
+# Event queues used by the asyncio methods, one per event loop.
+_event_queues = {}
+
+def _event_queue():
+    """Return the event queue for the running event loop"""
+    loop = asyncio.get_event_loop()
+    queue = _event_queues.get(loop)
+    if queue is not None:
+        return queue
+    for old in [old for old in _event_queues if old.is_closed()]:
+        _event_queues.pop(old).close()
+    (ret, eq) = pydaos_shim.eq_create(DAOS_MAGIC)
+    if ret != pydaos_shim.DER_SUCCESS:
+        raise PyDError("failed to create event queue", ret)
+    queue = EventQueue(pydaos_shim, DAOS_MAGIC, eq, loop)
+    _event_queues[loop] = queue
+    return queue
+
+def _close_event_queues():
+    while _event_queues:
+        (_, queue) = _event_queues.popitem()
+        queue.close()
+
+DaosClient.register_cleanup(_close_event_queues)
+
+class _ObjHandles():
+    """
+    Open object handles, shared by the objects with the same container handle
+    and object ID. Handles which are no longer used by any object are kept
+    open for reuse, closing the least recently used once there are more than
+    max_idle of them.
+    """
+
+    def __init__(self, max_idle=64):
+        self.max_idle = max_idle
+        # [handle, number of objects using it] by (coh, hi, lo)
+        self._handles = {}
+        self._idle = OrderedDict()
+        # Objects can be released by the garbage collector at any time.
+        self._lock = threading.RLock()
+
+    def acquire(self, coh, oid):
+        """Return the key and an open handle for oid."""
+        key = (coh, oid.hi, oid.lo)
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is None:
+                (ret, oh) = pydaos_shim.kv_open(DAOS_MAGIC, coh, oid.hi,
+                                                 oid.lo, 0)
+                if ret != pydaos_shim.DER_SUCCESS:
+                    raise PyDError("failed to open object", ret)
+                entry = [oh, 0]
+                self._handles[key] = entry
+            else:
+                self._idle.pop(key, None)
+            entry[1] += 1
+            return (key, entry[0])
+
+    def release(self, key):
+        """Stop using the handle for key, and return a DAOS error code."""
+        with self._lock:
+            entry = self._handles.get(key)
+            if entry is None:
+                # Already closed by close().
+                return pydaos_shim.DER_SUCCESS
+            entry[1] -= 1
+            if entry[1] > 0:
+                return pydaos_shim.DER_SUCCESS
+            self._idle[key] = None
+            ret = pydaos_shim.DER_SUCCESS
+            while len(self._idle) > self.max_idle:
+                (old, _) = self._idle.popitem(last=False)
+                rc = self._close(old)
+                if ret == pydaos_shim.DER_SUCCESS:
+                    ret = rc
+            return ret
+
+    def _close(self, key):
+        (oh, _) = self._handles.pop(key)
+        return pydaos_shim.kv_close(DAOS_MAGIC, oh)
+
+    def close_cont(self, coh):
+        """Close the unused handles of a container before closing it."""
+        with self._lock:
+            for key in [key for key in self._idle if key[0] == coh]:
+                del self._idle[key]
+                self._close(key)
+
+    def close(self):
+        """Close every handle."""
+        with self._lock:
+            self._idle.clear()
+            while self._handles:
+                self._close(next(iter(self._handles)))
+
+_obj_handles = _ObjHandles()
+
+DaosClient.register_cleanup(_obj_handles.close)
+
 class KvNotFound(Exception):
     """Raised by get_kv_by_name if KV does not exist"""
 
@@ -109,9 +213,18 @@ class Cont(object):
     kv(oid)
         Open an already-allocated object identified by oid of type ObjID.
         Upon success, a python object of type KVObj is returned.
+    get_kv_by_name(name, root=None, create=False)
+        Return the KV stored under name in the root KV, optionally creating it.
+        aget_kv_by_name() is the asyncio equivalent.
+    enable_cache(max_entries=1024, ttl=None)
+        Remember the objects found by get_kv_by_name() in a KVCache, which is
+        returned and also available as the name_cache attribute.
     __str__
         print pool and container UUIDs
     """
+
+    # Cache of object IDs by name, if enabled, see enable_cache().
+    name_cache = None
     def __init__(self, puuid=None, cuuid=None, path=None):
         self._dc = DaosClient()
         self.coh = None
@@ -135,6 +248,7 @@ class Cont(object):
     def __del__(self):
         if not self.coh:
             return
+        _obj_handles.close_cont(self.coh)
         ret = pydaos_shim.cont_close(DAOS_MAGIC, self.poh, self.coh)
         if ret != pydaos_shim.DER_SUCCESS:
             raise PyDError("failed to close container", ret)
@@ -164,17 +278,50 @@ class Cont(object):
         oid = ObjID(hi, lo)
         return KVObj(self.coh, oid, self)
 
+    def enable_cache(self, max_entries=1024, ttl=None):
+        """Remember the objects found by get_kv_by_name()."""
+        self.name_cache = KVCache(max_entries=max_entries, ttl=ttl)
+        return self.name_cache
+
+    @staticmethod
+    def _name_key(name, root):
+        if not root:
+            return (None, name)
+        return ((root.oid.hi, root.oid.lo), name)
+
+    def _cached_kv(self, name, root):
+        if self.name_cache is None:
+            return None
+        oid = self.name_cache.lookup(self._name_key(name, root))
+        if oid is None:
+            return None
+        return self.kv(oid)
+
+    def _remember(self, name, root, oid):
+        if self.name_cache is not None:
+            self.name_cache.store(self._name_key(name, root), oid)
+
     def get_kv_by_name(self, name, root=None, create=False):
         """Return KV by name.
 
         Allow selection of root (or parent) container, and
         optionally create kv if not found"""
 
-        if not root:
-            root = self.rootkv()
-        if name in root:
-            object_data = pickle.loads(root[name])
-            return self.kv(object_data['oid'])
+        kv = self._cached_kv(name, root)
+        if kv is not None:
+            return kv
+
+        root_kv = root
+        if not root_kv:
+            root_kv = self.rootkv()
+        try:
+            data = root_kv[name]
+        except KeyError:
+            pass
+        else:
+            oid = pickle.loads(data)['oid']
+            self._remember(name, root, oid)
+            return self.kv(oid)
 
         if not create:
             raise KvNotFound(name)
@@ -185,7 +332,35 @@ class Cont(object):
         # of the new, referenced kv.  This allows for future
         # expansion of the definition without changing
         # existing containers.
-        root[name] = pickle.dumps({'oid': new_kv.oid})
+        root_kv[name] = pickle.dumps({'oid': new_kv.oid})
+        self._remember(name, root, new_kv.oid)
+        return new_kv
+
+    async def aget_kv_by_name(self, name, root=None, create=False):
+        """Return KV by name, without blocking the event loop on lookup."""
+
+        kv = self._cached_kv(name, root)
+        if kv is not None:
+            return kv
+
+        root_kv = root
+        if not root_kv:
+            root_kv = self.rootkv()
+        try:
+            data = await root_kv.aget(name)
+        except KeyError:
+            pass
+        else:
+            oid = pickle.loads(data)['oid']
+            self._remember(name, root, oid)
+            return self.kv(oid)
+
+        if not create:
+            raise KvNotFound(name)
+
+        new_kv = self.newkv()
+        await root_kv.aput(name, pickle.dumps({'oid': new_kv.oid}))
+        self._remember(name, root, new_kv.oid)
         return new_kv
 
     def __str__(self):
@@ -202,17 +377,14 @@ class _Obj(object):
         self.oh = None
         # keep container around until all objects are gone
         self.cont = cont
-        # Open to the object
-        (ret, oh) = pydaos_shim.kv_open(DAOS_MAGIC, coh, self.oid.hi,
-                                         self.oid.lo, 0)
-        if ret != pydaos_shim.DER_SUCCESS:
-            raise PyDError("failed to open object", ret)
-        self.oh = oh
+        # Open to the object, or share the handle of another object with the
+        # same oid.
+        (self._oh_key, self.oh) = _obj_handles.acquire(coh, self.oid)
 
     def __del__(self):
         if self.oh is None:
             return
-        ret = pydaos_shim.kv_close(DAOS_MAGIC, self.oh)
+        ret = _obj_handles.release(self._oh_key)
         if ret != pydaos_shim.DER_SUCCESS:
             raise PyDError("failed to close object", ret)
 
@@ -269,16 +441,314 @@ class KVIter():
             raise StopIteration()
 # pylint: enable=too-few-public-methods
 
+# pylint: disable=too-few-public-methods
+class AsyncKVIter():
+
+    """Asynchronous iterator class for KVObj"""
+
+    def __init__(self, kv):
+        self._dc = DaosClient()
+        self._entries = []
+        self._nr = 256
+        self._size = 4096 # optimized for 16-char strings
+        self._anchor = None
+        self._done = False
+        self._kv = kv
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while len(self._entries) == 0:
+            if self._done:
+                raise StopAsyncIteration()
+
+            # read more entries
+            (ret, value) = await _event_queue().submit(
+                'kv_list_async', self._kv.oh, self._nr, self._size,
+                self._anchor)
+            if ret != pydaos_shim.DER_SUCCESS:
+                raise PyDError("failed to enumerate KV pair", ret)
+
+            (self._entries, self._nr, self._size, self._anchor) = value
+            if self._anchor is None:
+                # no more entries to consume
+                self._done = True
+
+        return self._entries.pop()
+# pylint: enable=too-few-public-methods
+
+class _ValueSize():
+    """Size of buffer to use for reading the values of a KV
+
+    Starts at the upper limit, then follows the largest value read rounded up
+    to a power of two. A bigger value will have needed a second round trip so
+    the size grows straight away, but it only shrinks after a number of reads
+    in a row which would have fitted in a smaller buffer.
+    """
+
+    MIN_SIZE = 64
+    SHRINK_AFTER = 8
+
+    def __init__(self):
+        self.size = None
+        self._smaller = 0
+
+    def get(self, limit):
+        """Return the buffer size to use, up to limit"""
+        if self.size is None:
+            return limit
+        return min(self.size, limit)
+
+    def update(self, largest):
+        """Record the size of the largest value read by an operation"""
+        if largest == 0:
+            return
+        size = max(self.MIN_SIZE, 1 << (largest - 1).bit_length())
+        if self.size is None or size > self.size:
+            self.size = size
+            self._smaller = 0
+        elif size < self.size:
+            self._smaller += 1
+            if self._smaller >= self.SHRINK_AFTER:
+                self.size = max(size, self.size // 2)
+                self._smaller = 0
+        else:
+            self._smaller = 0
+
+def _nbytes(val):
+    """Return the size of a str or buffer protocol value"""
+    if isinstance(val, (bytes, str)):
+        return len(val)
+    return memoryview(val).nbytes
+
+def _largest_value(ddict):
+    return max((_nbytes(val) for val in ddict.values() if val is not None),
+               default=0)
+
+class KVCache():
+    """
+    Class representing a client-side cache of the values read from a KV
+
+    Entries are evicted least recently used first once there are more than
+    max_entries of them and, if ttl is set, are not returned more than ttl
+    seconds after being read or written. The cache is only kept up to date
+    with writes made through the KVObj it is attached to, so ttl bounds how
+    long changes made by other clients can go unseen.
+
+    Attributes
+    ----------
+    hits : int
+        Number of lookups answered from the cache
+    misses : int
+        Number of lookups which needed to be read from DAOS
+    evictions : int
+        Number of entries dropped to stay within max_entries
+
+    Methods
+    -------
+    invalidate(key=None)
+        Drop key from the cache, or every entry if key is None.
+    """
+
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key):
+        """Return the cached value for key, or None"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            (val, expires) = entry
+            if expires is None or expires > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return val
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def store(self, key, val):
+        """Save the value of key, as read from DAOS"""
+        if val is None:
+            self._entries.pop(key, None)
+            return
+        expires = None
+        if self.ttl is not None:
+            expires = time.monotonic() + self.ttl
+        self._entries[key] = (val, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def write(self, key, val):
+        """Update key with a value written to DAOS"""
+        # Save the value in the form it would be read back in.
+        if isinstance(val, str):
+            val = val.encode('utf-8')
+        # Other buffers are not cached, as the caller may still modify them.
+        if isinstance(val, bytes) and val:
+            self.store(key, val)
+        else:
+            self._entries.pop(key, None)
+
+    def invalidate(self, key=None):
+        """Drop key from the cache, or every entry if key is None."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+class KVBatch():
+    """
+    Class representing a write-behind buffer of puts and deletes to a KVObj
+
+    Writes are held back and sent with a single bulk put once max_count keys
+    or max_bytes of keys and values are waiting, or max_delay seconds after
+    the oldest write, as well as on flush() and when used as a context manager
+    on exit. Only the last value written to each key is sent, which also keeps
+    a put followed by a delete of the same key in order, as the operations in
+    a bulk put run in parallel.
+
+    Values are not copied, so buffers such as bytearrays or numpy arrays
+    should not be modified until the batch they are queued in has been sent.
+
+    Errors are raised by the flush that sends the batch, and for batches sent
+    from the max_delay timer by the next write, flush() or exit.
+    Reads through the batch see the values waiting to be written.
+
+    Methods
+    -------
+    put(key, val)
+        Queue an update/insert, or a delete if val is None or empty.
+    get(key)
+        Retrieve value associated with the key, including queued writes.
+    flush()
+        Send any queued writes.
+    """
+
+    def __init__(self, kv, max_count=1024, max_bytes=16*1024*1024,
+                 max_delay=1.0):
+        self._kv = kv
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._bytes = 0
+        self._timer = None
+        self._error = None
+
+    @staticmethod
+    def _size(key, val):
+        if val is None:
+            return len(key)
+        return len(key) + _nbytes(val)
+
+    def put(self, key, val):
+        """Queue an update/insert, or a delete if val is None or empty."""
+        with self._lock:
+            self._raise_error()
+            if key in self._pending:
+                self._bytes -= self._size(key, self._pending[key])
+            self._pending[key] = val
+            self._bytes += self._size(key, val)
+            if (len(self._pending) >= self.max_count or
+                    self._bytes >= self.max_bytes):
+                self._send()
+            elif self._timer is None and self.max_delay is not None:
+                self._timer = threading.Timer(self.max_delay, self._expired)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def __setitem__(self, key, val):
+        self.put(key, val)
+
+    def __delitem__(self, key):
+        self.put(key, None)
+
+    def get(self, key):
+        """Retrieve value associated with the key, including queued writes."""
+        with self._lock:
+            if key in self._pending:
+                val = self._pending[key]
+                if val is None or _nbytes(val) == 0:
+                    raise KeyError(key)
+                if isinstance(val, str):
+                    val = val.encode('utf-8')
+                return val
+        return self._kv.get(key)
+
+    def __getitem__(self, key):
+        return self.get(key)
+
+    def flush(self):
+        """Send any queued writes."""
+        with self._lock:
+            self._send()
+            self._raise_error()
+
+    def _send(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        ddict = self._pending
+        self._pending = {}
+        self._bytes = 0
+        self._kv.bput(ddict)
+
+    def _expired(self):
+        with self._lock:
+            self._timer = None
+            try:
+                self._send()
+            except PyDError as error:
+                if self._error is None:
+                    self._error = error
+
+    def _raise_error(self):
+        if self._error is not None:
+            error = self._error
+            self._error = None
+            raise error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+            return
+        # Keep the writes made before the exception, but do not hide it.
+        try:
+            self.flush()
+        except PyDError:
+            pass
+
 class KVObj(_Obj):
     """
     Class representing of DAOS key-value (KV) store object
     As all DAOS objects, a KV object is identified by a unique 128-bit
     identifier represented by the class ObjID.
-    Only strings are supported for both the key and value for now.
+    Keys are strings. Values are either strings, stored as utf-8, or any
+    object supporting the buffer protocol (bytes, bytearray, memoryview, numpy
+    arrays, ...), which is stored from its own memory without being copied.
+    Values are read back as bytes, or into the buffer already in the
+    dictionary passed to bget if it is writable and large enough (see bget).
     Key-value pair can be inserted/looked up once at a time (see put/get) or
     in bulk (see bput/bget) taking a python dict as an input. The bulk
-    operations are issued in parallel (up to 16 operations in flight) to
-    maximize the operation rate.
+    operations are issued in parallel (up to depth operations in flight, 16 by
+    default) to maximize the operation rate.
     Key-value pair are deleted via the put/bput operations by setting the value
     to either None or the empty string. Once deleted, the key won't be reported
     during iteration.
@@ -293,6 +763,12 @@ class KVObj(_Obj):
     - 'bool(dkv)' reports 'False' if there is no key-value pairs in the DAOS KV
       and 'True' otherwise.
 
+    The get, put, bget and bput operations have asyncio equivalents named
+    aget, aput, abget and abput, and 'async for key in dkv:' walks through the
+    key space. These submit operations to an event queue polled by the running
+    event loop rather than blocking the calling thread, so operations on many
+    objects can be in flight at once.
+
     Python iterators are supported, which means that "for key in kvobj:" will
     allow you to walk through the key space.
     For each method, a PyDError exception is raised with proper DAOS error code
@@ -302,26 +778,108 @@ class KVObj(_Obj):
     -------
     get(key)
         Retrieve value associated with the key.
-        If found, the string value is returned, None is returned otherwise.
+        If found, the value is returned as bytes, KeyError is raised
+        otherwise.
     put(key, val)
-        Update/insert key-value pair. Both parameters should be strings.
-    bget(ddict)
+        Update/insert key-value pair. The key should be a string, and the
+        value a string or any object supporting the buffer protocol.
+    bget(ddict, value_size=None, depth=None)
         Bulk get value for all the keys of the input python dictionary.
         Get operations are issued in parallel over the network.
         The existing value in ddict is overwritten with the value retrieved from
         DAOS. If the key isn't found, the value is set to None.
-    bput(ddict)
+        If the existing value is a non-empty writable buffer, the value is
+        read directly into it and the buffer is kept in ddict, or a
+        memoryview of the part of it filled in if the value is shorter. Values
+        which do not fit are returned as bytes instead.
+    bput(ddict, depth=None)
         Bulk put all the key-value pairs of the input python dictionary.
         Put operations are issued in parallel over the network.
         If the value is set to None or an empty string, the key is deleted from
         the DAOS KV store.
     dump()
         Fetch all the key-value pairs and return them in a python dictionary.
+    batch(max_count=1024, max_bytes=16MiB, max_delay=1.0)
+        Return a KVBatch which queues puts and deletes, sending them with bput
+        in batches. Usable as a context manager which flushes on exit.
+    enable_cache(max_entries=1024, ttl=None)
+        Answer reads from a KVCache of previously read and written values,
+        which is returned and also available as the cache attribute.
+    disable_cache()
+        Stop caching values.
     """
 
+    # Cache of values, if enabled, see enable_cache().
+    cache = None
+
     # Size of buffer to use for reads.  If the object value is bigger than this
-    # then it'll require two round trips rather than one.
-    value_size = 1024*1024
+    # then it'll require two round trips rather than one.  If None then the
+    # size is learned from the values previously read from this object, up to
+    # max_value_size.
+    value_size = None
+    max_value_size = 1024*1024
+
+    # Number of operations kept in flight by the bulk operations.
+    depth = 16
+
+    def __init__(self, coh, oid, cont):
+        super().__init__(coh, oid, cont)
+        self._value_size = _ValueSize()
+
+    def _get_value_size(self, value_size):
+        if value_size is None:
+            value_size = self.value_size
+        if value_size is None:
+            value_size = self._value_size.get(self.max_value_size)
+        return value_size
+
+    def batch(self, max_count=1024, max_bytes=16*1024*1024, max_delay=1.0):
+        """Return a write-behind buffer which sends puts in batches."""
+        return KVBatch(self, max_count=max_count, max_bytes=max_bytes,
+                       max_delay=max_delay)
+
+    def enable_cache(self, max_entries=1024, ttl=None):
+        """Answer reads from a cache of previously read and written values."""
+        self.cache = KVCache(max_entries=max_entries, ttl=ttl)
+        return self.cache
+
+    def disable_cache(self):
+        """Stop caching values."""
+        self.cache = None
+
+    def _cache_lookup(self, ddict):
+        """Fill in cached values, and return a dict of keys still to read"""
+        if self.cache is None:
+            return ddict
+        fetch = {}
+        for key in ddict:
+            val = self.cache.lookup(key)
+            if val is None:
+                fetch[key] = ddict[key]
+            else:
+                ddict[key] = val
+        return fetch
+
+    def _cache_fetched(self, ddict, fetch):
+        if fetch is ddict:
+            return
+        for (key, val) in fetch.items():
+            ddict[key] = val
+            if val is None or isinstance(val, bytes):
+                self.cache.store(key, val)
+            else:
+                # Read into a buffer of the caller, which may modify it.
+                self.cache.invalidate(key)
+
+    def _cache_write(self, ddict, ret):
+        if self.cache is None:
+            return
+        for (key, val) in ddict.items():
+            if ret == pydaos_shim.DER_SUCCESS:
+                self.cache.write(key, val)
+            else:
+                # Some of the values may have been written.
+                self.cache.invalidate(key)
 
     def get(self, key):
         """Retrieve value associated with the key."""
@@ -346,41 +904,53 @@ class KVObj(_Obj):
     def __delitem__(self, key):
         self.put(key, None)
 
-    def bget(self, ddict, value_size=None):
+    def bget(self, ddict, value_size=None, depth=None):
         """Bulk get value for all the keys of the input python dictionary."""
-        if value_size is None:
-            value_size = self.value_size
-        ret = pydaos_shim.kv_get(DAOS_MAGIC, self.oh, ddict, value_size)
+        if depth is None:
+            depth = self.depth
+        fetch = self._cache_lookup(ddict)
+        if not fetch:
+            return
+        ret = pydaos_shim.kv_get(DAOS_MAGIC, self.oh, fetch,
+                                 self._get_value_size(value_size), depth)
         if ret != pydaos_shim.DER_SUCCESS:
             raise PyDError("failed to retrieve KV value", ret)
+        self._value_size.update(_largest_value(fetch))
+        self._cache_fetched(ddict, fetch)
 
-    def bput(self, ddict):
+    def bput(self, ddict, depth=None):
         """Bulk put all the key-value pairs of the input python dictionary."""
-        ret = pydaos_shim.kv_put(DAOS_MAGIC, self.oh, ddict)
+        if depth is None:
+            depth = self.depth
+        ret = pydaos_shim.kv_put(DAOS_MAGIC, self.oh, ddict, depth)
+        self._cache_write(ddict, ret)
         if ret != pydaos_shim.DER_SUCCESS:
             raise PyDError("failed to store KV value", ret)
 
     def dump(self):
         """Fetch all the key-value pairs and return them in a python dictionary."""
-        # leverage python iterator, see __iter__/__next__ below
-        # could be optimized over the C library in the future
+        # keys are listed and their values fetched in a single pass by the
+        # shim layer
         d = {}
-        for key in self:
-            d[key] = None
-        self.bget(d)
+        ret = pydaos_shim.kv_dump(DAOS_MAGIC, self.oh, d,
+                                  self._get_value_size(None), self.depth)
+        if ret != pydaos_shim.DER_SUCCESS:
+            raise PyDError("failed to dump KV", ret)
+        self._value_size.update(_largest_value(d))
         return d
 
+    def _count(self, limit=0):
+        """Count the keys, stopping at limit if not zero."""
+        (ret, nr) = pydaos_shim.kv_count(DAOS_MAGIC, self.oh, limit)
+        if ret != pydaos_shim.DER_SUCCESS:
+            raise PyDError("failed to enumerate KV pair", ret)
+        return nr
+
     def __len__(self):
-        # Not efficient for now. Fetch all keys and count them.
-        i = 0
-        for _ in self:
-            i += 1
-        return i
+        return self._count()
 
     def __bool__(self):
-        for _ in self:
-            return True
-        return False
+        return self._count(1) != 0
 
     def __contains__(self, key):
         try:
@@ -391,3 +961,54 @@ class KVObj(_Obj):
 
     def __iter__(self):
         return KVIter(self)
+
+    def __aiter__(self):
+        return AsyncKVIter(self)
+
+    async def aget(self, key):
+        """Retrieve value associated with the key."""
+        d = {key : None}
+        await self.abget(d)
+        if d[key] is None:
+            raise KeyError(key)
+        return d[key]
+
+    async def aput(self, key, val):
+        """Update/insert key-value pair. Both parameters should be strings."""
+        await self.abput({key : val})
+
+    async def abget(self, ddict, value_size=None, depth=None):
+        """Bulk get value for all the keys of the input python dictionary."""
+        if depth is None:
+            depth = self.depth
+        fetch = self._cache_lookup(ddict)
+        if not fetch:
+            return
+        queue = _event_queue()
+        value_size = self._get_value_size(value_size)
+        results = await run_window(
+            ((key, queue.submit('kv_get_async', self.oh, key, value_size,
+                                fetch[key]))
+             for key in list(fetch)), depth)
+        for (key, (ret, val)) in results.items():
+            if ret != pydaos_shim.DER_SUCCESS:
+                raise PyDError("failed to retrieve KV value", ret)
+            fetch[key] = val
+        self._value_size.update(_largest_value(fetch))
+        self._cache_fetched(ddict, fetch)
+
+    async def abput(self, ddict, depth=None):
+        """Bulk put all the key-value pairs of the input python dictionary."""
+        if depth is None:
+            depth = self.depth
+        queue = _event_queue()
+        results = await run_window(
+            ((key, queue.submit('kv_put_async', self.oh, key, val))
+             for (key, val) in list(ddict.items())), depth)
+        ret = pydaos_shim.DER_SUCCESS
+        for (rc, _) in results.values():
+            if rc != pydaos_shim.DER_SUCCESS:
+                ret = rc
+        self._cache_write(ddict, ret)
+        if ret != pydaos_shim.DER_SUCCESS:
+            raise PyDError("failed to store KV value", ret)
@@ -61,7 +61,7 @@ __is_magic_valid(int input)
 do {									\
 	int magic;							\
 	if (!PyArg_ParseTuple(args, "i", &magic)) {			\
-		DEBUG_PRINT("Bad arguments passed to %s", __func__);	\
+		D_DEBUG(DB_ANY, "Bad args passed to %s", __func__);	\
 		return NULL;						\
 	}								\
 									\
@@ -85,6 +85,8 @@ do {									\
 	}								\
 } while (0)
 
+static int kv_eq_pool_fini(void);
+
 /**
  * Implementations of baseline shim functions
  */
@@ -103,8 +105,12 @@ static PyObject *
 __shim_handle__daos_fini(PyObject *self, PyObject *args)
 {
 	int rc;
+	int ret;
 
-	rc = daos_fini();
+	rc = kv_eq_pool_fini();
+	ret = daos_fini();
+	if (rc == DER_SUCCESS)
+		rc = ret;
 
 	return PyInt_FromLong(rc);
 }
@@ -460,32 +466,287 @@ __shim_handle__kv_close(PyObject *self, PyObject *args)
  * Implementation of kv functions
  */
 
-/** max number of concurrent put/get requests */
-#define MAX_INFLIGHT 16
+/**
+ * default number of concurrent put/get requests, callers can pass a different
+ * depth to each bulk operation
+ */
+#define DEFAULT_INFLIGHT 16
 
 struct kv_op {
 	daos_event_t	 ev;
 	PyObject	*key_obj;
 	char		*key;
+	/**
+	 * for gets, the bytes object the value is read into, which becomes the
+	 * value without a copy. For async puts, a reference on the value.
+	 */
+	PyObject	*val_obj;
+	/** caller buffer the value is read from or into, if view.obj is set */
+	Py_buffer	 view;
 	char		*buf;
 	daos_size_t	 size;
-	daos_size_t	buf_size;
+	daos_size_t	 buf_size;
 };
 
-static inline int
-kv_get_comp(struct kv_op *op, PyObject *daos_dict)
+static inline char *
+kv_key_str(PyObject *key)
 {
-	PyObject	*val;
+#ifdef __USE_PYTHON3__
+	if (PyUnicode_Check(key))
+		return (char *)PyUnicode_AsUTF8(key);
+#endif
+	return PyString_AsString(key);
+}
+
+/** Release the value buffer of an operation */
+static inline void
+kv_op_release(struct kv_op *op)
+{
+	Py_CLEAR(op->val_obj);
+	if (op->view.obj != NULL)
+		PyBuffer_Release(&op->view);
+	op->buf = NULL;
+}
+
+/** maximum number of idle event queues kept for reuse */
+#define KV_EQ_POOL_MAX	4
+
+/**
+ * Event queue with initialized events for up to nr_ops operations, kept in a
+ * pool between bulk calls so that they don't create and destroy an event
+ * queue and its events every time. The shim never releases the GIL, so the
+ * pool is only used by one thread at a time.
+ */
+struct kv_eq {
+	daos_handle_t	 eq;
+	struct kv_op	*ops;
+	int		 nr_ops;
+	/** event for the enumeration run by kv_dump alongside the gets */
+	daos_event_t	 ev;
+};
+
+static struct kv_eq	*kv_eq_pool[KV_EQ_POOL_MAX];
+static int		 kv_eq_pool_nr;
+
+/**
+ * Destroy an event queue and its events. If any are still in flight after a
+ * polling failure, they are left to a forced destroy of the event queue.
+ */
+static int
+kv_eq_destroy(struct kv_eq *keq, bool busy)
+{
+	int i;
+	int rc;
+
+	if (!busy) {
+		for (i = 0; i < keq->nr_ops; i++)
+			daos_event_fini(&keq->ops[i].ev);
+		daos_event_fini(&keq->ev);
+	}
+	rc = daos_eq_destroy(keq->eq, busy ? DAOS_EQ_DESTROY_FORCE : 0);
+	D_FREE(keq->ops);
+	D_FREE(keq);
+
+	return rc;
+}
+
+/** Replace the operations of an event queue with depth new ones */
+static int
+kv_eq_grow(struct kv_eq *keq, int depth)
+{
+	struct kv_op	*ops;
+	int		 rc = 0;
+
+	D_ALLOC_ARRAY(ops, depth);
+	if (ops == NULL)
+		return -DER_NOMEM;
+
+	while (keq->nr_ops > 0)
+		daos_event_fini(&keq->ops[--keq->nr_ops].ev);
+	D_FREE(keq->ops);
+	keq->ops = ops;
+
+	for (; keq->nr_ops < depth; keq->nr_ops++) {
+		rc = daos_event_init(&ops[keq->nr_ops].ev, keq->eq, NULL);
+		if (rc)
+			break;
+	}
+
+	return rc;
+}
+
+/**
+ * Take an event queue with at least depth operations from the pool, or
+ * create one if the pool is empty.
+ */
+static int
+kv_eq_get(int depth, struct kv_eq **keqp)
+{
+	struct kv_eq	*keq;
 	int		 rc;
 
-	/** insert value in python dict */
+	if (kv_eq_pool_nr > 0) {
+		keq = kv_eq_pool[--kv_eq_pool_nr];
+	} else {
+		D_ALLOC_PTR(keq);
+		if (keq == NULL)
+			return -DER_NOMEM;
+		rc = daos_eq_create(&keq->eq);
+		if (rc) {
+			D_FREE(keq);
+			return rc;
+		}
+		rc = daos_event_init(&keq->ev, keq->eq, NULL);
+		if (rc) {
+			daos_eq_destroy(keq->eq, 0);
+			D_FREE(keq);
+			return rc;
+		}
+	}
+
+	if (keq->nr_ops < depth) {
+		rc = kv_eq_grow(keq, depth);
+		if (rc) {
+			kv_eq_destroy(keq, false);
+			return rc;
+		}
+	}
+
+	*keqp = keq;
+	return DER_SUCCESS;
+}
+
+/**
+ * Return an event queue to the pool, or destroy it if some of its events are
+ * still busy or the pool is full.
+ */
+static int
+kv_eq_put(struct kv_eq *keq, bool busy)
+{
+	if (busy || kv_eq_pool_nr == KV_EQ_POOL_MAX)
+		return kv_eq_destroy(keq, busy);
+
+	kv_eq_pool[kv_eq_pool_nr++] = keq;
+	return DER_SUCCESS;
+}
+
+/** Destroy the event queues in the pool, before daos_fini() */
+static int
+kv_eq_pool_fini(void)
+{
+	int rc = DER_SUCCESS;
+	int ret;
+
+	while (kv_eq_pool_nr > 0) {
+		ret = kv_eq_destroy(kv_eq_pool[--kv_eq_pool_nr], false);
+		if (rc == DER_SUCCESS)
+			rc = ret;
+	}
+
+	return rc;
+}
+
+/**
+ * Set up the buffer to read a value into. If the current value is a
+ * non-empty writable buffer (bytearray, numpy array, ...), the value is read
+ * into it directly, otherwise into a new bytes object of buf_size.
+ */
+static int
+kv_get_buffer(struct kv_op *op, PyObject *value)
+{
+	if (value != NULL && value != Py_None && PyObject_CheckBuffer(value)) {
+		if (PyObject_GetBuffer(value, &op->view, PyBUF_WRITABLE) == 0) {
+			if (op->view.len > 0) {
+				op->buf = op->view.buf;
+				op->size = op->view.len;
+				return DER_SUCCESS;
+			}
+			PyBuffer_Release(&op->view);
+		} else {
+			/** read-only, such as bytes from a previous get */
+			PyErr_Clear();
+		}
+	}
+
+	op->val_obj = PyBytes_FromStringAndSize(NULL, op->buf_size);
+	if (op->val_obj == NULL)
+		return -DER_NOMEM;
+	op->buf = PyBytes_AS_STRING(op->val_obj);
+	op->size = op->buf_size;
+
+	return DER_SUCCESS;
+}
+
+/** Switch to a bytes object big enough for the value after -DER_REC2BIG */
+static int
+kv_get_grow(struct kv_op *op)
+{
+	kv_op_release(op);
+	op->buf_size = op->size;
+
+	return kv_get_buffer(op, NULL);
+}
+
+/**
+ * Return the value read by a get: None if the key wasn't found, the caller
+ * buffer, or a memoryview of the start of it if the value is shorter, or
+ * the bytes object trimmed to the value size.
+ */
+static PyObject *
+kv_get_value(struct kv_op *op)
+{
+	PyObject	*val = NULL;
+	PyObject	*view;
+	PyObject	*bytes;
+
 	if (op->size == 0) {
+		kv_op_release(op);
 		Py_INCREF(Py_None);
-		val = Py_None;
-	} else {
-		val = PyBytes_FromStringAndSize(op->buf, op->size);
+		return Py_None;
+	}
+
+	if (op->view.obj != NULL) {
+		if (op->size == op->view.len) {
+			val = op->view.obj;
+			Py_INCREF(val);
+		} else {
+			view = PyMemoryView_FromObject(op->view.obj);
+#ifdef __USE_PYTHON3__
+			if (view != NULL) {
+				/** slice by byte whatever the item type */
+				bytes = PyObject_CallMethod(view, "cast", "s",
+							    "B");
+				Py_DECREF(view);
+				view = bytes;
+			}
+#endif
+			if (view != NULL) {
+				val = PySequence_GetSlice(view, 0, op->size);
+				Py_DECREF(view);
+			}
+		}
+		kv_op_release(op);
+		return val;
 	}
 
+	if (op->size < op->buf_size &&
+	    _PyBytes_Resize(&op->val_obj, op->size) < 0)
+		return NULL;
+	val = op->val_obj;
+	op->val_obj = NULL;
+	op->buf = NULL;
+
+	return val;
+}
+
+static inline int
+kv_get_comp(struct kv_op *op, PyObject *daos_dict)
+{
+	PyObject	*val;
+	int		 rc;
+
+	/** insert value in python dict */
+	val = kv_get_value(op);
 	if (val == NULL)
 		return -DER_IO;
 
@@ -500,187 +761,229 @@ kv_get_comp(struct kv_op *op, PyObject *daos_dict)
 	return rc;
 }
 
+static int
+kv_get_submit(daos_handle_t oh, struct kv_op *op, PyObject *key,
+	      PyObject *value)
+{
+	int rc;
+
+	op->key_obj = key;
+	op->key = kv_key_str(key);
+	if (!op->key)
+		return -DER_INVAL;
+
+	rc = kv_get_buffer(op, value);
+	if (rc)
+		return rc;
+
+	rc = daos_kv_get(oh, DAOS_TX_NONE, 0, op->key, &op->size, op->buf,
+			 &op->ev);
+	if (rc)
+		kv_op_release(op);
+
+	return rc;
+}
+
+/**
+ * Wait for a get to complete and insert its value in the dictionary,
+ * resubmitting it with a bigger buffer if the value did not fit.
+ * *opp is set to the completed operation, or NULL if polling failed.
+ */
+static int
+kv_get_wait(daos_handle_t oh, daos_handle_t eq, PyObject *daos_dict,
+	    struct kv_op **opp)
+{
+	daos_event_t	*evp;
+	struct kv_op	*op;
+	int		 rc;
+
+	*opp = NULL;
+	while (1) {
+		rc = daos_eq_poll(eq, 1, DAOS_EQ_WAIT, 1, &evp);
+		if (rc < 0)
+			return rc;
+		if (rc == 0)
+			return -DER_IO;
+
+		op = container_of(evp, struct kv_op, ev);
+		if (evp->ev_error != -DER_REC2BIG)
+			break;
+
+		rc = kv_get_grow(op);
+		if (rc == DER_SUCCESS)
+			rc = daos_kv_get(oh, DAOS_TX_NONE, 0, op->key,
+					 &op->size, op->buf, evp);
+		if (rc) {
+			kv_op_release(op);
+			*opp = op;
+			return rc;
+		}
+	}
+
+	*opp = op;
+	if (evp->ev_error != DER_SUCCESS || PyErr_Occurred()) {
+		kv_op_release(op);
+		return evp->ev_error ? evp->ev_error : -DER_IO;
+	}
+
+	return kv_get_comp(op, daos_dict);
+}
+
 static PyObject *
 __shim_handle__kv_get(PyObject *self, PyObject *args)
 {
 	PyObject	*daos_dict;
 	daos_handle_t	 oh;
 	PyObject	*key;
+	PyObject	*value;
 	Py_ssize_t	 pos = 0;
-	daos_handle_t	 eq;
-	struct kv_op	*kv_array = NULL;
+	struct kv_eq	*keq;
 	struct kv_op	*op;
-	daos_event_t	*evp;
 	int		 i = 0;
+	int		 inflight = 0;
+	int		 depth = DEFAULT_INFLIGHT;
 	int		 rc;
 	int		 ret;
 	size_t		 v_size;
 
 	/* Parse arguments */
-	RETURN_NULL_IF_FAILED_TO_PARSE(args, "LO!l", &oh.cookie, &PyDict_Type,
-				       &daos_dict, &v_size);
+	RETURN_NULL_IF_FAILED_TO_PARSE(args, "LO!l|i", &oh.cookie, &PyDict_Type,
+				       &daos_dict, &v_size, &depth);
+	if (depth <= 0)
+		return PyInt_FromLong(-DER_INVAL);
 
-	rc = daos_eq_create(&eq);
+	rc = kv_eq_get(depth, &keq);
 	if (rc)
 		return PyInt_FromLong(rc);
 
-	D_ALLOC_ARRAY(kv_array, MAX_INFLIGHT);
-	if (kv_array == NULL) {
-		rc = -DER_NOMEM;
-		goto out;
-	}
-
-	while (PyDict_Next(daos_dict, &pos, &key, NULL)) {
-		if (i < MAX_INFLIGHT) {
+	while (PyDict_Next(daos_dict, &pos, &key, &value)) {
+		if (i < depth) {
 			/** haven't reached max request in flight yet */
-			op = &kv_array[i];
-			evp = &op->ev;
-			rc = daos_event_init(evp, eq, NULL);
-			if (rc)
-				break;
+			op = &keq->ops[i];
 			op->buf_size = v_size;
-			op->size = op->buf_size;
-			D_ALLOC(op->buf, op->buf_size);
-			if (op->buf == NULL) {
-				rc = -DER_NOMEM;
-				break;
-			}
-
 			i++;
 		} else {
 			/**
 			 * max request request in flight reached, wait
 			 * for one i/o to complete to reuse the slot
 			 */
-rewait:
-			rc = daos_eq_poll(eq, 1, DAOS_EQ_WAIT, 1, &evp);
-			if (rc < 0)
-				break;
-			if (rc == 0) {
-				rc = -DER_IO;
-				break;
-			}
-
-			op = container_of(evp, struct kv_op, ev);
-
-			/** check result of completed operation */
-			if (evp->ev_error == DER_SUCCESS) {
-				rc = kv_get_comp(op, daos_dict);
-				if (rc != DER_SUCCESS)
-					D_GOTO(err, 0);
-				/* Reset the size of the request */
-				op->size = op->buf_size;
-				evp->ev_error = 0;
-			} else if (evp->ev_error == -DER_REC2BIG) {
-				char *new_buff;
-
-				D_REALLOC(new_buff, op->buf, op->size);
-				if (new_buff == NULL) {
-					rc = -DER_NOMEM;
-					break;
-				}
-				op->buf_size = op->size;
-				op->buf = new_buff;
-
-				daos_event_fini(evp);
-				rc = daos_event_init(evp, eq, NULL);
-				if (rc != -DER_SUCCESS)
-					break;
-
-				rc = daos_kv_get(oh, DAOS_TX_NONE, 0, op->key,
-						&op->size, op->buf, evp);
-				if (rc != -DER_SUCCESS)
-					break;
-				D_GOTO(rewait, 0);
-			} else {
-				rc = evp->ev_error;
+			rc = kv_get_wait(oh, keq->eq, daos_dict, &op);
+			if (op != NULL)
+				inflight--;
+			if (rc)
 				break;
-			}
 		}
 
 		/** submit get request */
-		op->key_obj = key;
-#ifdef __USE_PYTHON3__
-		if (PyUnicode_Check(key)) {
-			op->key = (char *)PyUnicode_AsUTF8(key);
-		} else
-#endif
-		{
-			op->key = PyString_AsString(key);
-		}
-		if (!op->key)
-			D_GOTO(err, 0);
-		rc = daos_kv_get(oh, DAOS_TX_NONE, 0, op->key, &op->size,
-				 op->buf, evp);
-		if (rc) {
+		rc = kv_get_submit(oh, op, key, value);
+		if (rc)
 			break;
-		}
+		inflight++;
 	}
 
 	/** wait for completion of all in-flight requests */
-	do {
-		ret = daos_eq_poll(eq, 1, DAOS_EQ_WAIT, 1, &evp);
-		if (ret == 1) {
-			int rc2;
-
-			op = container_of(evp, struct kv_op, ev);
-
-			/** check result of completed operation */
-			if (evp->ev_error == DER_SUCCESS) {
-				rc2 = kv_get_comp(op, daos_dict);
-				if (rc == DER_SUCCESS && rc2 != DER_SUCCESS)
-					D_GOTO(err, rc = rc2);
-				continue;
-			} else if (evp->ev_error == -DER_REC2BIG) {
-				char *new_buff;
-
-				daos_event_fini(evp);
-				rc2 = daos_event_init(evp, eq, NULL);
-
-				D_REALLOC(new_buff, op->buf, op->size);
-				if (new_buff == NULL)
-					D_GOTO(out, rc = -DER_NOMEM);
-
-				op->buf_size = op->size;
-				op->buf = new_buff;
-
-				rc2 = daos_kv_get(oh, DAOS_TX_NONE, 0, op->key,
-						&op->size, op->buf, evp);
-				if (rc2 != -DER_SUCCESS)
-					D_GOTO(out, rc = rc2);
-			} else {
-				if (rc == DER_SUCCESS)
-					rc = evp->ev_error;
-			}
-		}
-		if (rc == DER_SUCCESS && ret == 1)
-			rc = evp->ev_error;
-	} while (ret == 1);
+	while (inflight > 0) {
+		ret = kv_get_wait(oh, keq->eq, daos_dict, &op);
+		if (rc == DER_SUCCESS)
+			rc = ret;
+		if (op == NULL)
+			break;
+		inflight--;
+	}
 
+	/** return event queue to the pool */
+	ret = kv_eq_put(keq, inflight > 0);
 	if (rc == DER_SUCCESS && ret < 0)
 		rc = ret;
 
-	/** free up all buffers */
-	for (i = 0; i < MAX_INFLIGHT; i++) {
-		op = &kv_array[i];
-		D_FREE(op->buf);
+	if (PyErr_Occurred())
+		return NULL;
+
+	/* Populate return list */
+	return PyInt_FromLong(rc);
+}
+
+/**
+ * Set up the buffer to store a value from. None deletes the key, strings are
+ * stored as utf-8, and anything supporting the buffer protocol (bytes,
+ * bytearray, memoryview, numpy arrays, ...) is stored from its own memory,
+ * through a view held until the put completes.
+ */
+static int
+kv_put_buffer(struct kv_op *op, PyObject *value)
+{
+	if (value == Py_None) {
+		op->size = 0;
+		return DER_SUCCESS;
 	}
 
-out:
-	D_FREE(kv_array);
+#ifdef __USE_PYTHON3__
+	if (PyUnicode_Check(value)) {
+		Py_ssize_t pysize = 0;
+
+		op->buf = (char *)PyUnicode_AsUTF8AndSize(value, &pysize);
+		if (op->buf == NULL)
+			return -DER_INVAL;
+		op->size = pysize;
+		return DER_SUCCESS;
+	}
+#endif
 
-	/** destroy event queue */
-	ret = daos_eq_destroy(eq, DAOS_EQ_DESTROY_FORCE);
-	if (rc == DER_SUCCESS && ret < 0)
-		rc = ret;
+	if (PyObject_GetBuffer(value, &op->view, PyBUF_SIMPLE) < 0)
+		return -DER_INVAL;
+	op->buf = op->view.buf;
+	op->size = op->view.len;
 
-	/* Populate return list */
-	return PyInt_FromLong(rc);
+	return DER_SUCCESS;
+}
 
-err:
-	D_FREE(kv_array);
+static int
+kv_put_submit(daos_handle_t oh, struct kv_op *op, PyObject *key,
+	      PyObject *value)
+{
+	int rc;
 
-	return NULL;
+	op->key = kv_key_str(key);
+	if (!op->key)
+		return -DER_INVAL;
+
+	rc = kv_put_buffer(op, value);
+	if (rc)
+		return rc;
+
+	/** insert or delete kv pair */
+	if (op->size == 0)
+		rc = daos_kv_remove(oh, DAOS_TX_NONE, 0, op->key, &op->ev);
+	else
+		rc = daos_kv_put(oh, DAOS_TX_NONE, 0, op->key, op->size,
+				 op->buf, &op->ev);
+	if (rc)
+		kv_op_release(op);
+
+	return rc;
+}
+
+/**
+ * Wait for a put to complete and release its value.
+ * *opp is set to the completed operation, or NULL if polling failed.
+ */
+static int
+kv_put_wait(daos_handle_t eq, struct kv_op **opp)
+{
+	daos_event_t	*evp;
+	int		 rc;
+
+	*opp = NULL;
+	rc = daos_eq_poll(eq, 1, DAOS_EQ_WAIT, 1, &evp);
+	if (rc < 0)
+		return rc;
+	if (rc == 0)
+		return -DER_IO;
+
+	*opp = container_of(evp, struct kv_op, ev);
+	kv_op_release(*opp);
+
+	return evp->ev_error;
 }
 
 static PyObject *
@@ -691,114 +994,91 @@ __shim_handle__kv_put(PyObject *self, PyObject *args)
 	PyObject	*key;
 	PyObject	*value;
 	Py_ssize_t	 pos = 0;
-	daos_handle_t	 eq;
-	daos_event_t	 ev_array[MAX_INFLIGHT];
-	daos_event_t	*evp;
+	struct kv_eq	*keq;
+	struct kv_op	*op;
 	int		 i = 0;
+	int		 inflight = 0;
+	int		 depth = DEFAULT_INFLIGHT;
 	int		 rc;
 	int		 ret;
 
 	/* Parse arguments */
-	RETURN_NULL_IF_FAILED_TO_PARSE(args, "LO!", &oh.cookie,
-				&PyDict_Type, &daos_dict);
+	RETURN_NULL_IF_FAILED_TO_PARSE(args, "LO!|i", &oh.cookie,
+				&PyDict_Type, &daos_dict, &depth);
+	if (depth <= 0)
+		return PyInt_FromLong(-DER_INVAL);
 
-	rc = daos_eq_create(&eq);
+	rc = kv_eq_get(depth, &keq);
 	if (rc)
 		return PyInt_FromLong(rc);
 
 	while (PyDict_Next(daos_dict, &pos, &key, &value)) {
-		char		*buf;
-		daos_size_t	 size;
-		char		*key_str;
-
-		if (i < MAX_INFLIGHT) {
+		if (i < depth) {
 			/** haven't reached max request in flight yet */
-			evp = &ev_array[i];
-			rc = daos_event_init(evp, eq, NULL);
-			if (rc)
-				break;
+			op = &keq->ops[i];
 			i++;
 		} else {
 			/**
 			 * max request request in flight reached, wait
 			 * for one i/o to complete to reuse the slot
 			 */
-			rc = daos_eq_poll(eq, 1, DAOS_EQ_WAIT, 1, &evp);
-			if (rc < 0)
-				break;
-			if (rc == 0) {
-				rc = -DER_IO;
+			rc = kv_put_wait(keq->eq, &op);
+			if (op != NULL)
+				inflight--;
+			if (rc)
 				break;
-			}
-
-			/** check if completed operation failed */
-			if (evp->ev_error != DER_SUCCESS) {
-				rc = evp->ev_error;
-				break;
-			}
-			evp->ev_error = 0;
-		}
-
-		/** XXX: Interpret all values as strings for now */
-		if (value == Py_None) {
-			size = 0;
-#ifdef __USE_PYTHON3__
-		} else if (PyUnicode_Check(value)) {
-			Py_ssize_t pysize = 0;
-
-			buf = (char *)PyUnicode_AsUTF8AndSize(value, &pysize);
-			size = pysize;
-#endif
-		} else {
-			Py_ssize_t pysize = 0;
-
-			rc = PyBytes_AsStringAndSize(value, &buf, &pysize);
-			if (buf == NULL || rc != 0)
-				D_GOTO(err, 0);
-
-			size = pysize;
 		}
 
-#ifdef __USE_PYTHON3__
-		if (PyUnicode_Check(key)) {
-			key_str = (char *)PyUnicode_AsUTF8(key);
-		} else
-#endif
-		{
-			key_str = PyString_AsString(key);
-		}
-		if (!key_str)
-			D_GOTO(err, 0);
-
-		/** insert or delete kv pair */
-		if (size == 0)
-			rc = daos_kv_remove(oh, DAOS_TX_NONE, 0, key_str, evp);
-		else
-			rc = daos_kv_put(oh, DAOS_TX_NONE, 0, key_str, size,
-					 buf, evp);
+		rc = kv_put_submit(oh, op, key, value);
 		if (rc)
 			break;
+		inflight++;
 	}
 
 	/** wait for completion of all in-flight requests */
-	do {
-		ret = daos_eq_poll(eq, 1, DAOS_EQ_WAIT, 1, &evp);
-		if (rc == DER_SUCCESS && ret == 1)
-			rc = evp->ev_error;
-	} while (ret == 1);
+	while (inflight > 0) {
+		ret = kv_put_wait(keq->eq, &op);
+		if (rc == DER_SUCCESS)
+			rc = ret;
+		if (op == NULL)
+			break;
+		inflight--;
+	}
 
+	/** return event queue to the pool */
+	ret = kv_eq_put(keq, inflight > 0);
 	if (rc == DER_SUCCESS && ret < 0)
 		rc = ret;
 
-	/** destroy event queue */
-	ret = daos_eq_destroy(eq, 0);
-	if (rc == DER_SUCCESS && ret < 0)
-		rc = ret;
+	if (PyErr_Occurred())
+		return NULL;
 
 	return PyInt_FromLong(rc);
-err:
-	daos_eq_destroy(eq, 0);
-	return NULL;
+}
+
+/** Adjust nr entries and buffer size for the next enumeration */
+static inline void
+kv_iter_adjust(uint32_t *nr_req, daos_size_t *size, uint32_t nr,
+	       daos_size_t used)
+{
+	if (*nr_req == nr) {
+		/**
+		 * we filled all the slot, bump the number of slots for the
+		 * next time
+		 */
+		*nr_req *= 2;
+	} else if (*size < 1024 * 1024 && nr > 0 &&
+		   *size - used < used / nr) {
+		/**
+		 * there might not have been enough room in the buffer to fit
+		 * another entry, bump buffer size ...
+		 * still set upper limit at 1MB as a safeguard
+		 */
+		if (*size < 512 * 1024)
+			*size *= 2;
+		else
+			*size = 1024 * 1024;
+	}
 }
 
 static PyObject *
@@ -920,24 +1200,7 @@ __shim_handle__kv_iter(PyObject *self, PyObject *args)
 	}
 
 	/** Adjust nr entries and buffer size for next iteration */
-	if (nr_req == nr) {
-		/**
-		 * we filled all the slot, bump the number of slots for the
-		 * next time
-		 */
-		nr_req *= 2;
-	} else if (size < 1024 * 1024 && nr > 0 &&
-		   enum_buf + size - ptr < (ptr - enum_buf) / nr) {
-		/**
-		 * there might not have been enough room in the buffer to fit
-		 * another entry, bump buffer size ...
-		 * still set upper limit at 1MB as a safeguard
-		 */
-		if (size < 512 * 1024)
-			size *= 2;
-		else
-			size = 1024 * 1024;
-	}
+	kv_iter_adjust(&nr_req, &size, nr, ptr - enum_buf);
 
 out:
 	if (kds)
@@ -962,6 +1225,756 @@ out:
 	return return_list;
 }
 
+/** number of keys requested per enumeration by kv_dump and kv_count */
+#define KV_ENUM_NR	256
+/** initial enumeration buffer size, optimized for 16-char strings */
+#define KV_ENUM_SIZE	(KV_ENUM_NR * 16)
+
+/**
+ * State of an asynchronous enumeration, which must stay valid until the
+ * enumeration event completes.
+ */
+struct kv_enum {
+	daos_anchor_t	 anchor;
+	daos_key_desc_t	*kds;
+	uint32_t	 nr;
+	uint32_t	 nr_req;
+	char		*buf;
+	daos_size_t	 size;
+	d_iov_t		 iov;
+	d_sg_list_t	 sgl;
+};
+
+static int
+kv_enum_submit(daos_handle_t oh, struct kv_enum *en, daos_event_t *ev)
+{
+	en->nr = en->nr_req;
+	en->sgl.sg_nr = 1;
+	en->sgl.sg_nr_out = 0;
+	d_iov_set(&en->iov, (void *)en->buf, en->size);
+	en->sgl.sg_iovs = &en->iov;
+
+	return daos_kv_list(oh, DAOS_TX_NONE, &en->nr, en->kds, &en->sgl,
+			    &en->anchor, ev);
+}
+
+/** grow the enumeration buffer to fit the key reported by -DER_KEY2BIG */
+static int
+kv_enum_grow(struct kv_enum *en)
+{
+	char *new_buf;
+
+	D_REALLOC(new_buf, en->buf, en->kds[0].kd_key_len);
+	if (new_buf == NULL)
+		return -DER_NOMEM;
+	en->buf = new_buf;
+	en->size = en->kds[0].kd_key_len;
+
+	return DER_SUCCESS;
+}
+
+/**
+ * Fetch all the key-value pairs of a KV object into a python dictionary.
+ * Enumeration and value fetches are issued on the same event queue, so the
+ * next batch of keys is listed while the values of the previous batch are
+ * fetched, and the key strings are only built once, as the dictionary keys.
+ */
+static PyObject *
+__shim_handle__kv_dump(PyObject *self, PyObject *args)
+{
+	PyObject	*daos_dict;
+	daos_handle_t	 oh;
+	struct kv_eq	*keq;
+	struct kv_enum	 en = {0};
+	struct kv_op	**idle = NULL;
+	struct kv_op	*op;
+	PyObject	**keys = NULL;
+	uint32_t	 nr_keys = 0;
+	uint32_t	 key_idx = 0;
+	daos_event_t	*evp;
+	bool		 listing = false;
+	bool		 py_err = false;
+	int		 nr_idle = 0;
+	int		 inflight = 0;
+	int		 depth = DEFAULT_INFLIGHT;
+	char		*ptr;
+	uint32_t	 i;
+	int		 rc;
+	int		 ret;
+	size_t		 v_size;
+
+	/* Parse arguments */
+	RETURN_NULL_IF_FAILED_TO_PARSE(args, "LO!l|i", &oh.cookie, &PyDict_Type,
+				       &daos_dict, &v_size, &depth);
+	if (depth <= 0)
+		return PyInt_FromLong(-DER_INVAL);
+
+	rc = kv_eq_get(depth, &keq);
+	if (rc)
+		return PyInt_FromLong(rc);
+
+	D_ALLOC_ARRAY(idle, depth);
+	/** room for the keys of one enumeration plus any not yet fetched */
+	D_ALLOC_ARRAY(keys, 2 * KV_ENUM_NR);
+	D_ALLOC_ARRAY(en.kds, KV_ENUM_NR);
+	D_ALLOC(en.buf, KV_ENUM_SIZE);
+	if (idle == NULL || keys == NULL || en.kds == NULL || en.buf == NULL)
+		D_GOTO(out, rc = -DER_NOMEM);
+	en.nr_req = KV_ENUM_NR;
+	en.size = KV_ENUM_SIZE;
+	daos_anchor_set_zero(&en.anchor);
+
+	for (nr_idle = 0; nr_idle < depth; nr_idle++) {
+		op = &keq->ops[nr_idle];
+		op->buf_size = v_size;
+		idle[nr_idle] = op;
+	}
+
+	while (1) {
+		/** fetch the values of listed keys while slots are idle */
+		while (key_idx < nr_keys && nr_idle > 0) {
+			op = idle[nr_idle - 1];
+			op->key_obj = keys[key_idx];
+			op->key = kv_key_str(op->key_obj);
+			if (!op->key) {
+				py_err = true;
+				break;
+			}
+			rc = kv_get_buffer(op, NULL);
+			if (rc == DER_SUCCESS) {
+				rc = daos_kv_get(oh, DAOS_TX_NONE, 0, op->key,
+						 &op->size, op->buf, &op->ev);
+				if (rc)
+					kv_op_release(op);
+			}
+			if (rc)
+				break;
+			nr_idle--;
+			key_idx++;
+			inflight++;
+		}
+		if (rc || py_err)
+			break;
+
+		/**
+		 * keep one enumeration in flight as long as there is room for
+		 * the keys it returns
+		 */
+		if (!listing && !daos_anchor_is_eof(&en.anchor) &&
+		    nr_keys - key_idx < en.nr_req) {
+			memmove(keys, &keys[key_idx],
+				(nr_keys - key_idx) * sizeof(*keys));
+			nr_keys -= key_idx;
+			key_idx = 0;
+
+			rc = kv_enum_submit(oh, &en, &keq->ev);
+			if (rc)
+				break;
+			listing = true;
+		}
+
+		if (!listing && inflight == 0)
+			break;
+
+		rc = daos_eq_poll(keq->eq, 1, DAOS_EQ_WAIT, 1, &evp);
+		if (rc < 0)
+			break;
+		if (rc == 0) {
+			rc = -DER_IO;
+			break;
+		}
+		rc = DER_SUCCESS;
+
+		if (evp == &keq->ev) {
+			listing = false;
+			if (evp->ev_error == -DER_KEY2BIG) {
+				/** resubmitted with a bigger buffer above */
+				rc = kv_enum_grow(&en);
+				if (rc)
+					break;
+				continue;
+			}
+			if (evp->ev_error != DER_SUCCESS) {
+				rc = evp->ev_error;
+				break;
+			}
+
+			for (ptr = en.buf, i = 0; i < en.nr; i++) {
+				keys[nr_keys] = PyString_FromStringAndSize(ptr,
+						en.kds[i].kd_key_len);
+				if (keys[nr_keys] == NULL) {
+					py_err = true;
+					break;
+				}
+				nr_keys++;
+				ptr += en.kds[i].kd_key_len;
+			}
+			if (py_err)
+				break;
+			continue;
+		}
+
+		op = container_of(evp, struct kv_op, ev);
+		inflight--;
+
+		if (evp->ev_error == -DER_REC2BIG) {
+			rc = kv_get_grow(op);
+			if (rc == DER_SUCCESS)
+				rc = daos_kv_get(oh, DAOS_TX_NONE, 0, op->key,
+						 &op->size, op->buf, evp);
+			if (rc) {
+				kv_op_release(op);
+				Py_DECREF(op->key_obj);
+				break;
+			}
+			inflight++;
+			continue;
+		}
+
+		if (evp->ev_error == DER_SUCCESS) {
+			rc = kv_get_comp(op, daos_dict);
+		} else {
+			rc = evp->ev_error;
+			kv_op_release(op);
+		}
+		Py_DECREF(op->key_obj);
+		idle[nr_idle++] = op;
+		if (rc == -DER_IO && evp->ev_error == DER_SUCCESS)
+			py_err = true;
+		if (rc)
+			break;
+	}
+
+	/** wait for the completion of anything still in flight on error */
+	while (listing || inflight > 0) {
+		ret = daos_eq_poll(keq->eq, 1, DAOS_EQ_WAIT, 1, &evp);
+		if (ret != 1)
+			break;
+		if (evp == &keq->ev) {
+			listing = false;
+		} else {
+			op = container_of(evp, struct kv_op, ev);
+			kv_op_release(op);
+			Py_DECREF(op->key_obj);
+			inflight--;
+		}
+	}
+
+	/** drop keys which were listed but not fetched */
+	for (i = key_idx; i < nr_keys; i++)
+		Py_DECREF(keys[i]);
+
+out:
+	for (i = 0; i < depth; i++)
+		kv_op_release(&keq->ops[i]);
+
+	/** return event queue to the pool */
+	ret = kv_eq_put(keq, listing || inflight > 0);
+	if (rc == DER_SUCCESS && ret < 0)
+		rc = ret;
+
+	D_FREE(idle);
+	D_FREE(keys);
+	D_FREE(en.kds);
+	D_FREE(en.buf);
+
+	if (py_err || PyErr_Occurred())
+		return NULL;
+
+	return PyInt_FromLong(rc);
+}
+
+/**
+ * Count the keys of a KV object, stopping once limit keys have been seen if
+ * limit is not zero. Keys are enumerated into a scratch buffer and never
+ * converted to python strings.
+ */
+static PyObject *
+__shim_handle__kv_count(PyObject *self, PyObject *args)
+{
+	PyObject	*return_list;
+	daos_handle_t	 oh;
+	struct kv_enum	 en = {0};
+	long		 limit;
+	long		 count = 0;
+	int		 rc;
+
+	/** Parse arguments */
+	RETURN_NULL_IF_FAILED_TO_PARSE(args, "Ll", &oh.cookie, &limit);
+
+	/** a single key is enough to answer a limited count */
+	en.nr_req = (limit > 0 && limit < KV_ENUM_NR) ? limit : KV_ENUM_NR;
+	en.size = KV_ENUM_SIZE;
+	D_ALLOC_ARRAY(en.kds, en.nr_req);
+	D_ALLOC(en.buf, en.size);
+	if (en.kds == NULL || en.buf == NULL)
+		D_GOTO(out, rc = -DER_NOMEM);
+	daos_anchor_set_zero(&en.anchor);
+
+	do {
+		en.nr = en.nr_req;
+		en.sgl.sg_nr = 1;
+		en.sgl.sg_nr_out = 0;
+		d_iov_set(&en.iov, (void *)en.buf, en.size);
+		en.sgl.sg_iovs = &en.iov;
+		rc = daos_kv_list(oh, DAOS_TX_NONE, &en.nr, en.kds, &en.sgl,
+				  &en.anchor, NULL);
+		if (rc == -DER_KEY2BIG) {
+			rc = kv_enum_grow(&en);
+			if (rc)
+				break;
+			continue;
+		}
+		if (rc)
+			break;
+
+		count += en.nr;
+		if (limit > 0 && count >= limit)
+			break;
+	} while (!daos_anchor_is_eof(&en.anchor));
+
+out:
+	D_FREE(en.kds);
+	D_FREE(en.buf);
+
+	/* Populate return list */
+	return_list = PyList_New(2);
+	PyList_SetItem(return_list, 0, PyInt_FromLong(rc));
+	PyList_SetItem(return_list, 1, PyLong_FromLong(count));
+
+	return return_list;
+}
+
+/**
+ * Asynchronous KV operations
+ * Each operation is allocated with its own event on an event queue owned by
+ * the caller, and tagged with a python token. Submitting an operation never
+ * blocks, and eq_poll() returns the token and result of every completed
+ * operation, so that an event loop can keep many operations in flight.
+ */
+enum async_op_type {
+	ASYNC_GET,
+	ASYNC_PUT,
+	ASYNC_LIST,
+};
+
+struct async_op {
+	/** get or put state, and the event used by every type of operation */
+	struct kv_op	 kv;
+	enum async_op_type type;
+	daos_handle_t	 oh;
+	PyObject	*token;
+	/** enumeration state and the anchor to update, for lists */
+	struct kv_enum	 en;
+	PyObject	*anchor_cap;
+};
+
+static struct async_op *
+async_op_alloc(daos_handle_t eq, daos_handle_t oh, enum async_op_type type,
+	       PyObject *token, int *rc)
+{
+	struct async_op *op;
+
+	D_ALLOC_PTR(op);
+	if (op == NULL) {
+		*rc = -DER_NOMEM;
+		return NULL;
+	}
+
+	*rc = daos_event_init(&op->kv.ev, eq, NULL);
+	if (*rc) {
+		D_FREE(op);
+		return NULL;
+	}
+
+	op->type = type;
+	op->oh = oh;
+	Py_INCREF(token);
+	op->token = token;
+
+	return op;
+}
+
+static void
+async_op_free(struct async_op *op)
+{
+	daos_event_fini(&op->kv.ev);
+	Py_DECREF(op->token);
+	Py_XDECREF(op->kv.key_obj);
+	kv_op_release(&op->kv);
+	Py_XDECREF(op->anchor_cap);
+	D_FREE(op->en.kds);
+	D_FREE(op->en.buf);
+	D_FREE(op);
+}
+
+static int
+async_op_set_key(struct async_op *op, PyObject *key)
+{
+	Py_INCREF(key);
+	op->kv.key_obj = key;
+	op->kv.key = kv_key_str(key);
+	if (op->kv.key == NULL)
+		return -DER_INVAL;
+
+	return DER_SUCCESS;
+}
+
+/** Submit an operation, or resubmit it after its buffer has been resized */
+static int
+async_op_submit(struct async_op *op)
+{
+	struct kv_op *kv = &op->kv;
+
+	switch (op->type) {
+	case ASYNC_GET:
+		return daos_kv_get(op->oh, DAOS_TX_NONE, 0, kv->key, &kv->size,
+				   kv->buf, &kv->ev);
+	case ASYNC_PUT:
+		if (kv->size == 0)
+			return daos_kv_remove(op->oh, DAOS_TX_NONE, 0, kv->key,
+					      &kv->ev);
+		return daos_kv_put(op->oh, DAOS_TX_NONE, 0, kv->key, kv->size,
+				   kv->buf, &kv->ev);
+	case ASYNC_LIST:
+		return kv_enum_submit(op->oh, &op->en, &kv->ev);
+	}
+
+	return -DER_INVAL;
+}
+
+/**
+ * Handle the buffer being too small for a value or key by growing it and
+ * resubmitting the operation. Returns true if the operation was resubmitted.
+ */
+static bool
+async_op_retry(struct async_op *op)
+{
+	daos_event_t	*evp = &op->kv.ev;
+	int		 rc;
+
+	if (op->type == ASYNC_GET && evp->ev_error == -DER_REC2BIG) {
+		rc = kv_get_grow(&op->kv);
+	} else if (op->type == ASYNC_LIST && evp->ev_error == -DER_KEY2BIG) {
+		rc = kv_enum_grow(&op->en);
+	} else {
+		return false;
+	}
+
+	if (rc == DER_SUCCESS)
+		rc = async_op_submit(op);
+	if (rc) {
+		PyErr_Clear();
+		evp->ev_error = rc;
+		return false;
+	}
+
+	return true;
+}
+
+/** Build the python value returned for a completed operation */
+static PyObject *
+async_op_value(struct async_op *op)
+{
+	PyObject	*entries;
+	PyObject	*key;
+	PyObject	*value;
+	daos_anchor_t	*anchor;
+	char		*ptr;
+	uint32_t	 i;
+
+	if (op->kv.ev.ev_error != DER_SUCCESS || op->type == ASYNC_PUT) {
+		Py_INCREF(Py_None);
+		return Py_None;
+	}
+
+	if (op->type == ASYNC_GET)
+		return kv_get_value(&op->kv);
+
+	/** [entries, nr_req, size, anchor] as returned by kv_iter */
+	entries = PyList_New(0);
+	if (entries == NULL)
+		return NULL;
+	for (ptr = op->en.buf, i = 0; i < op->en.nr; i++) {
+		key = PyString_FromStringAndSize(ptr,
+						 op->en.kds[i].kd_key_len);
+		if (key == NULL || PyList_Append(entries, key) < 0) {
+			Py_XDECREF(key);
+			Py_DECREF(entries);
+			return NULL;
+		}
+		Py_DECREF(key);
+		ptr += op->en.kds[i].kd_key_len;
+	}
+	kv_iter_adjust(&op->en.nr_req, &op->en.size, op->en.nr,
+		       ptr - op->en.buf);
+
+	value = PyList_New(4);
+	if (value == NULL) {
+		Py_DECREF(entries);
+		return NULL;
+	}
+	PyList_SetItem(value, 0, entries);
+	PyList_SetItem(value, 1, PyInt_FromLong(op->en.nr_req));
+	PyList_SetItem(value, 2, PyInt_FromLong(op->en.size));
+	if (daos_anchor_is_eof(&op->en.anchor)) {
+		Py_INCREF(Py_None);
+		PyList_SetItem(value, 3, Py_None);
+	} else {
+		anchor = capsule2anchor(op->anchor_cap);
+		memcpy(anchor, &op->en.anchor, sizeof(*anchor));
+		Py_INCREF(op->anchor_cap);
+		PyList_SetItem(value, 3, op->anchor_cap);
+	}
+
+	return value;
+}
+
+static PyObject *
+__shim_handle__eq_create(PyObject *self, PyObject *args)
+{
+	PyObject	*return_list;
+	daos_handle_t	 eq = {0};
+	int		 rc;
+
+	RETURN_NULL_IF_BAD_MAGIC(args);
+
+	rc = daos_eq_create(&eq);
+
+	/* Populate return list */
+	return_list = PyList_New(2);
+	PyList_SetItem(return_list, 0, PyInt_FromLong(rc));
+	PyList_SetItem(return_list, 1, PyLong_FromLong(eq.cookie));
+
+	return return_list;
+}
+
+static PyObject *
+__shim_handle__eq_destroy(PyObject *self, PyObject *args)
+{
+	daos_handle_t	 eq;
+	daos_event_t	*evp;
+	int		 rc;
+
+	/** Parse arguments */
+	RETURN_NULL_IF_FAILED_TO_PARSE(args, "L", &eq.cookie);
+
+	/** wait for in-flight operations, dropping their results */
+	while ((rc = daos_eq_poll(eq, 1, DAOS_EQ_WAIT, 1, &evp)) == 1)
+		async_op_free(container_of(evp, struct async_op, kv.ev));
+
+	if (rc == 0)
+		rc = daos_eq_destroy(eq, 0);
+
+	return PyInt_FromLong(rc);
+}
+
+/**
+ * Return [rc, completions] without waiting, where completions is a list of
+ * (token, rc, value) for up to max operations which have completed.
+ */
+static PyObject *
+__shim_handle__eq_poll(PyObject *self, PyObject *args)
+{
+	PyObject	*return_list;
+	PyObject	*done;
+	PyObject	*value;
+	PyObject	*entry;
+	daos_handle_t	 eq;
+	daos_event_t	**evps = NULL;
+	struct async_op	*op;
+	bool		 py_err = false;
+	int		 max;
+	int		 i;
+	int		 rc;
+
+	/** Parse arguments */
+	RETURN_NULL_IF_FAILED_TO_PARSE(args, "Li", &eq.cookie, &max);
+
+	done = PyList_New(0);
+	if (done == NULL)
+		return NULL;
+
+	if (max <= 0)
+		D_GOTO(out, rc = -DER_INVAL);
+
+	D_ALLOC_ARRAY(evps, max);
+	if (evps == NULL)
+		D_GOTO(out, rc = -DER_NOMEM);
+
+	rc = daos_eq_poll(eq, 0, DAOS_EQ_NOWAIT, max, evps);
+	for (i = 0; i < rc; i++) {
+		op = container_of(evps[i], struct async_op, kv.ev);
+		if (async_op_retry(op))
+			continue;
+
+		/** keep going on errors so that every event is freed */
+		if (!py_err) {
+			value = async_op_value(op);
+			if (value == NULL) {
+				PyErr_Clear();
+				Py_INCREF(Py_None);
+				value = Py_None;
+				if (op->kv.ev.ev_error == DER_SUCCESS)
+					op->kv.ev.ev_error = -DER_NOMEM;
+			}
+			entry = Py_BuildValue("(OiN)", op->token,
+					      op->kv.ev.ev_error, value);
+			if (entry == NULL || PyList_Append(done, entry) < 0)
+				py_err = true;
+			Py_XDECREF(entry);
+		}
+		async_op_free(op);
+	}
+	if (rc > 0)
+		rc = DER_SUCCESS;
+
+out:
+	D_FREE(evps);
+	if (py_err) {
+		Py_DECREF(done);
+		return NULL;
+	}
+
+	/* Populate return list */
+	return_list = PyList_New(2);
+	PyList_SetItem(return_list, 0, PyInt_FromLong(rc));
+	PyList_SetItem(return_list, 1, done);
+
+	return return_list;
+}
+
+static PyObject *
+__shim_handle__kv_get_async(PyObject *self, PyObject *args)
+{
+	daos_handle_t	 eq;
+	daos_handle_t	 oh;
+	PyObject	*token;
+	PyObject	*key;
+	PyObject	*value = NULL;
+	struct async_op	*op;
+	size_t		 v_size;
+	int		 rc;
+
+	/* Parse arguments */
+	RETURN_NULL_IF_FAILED_TO_PARSE(args, "LOLOl|O", &eq.cookie, &token,
+				       &oh.cookie, &key, &v_size, &value);
+
+	op = async_op_alloc(eq, oh, ASYNC_GET, token, &rc);
+	if (op == NULL)
+		return PyInt_FromLong(rc);
+
+	op->kv.buf_size = v_size;
+	if (async_op_set_key(op, key) || kv_get_buffer(&op->kv, value)) {
+		async_op_free(op);
+		return NULL;
+	}
+
+	rc = async_op_submit(op);
+	if (rc)
+		async_op_free(op);
+
+	return PyInt_FromLong(rc);
+}
+
+static PyObject *
+__shim_handle__kv_put_async(PyObject *self, PyObject *args)
+{
+	daos_handle_t	 eq;
+	daos_handle_t	 oh;
+	PyObject	*token;
+	PyObject	*key;
+	PyObject	*value;
+	struct async_op	*op;
+	int		 rc;
+
+	/* Parse arguments */
+	RETURN_NULL_IF_FAILED_TO_PARSE(args, "LOLOO", &eq.cookie, &token,
+				       &oh.cookie, &key, &value);
+
+	op = async_op_alloc(eq, oh, ASYNC_PUT, token, &rc);
+	if (op == NULL)
+		return PyInt_FromLong(rc);
+
+	if (async_op_set_key(op, key))
+		goto err;
+
+	/** hold a reference as strings are stored from their own memory */
+	Py_INCREF(value);
+	op->kv.val_obj = value;
+	if (kv_put_buffer(&op->kv, value))
+		goto err;
+
+	rc = async_op_submit(op);
+	if (rc)
+		async_op_free(op);
+
+	return PyInt_FromLong(rc);
+err:
+	async_op_free(op);
+	return NULL;
+}
+
+static PyObject *
+__shim_handle__kv_list_async(PyObject *self, PyObject *args)
+{
+	daos_handle_t	 eq;
+	daos_handle_t	 oh;
+	PyObject	*token;
+	PyObject	*anchor_cap;
+	daos_anchor_t	*anchor;
+	struct async_op	*op;
+	uint32_t	 nr_req;
+	daos_size_t	 size;
+	int		 rc;
+
+	/* Parse arguments */
+	RETURN_NULL_IF_FAILED_TO_PARSE(args, "LOLiLO", &eq.cookie, &token,
+				       &oh.cookie, &nr_req, &size,
+				       &anchor_cap);
+	if (nr_req == 0 || size < 16)
+		return PyInt_FromLong(-DER_INVAL);
+
+	op = async_op_alloc(eq, oh, ASYNC_LIST, token, &rc);
+	if (op == NULL)
+		return PyInt_FromLong(rc);
+
+	/** Allocate an anchor for the first iteration */
+	if (anchor_cap == Py_None) {
+		D_ALLOC_PTR(anchor);
+		if (anchor == NULL)
+			D_GOTO(out, rc = -DER_NOMEM);
+		daos_anchor_set_zero(anchor);
+		op->anchor_cap = anchor2capsule(anchor);
+		if (op->anchor_cap == NULL) {
+			D_FREE(anchor);
+			D_GOTO(out, rc = -DER_NOMEM);
+		}
+	} else {
+		anchor = capsule2anchor(anchor_cap);
+		if (anchor == NULL)
+			D_GOTO(out, rc = -DER_INVAL);
+		Py_INCREF(anchor_cap);
+		op->anchor_cap = anchor_cap;
+	}
+	/** the anchor is copied back once the enumeration completes */
+	memcpy(&op->en.anchor, anchor, sizeof(*anchor));
+
+	op->en.nr_req = nr_req;
+	op->en.size = size;
+	D_ALLOC_ARRAY(op->en.kds, nr_req);
+	D_ALLOC(op->en.buf, size);
+	if (op->en.kds == NULL || op->en.buf == NULL)
+		D_GOTO(out, rc = -DER_NOMEM);
+
+	rc = async_op_submit(op);
+out:
+	if (rc)
+		async_op_free(op);
+
+	return PyInt_FromLong(rc);
+}
+
 /**
  * Python shim module
  */
@@ -994,6 +2007,16 @@ static PyMethodDef daosMethods[] = {
 	EXPORT_PYTHON_METHOD(kv_get),
 	EXPORT_PYTHON_METHOD(kv_put),
 	EXPORT_PYTHON_METHOD(kv_iter),
+	EXPORT_PYTHON_METHOD(kv_dump),
+	EXPORT_PYTHON_METHOD(kv_count),
+
+	/** Asynchronous KV operations */
+	EXPORT_PYTHON_METHOD(eq_create),
+	EXPORT_PYTHON_METHOD(eq_destroy),
+	EXPORT_PYTHON_METHOD(eq_poll),
+	EXPORT_PYTHON_METHOD(kv_get_async),
+	EXPORT_PYTHON_METHOD(kv_put_async),
+	EXPORT_PYTHON_METHOD(kv_list_async),
 
 	{NULL, NULL}
 };
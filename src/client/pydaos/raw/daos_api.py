@@ -25,7 +25,6 @@
 from __future__ import print_function
 
 import ctypes
-import threading
 import uuid
 import os
 import inspect
@@ -112,13 +111,7 @@ class DaosPool(object):
             event = daos_cref.DaosEvent()
             params = [self.uuid, self.group, ctypes.byref(no_svcl), c_flags,
                       ctypes.byref(self.handle), ctypes.byref(c_info), event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def disconnect(self, cb_func=None):
         """Undoes the fine work done by the connect function above."""
@@ -133,13 +126,7 @@ class DaosPool(object):
         else:
             event = daos_cref.DaosEvent()
             params = [self.handle, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def local2global(self):
         """Create a global pool handle that can be shared."""
@@ -210,13 +197,7 @@ class DaosPool(object):
             event = daos_cref.DaosEvent()
             params = [self.uuid, self.group, ctypes.byref(no_svcl),
                       ctypes.byref(c_tgts), event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def extend(self):
         """Extend the pool to more targets."""
@@ -237,13 +218,7 @@ class DaosPool(object):
         else:
             event = daos_cref.DaosEvent()
             params = [self.uuid, self.group, ctypes.byref(no_svcl), event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def tgt_reint(self, rank_list, tgt=-1, cb_func=None):
         """Reintegrate a set of storage targets to a pool that had previously
@@ -275,13 +250,7 @@ class DaosPool(object):
             event = daos_cref.DaosEvent()
             params = [self.uuid, self.group, ctypes.byref(no_svcl),
                       ctypes.byref(c_tgts), event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def exclude_out(self, rank_list, tgt=-1, cb_func=None):
         """Exclude completely a set of storage targets from a pool.
@@ -313,13 +282,7 @@ class DaosPool(object):
             event = daos_cref.DaosEvent()
             params = [self.uuid, self.group, ctypes.byref(no_svcl),
                       ctypes.byref(c_tgts), event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def pool_svc_stop(self, cb_func=None):
         """Stop the current pool service leader."""
@@ -333,12 +296,7 @@ class DaosPool(object):
         else:
             event = daos_cref.DaosEvent()
             params = [self.handle, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func, self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def pool_query(self, cb_func=None):
         """Query pool information."""
@@ -358,13 +316,7 @@ class DaosPool(object):
             event = daos_cref.DaosEvent()
             params = [self.handle, None, ctypes.byref(self.pool_info), None,
                       event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
         return None
 
     def target_query(self, tgt):
@@ -390,12 +342,7 @@ class DaosPool(object):
             event = daos_cref.DaosEvent()
             params = [self.uuid, self.group, c_force, event]
 
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func, self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def set_svc(self, rank):
         """Set svc.
@@ -445,13 +392,7 @@ class DaosPool(object):
         else:
             event = daos_cref.DaosEvent()
             params = [self.handle, buff, total_size, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
         return total_size.contents, buff
 
     def set_attr(self, data, poh=None, cb_func=None):
@@ -495,13 +436,7 @@ class DaosPool(object):
         else:
             event = daos_cref.DaosEvent()
             params = [self.handle, no_of_att, names, values, sizes, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def get_attr(self, attr_names, poh=None, cb_func=None):
         """Retrieve a list of user-defined pool attribute values.
@@ -542,13 +477,7 @@ class DaosPool(object):
             event = daos_cref.DaosEvent()
             params = [self.handle, no_of_att, ctypes.byref(attr_names_c),
                       ctypes.byref(buff), sizes, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
         results = {}
         i = 0
@@ -793,13 +722,7 @@ class DaosObj(object):
         else:
             event = daos_cref.DaosEvent()
             params = [self.obj_handle, c_tx, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def punch_dkeys(self, txn, dkeys, cb_func=None):
         """Delete dkeys and associated data from an object for a transaction.
@@ -846,13 +769,7 @@ class DaosObj(object):
             params = [
                 self.obj_handle, c_tx, c_len_dkeys, ctypes.byref(c_dkeys),
                 event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def punch_akeys(self, txn, dkey, akeys, cb_func=None):
         """Delete akeys and associated data from a dkey for a transaction.
@@ -901,13 +818,7 @@ class DaosObj(object):
             event = daos_cref.DaosEvent()
             params = [self.obj_handle, c_tx, ctypes.byref(c_dkey_iov),
                       c_len_akeys, ctypes.byref(c_akeys), event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
 
 class IORequest(object):
@@ -1006,22 +917,39 @@ class IORequest(object):
             raise DaosApiError("Object update returned non-zero. RC: {0}"
                                .format(ret))
 
-    def fetch_array(self, dkey, akey, rec_count, rec_size,
-                    txn=daos_cref.DAOS_TX_NONE):
-        """Retrieve an array data from a dkey/akey pair.
-
-        dkey      --1st level key for the array value
-        akey      --2nd level key for the array value
-        rec_count --how many array indices (records) to retrieve
-        rec_size  --size in bytes of a single record
-        txn       --which transaction to read the value from.
-                    Default is independent transaction (DAOS_TX_NONE)
+    @staticmethod
+    def _buffer_address(data, writable):
+        """Return the address and size in bytes of a contiguous buffer.
+
+        Any object supporting the buffer protocol can be used, such as bytes,
+        bytearray, mmap or numpy arrays, and the data is not copied unless a
+        read-only buffer other than bytes is passed with writable False.
+        The address keeps a reference to the buffer, so it stays valid for as
+        long as it is used.
         """
-        # setup the descriptor, we are only handling a single descriptor that
-        # covers an arbitrary number of consecutive array entries
+        view = memoryview(data)
+        if not view.c_contiguous:
+            raise DaosApiError("Array buffer must be contiguous")
+        nbytes = view.nbytes
+        if isinstance(data, bytes):
+            if writable:
+                raise DaosApiError("Array buffer must be writable")
+            return (ctypes.cast(ctypes.c_char_p(data), ctypes.c_void_p),
+                    nbytes)
+        try:
+            c_buf = (ctypes.c_char * nbytes).from_buffer(view)
+        except TypeError:
+            if writable:
+                raise DaosApiError("Array buffer must be writable")
+            c_buf = (ctypes.c_char * nbytes).from_buffer_copy(view)
+        return (ctypes.cast(c_buf, ctypes.c_void_p), nbytes)
+
+    def _array_io(self, fname, dkey, akey, rec_idx, rec_count, rec_size,
+                  buf, nbytes, txn):
+        """Update or fetch rec_count records from a single buffer."""
         extent = daos_cref.Extent()
-        extent.rx_idx = 0
-        extent.rx_nr = ctypes.c_ulong(rec_count.value)
+        extent.rx_idx = rec_idx
+        extent.rx_nr = rec_count
 
         self.iod.iod_name.iov_buf = ctypes.cast(akey, ctypes.c_void_p)
         self.iod.iod_name.iov_buf_len = ctypes.sizeof(akey)
@@ -1032,40 +960,112 @@ class IORequest(object):
         self.iod.iod_nr = 1
         self.iod.iod_recxs = ctypes.pointer(extent)
 
-        # setup the scatter/gather list, we are only handling an
-        # an arbitrary number of consecutive array entries of the same size
-        sgl_iov_list = (daos_cref.IOV * rec_count.value)()
-        for i in range(rec_count.value):
-            sgl_iov_list[i].iov_buf_len = rec_size
-            sgl_iov_list[i].iov_buf = (
-                ctypes.cast(ctypes.create_string_buffer(rec_size.value),
-                            ctypes.c_void_p))
-        self.sgl.sg_iovs = ctypes.cast(ctypes.pointer(sgl_iov_list),
-                                       ctypes.POINTER(daos_cref.IOV))
-        self.sgl.sg_nr = rec_count
-        self.sgl.sg_nr_out = rec_count
+        # the records are consecutive in the buffer, so a single I/O vector
+        # covers all of them
+        sgl_iov = daos_cref.IOV()
+        sgl_iov.iov_buf = buf
+        sgl_iov.iov_buf_len = nbytes
+        sgl_iov.iov_len = nbytes
+        self.sgl.sg_iovs = ctypes.pointer(sgl_iov)
+        self.sgl.sg_nr = 1
+        self.sgl.sg_nr_out = 1
 
         dkey_iov = daos_cref.IOV()
         dkey_iov.iov_buf = ctypes.cast(dkey, ctypes.c_void_p)
         dkey_iov.iov_buf_len = ctypes.sizeof(dkey)
         dkey_iov.iov_len = ctypes.sizeof(dkey)
 
-        # now do it
-        func = self.context.get_function('fetch-obj')
+        func = self.context.get_function(fname)
+        if fname == 'fetch-obj':
+            ret = func(self.obj.obj_handle, txn, 0, ctypes.byref(dkey_iov), 1,
+                       ctypes.byref(self.iod), ctypes.byref(self.sgl), None,
+                       None)
+        else:
+            ret = func(self.obj.obj_handle, txn, 0, ctypes.byref(dkey_iov), 1,
+                       ctypes.byref(self.iod), ctypes.byref(self.sgl), None)
+        return ret
 
-        ret = func(self.obj.obj_handle, txn, 0, ctypes.byref(dkey_iov), 1,
-                   ctypes.byref(self.iod), ctypes.byref(self.sgl), None, None)
+    def insert_array_data(self, dkey, akey, data, rec_size=None, rec_idx=0,
+                          txn=daos_cref.DAOS_TX_NONE):
+        """Insert the records of an array from a single contiguous buffer.
+
+        dkey     --1st level key for the array value
+        akey     --2nd level key for the array value
+        data     --buffer holding the records back to back, such as bytes,
+                   bytearray or a numpy array
+        rec_size --size in bytes of a single record.
+                   Default is the item size of data, so one record per
+                   numpy array element
+        rec_idx  --index of the first record to write. Default is 0
+        txn      --which transaction to write to.
+                   Default is independent transaction (DAOS_TX_NONE)
+        """
+        if rec_size is None:
+            rec_size = memoryview(data).itemsize
+        (buf, nbytes) = self._buffer_address(data, False)
+        if rec_size <= 0 or nbytes % rec_size:
+            raise DaosApiError("Array buffer of {0} bytes does not hold "
+                               "records of {1} bytes".format(nbytes, rec_size))
+
+        ret = self._array_io('update-obj', dkey, akey, rec_idx,
+                             nbytes // rec_size, rec_size, buf, nbytes, txn)
+        if ret != 0:
+            raise DaosApiError("Object update returned non-zero. RC: {0}"
+                               .format(ret))
+
+    def fetch_array_data(self, dkey, akey, rec_count, rec_size, out=None,
+                         rec_idx=0, txn=daos_cref.DAOS_TX_NONE):
+        """Retrieve the records of an array into a single contiguous buffer.
+
+        dkey      --1st level key for the array value
+        akey      --2nd level key for the array value
+        rec_count --how many array indices (records) to retrieve
+        rec_size  --size in bytes of a single record
+        out       --writable buffer of at least rec_count * rec_size bytes to
+                    read the records into, such as a bytearray or a numpy
+                    array. Default is a new bytearray
+        rec_idx   --index of the first record to read. Default is 0
+        txn       --which transaction to read the value from.
+                    Default is independent transaction (DAOS_TX_NONE)
+
+        out is returned, with the records back to back.
+        """
+        nbytes = rec_count * rec_size
+        if out is None:
+            out = bytearray(nbytes)
+        (buf, size) = self._buffer_address(out, True)
+        if size < nbytes:
+            raise DaosApiError("Array buffer of {0} bytes is too small for "
+                               "{1} bytes".format(size, nbytes))
+
+        ret = self._array_io('fetch-obj', dkey, akey, rec_idx, rec_count,
+                             rec_size, buf, nbytes, txn)
         if ret != 0:
             raise DaosApiError("Array fetch returned non-zero. RC: {0}"
                                .format(ret))
+        return out
+
+    def fetch_array(self, dkey, akey, rec_count, rec_size,
+                    txn=daos_cref.DAOS_TX_NONE):
+        """Retrieve an array data from a dkey/akey pair.
+
+        dkey      --1st level key for the array value
+        akey      --2nd level key for the array value
+        rec_count --how many array indices (records) to retrieve
+        rec_size  --size in bytes of a single record
+        txn       --which transaction to read the value from.
+                    Default is independent transaction (DAOS_TX_NONE)
+
+        A list of the records is returned, see fetch_array_data() to read
+        them into a single buffer instead.
+        """
+        count = rec_count.value
+        size = rec_size.value
+        buf = self.fetch_array_data(dkey, akey, count, size, txn=txn)
 
         # convert the output into a python list rather than return C types
         # outside this file
-        output = []
-        for i in range(rec_count.value):
-            output.append(ctypes.string_at(sgl_iov_list[i].iov_buf,
-                                           rec_size.value))
-        return output
+        return [bytes(buf[i:i + size]) for i in range(0, count * size, size)]
 
     def single_insert(self, dkey, akey, value, size,
                       txn=daos_cref.DAOS_TX_NONE):
@@ -1496,13 +1496,7 @@ class DaosContainer(object):
             else:
                 params = [self.poh, self.uuid, ctypes.byref(self.cont_prop),
                           None, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def destroy(self, force=1, poh=None, con_uuid=None, cb_func=None):
         """Send a container destroy request to the daos server group."""
@@ -1528,13 +1522,7 @@ class DaosContainer(object):
         else:
             event = daos_cref.DaosEvent()
             params = [self.poh, self.uuid, c_force, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def open(self, poh=None, cuuid=None, flags=None, cb_func=None):
         """Send a container open request to the daos server group."""
@@ -1566,13 +1554,7 @@ class DaosContainer(object):
             event = daos_cref.DaosEvent()
             params = [self.poh, self.uuid, c_flags, ctypes.byref(self.coh),
                       ctypes.byref(self.info), event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def close(self, coh=None, cb_func=None):
         """Send a container close request to the daos server group."""
@@ -1595,13 +1577,7 @@ class DaosContainer(object):
         else:
             event = daos_cref.DaosEvent()
             params = [self.coh, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def query(self, coh=None, cb_func=None):
         """Query container information."""
@@ -1620,13 +1596,7 @@ class DaosContainer(object):
         else:
             event = daos_cref.DaosEvent()
             params = [self.coh, ctypes.byref(self.info), None, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
         return None
 
     def get_new_tx(self):
@@ -1730,6 +1700,30 @@ class DaosContainer(object):
 
         return ioreq.obj
 
+    def write_array_data(self, data, dkey, akey, rec_size=None, obj=None,
+                         rank=None, obj_cls=None, txn=daos_cref.DAOS_TX_NONE):
+        """Write an array from a single buffer to an object.
+
+        If an object is not supplied a new one is created.
+
+        data is any contiguous buffer, such as bytes, a bytearray or a numpy
+        array, holding records of rec_size bytes back to back, or of the item
+        size of data if rec_size is None. The records are written with a
+        single I/O vector, without being copied.
+        """
+        # container should be  in the open state
+        if self.coh == 0:
+            raise DaosApiError("Container needs to be open.")
+
+        c_dkey = ctypes.create_string_buffer(dkey)
+        c_akey = ctypes.create_string_buffer(akey)
+
+        # oid can be None in which case a new one is created
+        ioreq = IORequest(self.context, self, obj, rank, 2, objtype=obj_cls)
+        ioreq.insert_array_data(c_dkey, c_akey, data, rec_size, txn=txn)
+
+        return ioreq.obj
+
     def write_an_obj(self, thedata, size, dkey, akey, obj=None, rank=None,
                      obj_cls=None, txn=daos_cref.DAOS_TX_NONE):
         """Write a single value to an object.
@@ -1823,6 +1817,27 @@ class DaosContainer(object):
                                 c_rec_size, txn)
         return buf
 
+    def read_array_data(self, rec_count, rec_size, dkey, akey, obj, out=None,
+                        txn=daos_cref.DAOS_TX_NONE):
+        """Read an array value from the specified object into a single buffer.
+
+        rec_count --number of records (array indices) to read
+        rec_size --each value in the array must be this size
+        out --writable buffer to read into, such as a bytearray or a numpy
+              array, a new bytearray is returned if None
+
+        """
+        # container should be  in the open state
+        if self.coh == 0:
+            raise DaosApiError("Container needs to be open.")
+
+        c_dkey = ctypes.create_string_buffer(dkey)
+        c_akey = ctypes.create_string_buffer(akey)
+
+        ioreq = IORequest(self.context, self, obj)
+        return ioreq.fetch_array_data(c_dkey, c_akey, rec_count, rec_size,
+                                      out, txn=txn)
+
     def read_multi_akeys(self, dkey, data, obj, txn=daos_cref.DAOS_TX_NONE):
         """Read multiple values as given by their akeys.
 
@@ -1948,13 +1963,7 @@ class DaosContainer(object):
         else:
             event = daos_cref.DaosEvent()
             params = [self.coh, buff, total_size, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
         return total_size[0], buff
 
     def set_attr(self, data, coh=None, cb_func=None):
@@ -1998,13 +2007,7 @@ class DaosContainer(object):
         else:
             event = daos_cref.DaosEvent()
             params = [self.coh, no_of_att, names, values, sizes, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
     def get_attr(self, attr_names, coh=None, cb_func=None):
         """Retrieve a list of user-defined container attribute values.
@@ -2046,13 +2049,7 @@ class DaosContainer(object):
             event = daos_cref.DaosEvent()
             params = [self.coh, no_of_att, ctypes.byref(attr_names_c),
                       ctypes.byref(buff), sizes, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
         results = {}
         i = 0
@@ -2086,13 +2083,7 @@ class DaosContainer(object):
         else:
             event = daos_cref.DaosEvent()
             params = [coh, epoch, event]
-            thread = threading.Thread(target=daos_cref.AsyncWorker1,
-                                      args=(func,
-                                            params,
-                                            self.context,
-                                            cb_func,
-                                            self))
-            thread.start()
+            self.context.poller.submit(func, params, cb_func, self)
 
 
 class DaosSnapshot(object):
@@ -2216,6 +2207,10 @@ class DaosServer(object):
                                .format(ret))
 
 
+# complete the calls in flight of every live context before DAOS is finalized
+DaosClient.register_cleanup(daos_cref.close_pollers)
+
+
 class DaosContext(object):
     # pylint: disable=too-few-public-methods
     """Provides environment and other info for a DAOS client."""
@@ -2265,6 +2260,7 @@ class DaosContext(object):
             'get-cont-attr':   self.libdaos.daos_cont_get_attr,
             'get-pool-attr':   self.libdaos.daos_pool_get_attr,
             'get-layout':      self.libdaos.daos_obj_layout_get,
+            'fini-event':      self.libdaos.daos_event_fini,
             'init-event':      self.libdaos.daos_event_init,
             'kill-server':     self.libdaos.daos_mgmt_svc_rip,
             'kill-target':     self.libdaos.daos_pool_tgt_exclude_out,
@@ -2292,6 +2288,9 @@ class DaosContext(object):
             'test-event':      self.libdaos.daos_event_test,
             'update-obj':      self.libdaos.daos_obj_update}
 
+        # completes the asynchronous calls made with a cb_func
+        self.poller = daos_cref.EventPoller(self)
+
     def get_function(self, function):
         """Call a function through the API."""
         init_not_required = ['d_log']
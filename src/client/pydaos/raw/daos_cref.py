@@ -24,6 +24,16 @@
 # pylint: disable=too-few-public-methods
 # pylint: disable=pylint-missing-docstring
 import ctypes
+import threading
+import traceback
+import weakref
+
+try:
+    from concurrent.futures import Future
+except ImportError:
+    # python2 without the futures backport, completions are only reported to
+    # callbacks
+    Future = None
 
 # DAOS api C structures
 class RankList(ctypes.Structure):
@@ -287,6 +297,177 @@ def AsyncWorker2(func_ref, param_list, context, cb_func=None, obj=None):
     qfunc = context.get_function('destroy-eq')
     qfunc(ctypes.byref(qhandle))
 
+class EventPoller(object):
+    """ Completes asynchronous DAOS calls from a single thread polling one
+        event queue shared by all of them, rather than creating a thread and
+        an event queue for each call.
+
+        submit() initializes the event passed as the last parameter of a call
+        on the shared queue, makes the call and returns without waiting.
+        Once the call completes, cb_func is called from the polling thread
+        with a CallbackEvent, and the future returned by submit(), if
+        concurrent.futures is available, is resolved with the same
+        CallbackEvent. The number of calls in flight is only limited by the
+        DAOS client.
+
+        The event queue and polling thread are created by the first call,
+        and destroyed once no call has been in flight for IDLE_TIMEOUT, or by
+        close() once the calls in flight have completed. An idle poller holds
+        no reference to itself, so it is released with its context.
+    """
+
+    # Maximum number of events to complete per poll
+    POLL_MAX = 64
+
+    # Time to wait for completions per poll, in microseconds
+    POLL_TIMEOUT = 100000
+
+    # Time to keep the event queue without calls in flight, in seconds
+    IDLE_TIMEOUT = 1.0
+
+    def __init__(self, context):
+        self.context = context
+        self._cond = threading.Condition()
+        # (event, param_list, cb_func, obj, future) by event address
+        self._pending = {}
+        self._eq = None
+        self._thread = None
+        self._closing = False
+        _POLLERS.add(self)
+
+    def submit(self, func_ref, param_list, cb_func=None, obj=None):
+        """ Call func_ref with param_list, the last of which must be a
+            DaosEvent, and return a future for its completion, or None if
+            concurrent.futures is not available.
+        """
+        the_event = param_list[-1]
+        param_list[-1] = ctypes.byref(the_event)
+        future = Future() if Future is not None else None
+        entry = (the_event, param_list, cb_func, obj, future)
+        key = ctypes.addressof(the_event)
+
+        with self._cond:
+            rc = self._start()
+            if rc == 0:
+                efunc = self.context.get_function('init-event')
+                rc = efunc(param_list[-1], self._eq, None)
+            if rc == 0:
+                # register the call before making it, as it can complete
+                # before func_ref returns
+                self._pending[key] = entry
+                self._cond.notify()
+        if rc != 0:
+            the_event.ev_error = rc
+            self._complete(entry, False)
+            return future
+
+        rc = func_ref(*param_list)
+        if rc != 0:
+            # the call failed without launching the event, so it will not be
+            # returned by the event queue
+            with self._cond:
+                entry = self._pending.pop(key, None)
+            if entry is not None:
+                if the_event.ev_error == 0:
+                    the_event.ev_error = rc
+                self._complete(entry, True)
+        return future
+
+    def _start(self):
+        """ Create the event queue and polling thread if needed """
+        if self._thread is not None:
+            return 0
+        qhandle = ctypes.c_ulonglong(0)
+        rc = self.context.get_function('create-eq')(ctypes.byref(qhandle))
+        if rc != 0:
+            return rc
+        self._eq = qhandle
+        self._closing = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return 0
+
+    def _run(self):
+        """ Poll the event queue for as long as calls are in flight """
+        poll = self.context.get_function('poll-eq')
+        events = (ctypes.POINTER(DaosEvent) * self.POLL_MAX)()
+        while True:
+            with self._cond:
+                waited = False
+                while not self._pending:
+                    if self._closing or waited:
+                        self._stop()
+                        return
+                    self._cond.wait(self.IDLE_TIMEOUT)
+                    waited = True
+                eq = self._eq
+
+            # wait for completions even if the calls have not launched their
+            # events yet
+            rc = poll(eq, 0, ctypes.c_longlong(self.POLL_TIMEOUT),
+                      ctypes.c_uint(self.POLL_MAX), events)
+            if rc < 0:
+                # fail everything rather than leave calls which never complete
+                with self._cond:
+                    failed = list(self._pending.values())
+                    self._pending.clear()
+                for entry in failed:
+                    entry[0].ev_error = rc
+                    self._complete(entry, True)
+                continue
+
+            for i in range(rc):
+                with self._cond:
+                    entry = self._pending.pop(
+                        ctypes.addressof(events[i].contents), None)
+                if entry is not None:
+                    self._complete(entry, True)
+
+    def _complete(self, entry, initialized):
+        """ Finalize the event of a call and report its completion """
+        (the_event, _, cb_func, obj, future) = entry
+        if initialized:
+            efunc = self.context.get_function('fini-event')
+            efunc(ctypes.byref(the_event))
+        cb_event = CallbackEvent(obj, the_event)
+        if cb_func is not None:
+            try:
+                cb_func(cb_event)
+            except Exception: # pylint: disable=broad-except
+                # keep polling for the other calls
+                traceback.print_exc()
+        if future is not None:
+            future.set_result(cb_event)
+
+    def _stop(self):
+        """ Destroy the event queue once nothing is in flight, called by the
+            polling thread with the condition held
+        """
+        qfunc = self.context.get_function('destroy-eq')
+        qfunc(self._eq, 0)
+        self._eq = None
+        self._thread = None
+
+    def close(self):
+        """ Wait for the calls in flight and destroy the event queue """
+        with self._cond:
+            if self._thread is None:
+                return
+            self._closing = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not threading.current_thread():
+            thread.join()
+
+# Pollers of the live contexts, closed before DAOS is finalized
+_POLLERS = weakref.WeakSet()
+
+def close_pollers():
+    """ Close every live EventPoller """
+    for poller in list(_POLLERS):
+        poller.close()
+
 class Logfac:
     DEBUG = 0
     INFO = 1
@@ -0,0 +1,187 @@
+'''
+  (C) Copyright 2020 Intel Corporation.
+
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+
+  GOVERNMENT LICENSE RIGHTS-OPEN SOURCE SOFTWARE
+  The Government's rights to use, modify, reproduce, release, perform, display,
+  or disclose this software are subject to the terms of the Apache License as
+  provided in Contract No. B609815.
+  Any reproduction of computer software, computer software documentation, or
+  portions thereof marked with this legend must also reproduce the markings.
+'''
+import unittest
+import ctypes
+import threading
+import importlib.util
+import os
+import gc
+import weakref
+
+# daos_cref only needs ctypes, load it without the pydaos package which needs
+# the compiled shim
+_SPEC = importlib.util.spec_from_file_location(
+    "daos_cref", os.path.join(os.path.dirname(__file__), "..", "raw",
+                              "daos_cref.py"))
+daos_cref = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(daos_cref)
+
+
+class FakeContext():
+    """Stand-in for DaosContext, with an event queue completing the calls
+    once release() is called"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.launched = []
+        self.released = threading.Event()
+        self.initialized = 0
+        self.finalized = 0
+        self.queues = 0
+        self.create_rc = 0
+        self.init_rc = 0
+        self.ftable = {
+            'create-eq': self._create_eq,
+            'destroy-eq': self._destroy_eq,
+            'init-event': self._init_event,
+            'fini-event': self._fini_event,
+            'poll-eq': self._poll_eq}
+
+    def get_function(self, function):
+        return self.ftable[function]
+
+    def _create_eq(self, qhandle):
+        if self.create_rc == 0:
+            self.queues += 1
+        return self.create_rc
+
+    def _destroy_eq(self, qhandle, flags):
+        self.queues -= 1
+        return 0
+
+    def _init_event(self, event, eq, parent):
+        if self.init_rc == 0:
+            self.initialized += 1
+        return self.init_rc
+
+    def _fini_event(self, event):
+        self.finalized += 1
+        return 0
+
+    def _poll_eq(self, eq, wait, timeout, max_events, events):
+        if not self.released.wait(0.01):
+            return 0
+        with self.lock:
+            done = self.launched[:max_events.value]
+            self.launched = self.launched[len(done):]
+        for i, event in enumerate(done):
+            events[i] = ctypes.pointer(event)
+        return len(done)
+
+    def call(self, value, rc, event):
+        """Asynchronous call failing with rc, or launching the event"""
+        if rc != 0:
+            return rc
+        event._obj.ev_error = value
+        with self.lock:
+            self.launched.append(event._obj)
+        return 0
+
+
+class EventPollerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.context = FakeContext()
+        self.poller = daos_cref.EventPoller(self.context)
+
+    def tearDown(self):
+        self.context.released.set()
+        self.poller.close()
+
+    def _submit(self, value, rc=0, cb_func=None):
+        return self.poller.submit(self.context.call,
+                                  [value, rc, daos_cref.DaosEvent()],
+                                  cb_func, value)
+
+    def test_complete(self):
+        seen = []
+        futures = [self._submit(value, cb_func=seen.append)
+                   for value in range(100)]
+        assert not any(future.done() for future in futures)
+        self.context.released.set()
+
+        events = [future.result(5) for future in futures]
+        assert [event.obj for event in events] == list(range(100))
+        assert [event.event.ev_error for event in events] == list(range(100))
+        assert sorted(event.obj for event in seen) == list(range(100))
+        assert self.context.initialized == 100
+        assert self.context.finalized == 100
+        assert self.context.queues == 1
+
+        self.poller.close()
+        assert self.context.queues == 0
+
+    def test_submit_failure(self):
+        # the call fails without launching its event
+        future = self._submit(1, rc=-1005)
+        assert future.done()
+        assert future.result().event.ev_error == -1005
+        assert self.context.finalized == 1
+
+        # the event cannot be initialized
+        self.context.init_rc = -1006
+        future = self._submit(2)
+        assert future.result().event.ev_error == -1006
+        assert self.context.finalized == 1
+
+        # the event queue cannot be created
+        self.poller.close()
+        self.context.create_rc = -1007
+        future = self._submit(3)
+        assert future.result().event.ev_error == -1007
+        assert self.context.initialized == 1
+
+    def test_callback_error(self):
+        def cb_func(event):
+            raise ValueError(event.obj)
+
+        self.context.released.set()
+        futures = [self._submit(value, cb_func=cb_func) for value in range(2)]
+        assert [future.result(5).obj for future in futures] == [0, 1]
+
+    def test_idle(self):
+        self.poller.IDLE_TIMEOUT = 0.01
+        self.context.released.set()
+        self._submit(1).result(5)
+        thread = self.poller._thread
+        thread.join(5)
+        assert self.context.queues == 0
+        assert self.poller._thread is None
+
+        # an idle poller is released with its context
+        poller = weakref.ref(self.poller)
+        assert poller() in daos_cref._POLLERS
+        self.poller = daos_cref.EventPoller(self.context)
+        gc.collect()
+        assert poller() is None
+
+    def test_close_pollers(self):
+        future = self._submit(1)
+        self.context.released.set()
+        daos_cref.close_pollers()
+        assert future.done()
+        assert self.poller._thread is None
+        assert self.context.queues == 0
+
+
+if __name__ == "__main__":
+    unittest.main()
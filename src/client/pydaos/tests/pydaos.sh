@@ -0,0 +1,12 @@
+#!/bin/bash
+# Unit tests of the pydaos modules, run against stand-ins for the compiled
+# shim and libdaos so that they do not need DAOS.
+#
+# They are run by unittest, as pytest would import the pydaos package, and so
+# the shim, to collect any test under it.
+
+CURRENT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
+
+set -e
+
+python3 -m unittest discover -v -s "${CURRENT_DIR}" -p "*_test.py"
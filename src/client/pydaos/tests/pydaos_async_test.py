@@ -0,0 +1,152 @@
+'''
+  (C) Copyright 2020 Intel Corporation.
+
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+
+  GOVERNMENT LICENSE RIGHTS-OPEN SOURCE SOFTWARE
+  The Government's rights to use, modify, reproduce, release, perform, display,
+  or disclose this software are subject to the terms of the Apache License as
+  provided in Contract No. B609815.
+  Any reproduction of computer software, computer software documentation, or
+  portions thereof marked with this legend must also reproduce the markings.
+'''
+import pytest
+import unittest
+import asyncio
+import random
+import importlib.util
+import os
+
+# pydaos_async does not need the rest of pydaos, load it without the package
+# which needs the compiled shim
+_SPEC = importlib.util.spec_from_file_location(
+    "pydaos_async", os.path.join(os.path.dirname(__file__), "..",
+                                 "pydaos_async.py"))
+pydaos_async = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(pydaos_async)
+EventQueue = pydaos_async.EventQueue
+run_window = pydaos_async.run_window
+
+MAGIC = 0x7A89
+EQ = 42
+
+
+class FakeShim():
+    """Stand-in shim completing a few operations per poll, in random order"""
+
+    def __init__(self):
+        self.pending = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.destroyed = False
+        self.submit_rc = 0
+        self.poll_rc = 0
+        self._random = random.Random(1)
+
+    def _submit(self, magic, eq, token, rc, value):
+        assert magic == MAGIC
+        assert eq == EQ
+        if self.submit_rc != 0:
+            return self.submit_rc
+        self.pending.append((token, rc, value))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        return 0
+
+    def kv_get_async(self, magic, eq, token, key):
+        return self._submit(magic, eq, token, 0, 'value of ' + key)
+
+    def kv_put_async(self, magic, eq, token, key, rc):
+        return self._submit(magic, eq, token, rc, None)
+
+    def eq_poll(self, magic, eq, max_events):
+        assert magic == MAGIC
+        if self.poll_rc != 0:
+            return (self.poll_rc, None)
+        self._random.shuffle(self.pending)
+        count = min(max_events, self._random.randint(0, 2))
+        done = self.pending[:count]
+        self.pending = self.pending[count:]
+        self.in_flight -= len(done)
+        return (0, done)
+
+    def eq_destroy(self, magic, eq):
+        assert magic == MAGIC
+        self.destroyed = True
+        return 0
+
+
+class EventQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.shim = FakeShim()
+        self.loop = asyncio.new_event_loop()
+        self.queue = EventQueue(self.shim, MAGIC, EQ, self.loop)
+
+    def tearDown(self):
+        self.queue.close()
+        self.loop.close()
+
+    def _run(self, coro):
+        return self.loop.run_until_complete(coro)
+
+    def test_completion(self):
+        futures = [self.queue.submit('kv_get_async', str(key))
+                   for key in range(20)]
+        results = self._run(asyncio.gather(*futures))
+        assert results == [(0, 'value of {}'.format(key))
+                           for key in range(20)]
+        assert self.shim.in_flight == 0
+
+    def test_error_rc(self):
+        results = self._run(asyncio.gather(
+            self.queue.submit('kv_put_async', 'a', 0),
+            self.queue.submit('kv_put_async', 'b', -1005)))
+        assert results == [(0, None), (-1005, None)]
+
+        self.shim.submit_rc = -1001
+        fut = self.queue.submit('kv_put_async', 'c', 0)
+        assert fut.done()
+        assert fut.result() == (-1001, None)
+        assert self.shim.pending == []
+
+    def test_poll_failure(self):
+        futures = [self.queue.submit('kv_get_async', str(key))
+                   for key in range(5)]
+        self.shim.poll_rc = -1003
+        results = self._run(asyncio.gather(*futures))
+        assert results == [(-1003, None)] * 5
+
+    def test_run_window(self):
+        for depth in [1, 4, 16]:
+            self.shim.max_in_flight = 0
+            submits = ((key, self.queue.submit('kv_get_async', str(key)))
+                       for key in range(50))
+            results = self._run(run_window(submits, depth))
+            assert results == {key: (0, 'value of {}'.format(key))
+                               for key in range(50)}
+            assert self.shim.max_in_flight == depth
+
+    def test_close(self):
+        fut = self.queue.submit('kv_get_async', 'a')
+        assert self.queue.close() == 0
+        assert self.shim.destroyed
+        assert fut.cancelled()
+        assert self.queue.eq is None
+        assert self.queue.close() == 0
+
+        with pytest.raises(asyncio.CancelledError):
+            self._run(fut)
+
+
+if __name__ == "__main__":
+    unittest.main()
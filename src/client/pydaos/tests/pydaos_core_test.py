@@ -0,0 +1,233 @@
+'''
+  (C) Copyright 2020 Intel Corporation.
+
+  Licensed under the Apache License, Version 2.0 (the "License");
+  you may not use this file except in compliance with the License.
+  You may obtain a copy of the License at
+
+     http://www.apache.org/licenses/LICENSE-2.0
+
+  Unless required by applicable law or agreed to in writing, software
+  distributed under the License is distributed on an "AS IS" BASIS,
+  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+  See the License for the specific language governing permissions and
+  limitations under the License.
+
+  GOVERNMENT LICENSE RIGHTS-OPEN SOURCE SOFTWARE
+  The Government's rights to use, modify, reproduce, release, perform, display,
+  or disclose this software are subject to the terms of the Apache License as
+  provided in Contract No. B609815.
+  Any reproduction of computer software, computer software documentation, or
+  portions thereof marked with this legend must also reproduce the markings.
+'''
+import pytest
+import unittest
+import importlib.util
+import os
+import sys
+import threading
+import types
+
+MAGIC = 0x7A89
+
+
+class StandInShim(types.ModuleType):
+    """Stand-in shim keeping the values of a single KV in a dict"""
+
+    def __init__(self):
+        super().__init__("pydaos_shim_3")
+        self.DER_SUCCESS = 0
+        self.OC_SX = 200
+        self.values = {}
+        self.puts = []
+        self.gets = 0
+        self.put_rc = 0
+        self.put_done = threading.Event()
+
+    def err_to_str(self, magic, rc):
+        return None
+
+    def daos_init(self, magic):
+        return 0
+
+    def daos_fini(self, magic):
+        return 0
+
+    def kv_open(self, magic, coh, hi, lo, flags):
+        return (0, 1)
+
+    def kv_close(self, magic, oh):
+        return 0
+
+    def kv_get(self, magic, oh, ddict, value_size, depth):
+        assert magic == MAGIC
+        self.gets += 1
+        for key in ddict:
+            ddict[key] = self.values.get(key)
+        return 0
+
+    def kv_put(self, magic, oh, ddict, depth):
+        assert magic == MAGIC
+        self.puts.append(dict(ddict))
+        if self.put_rc == 0:
+            for (key, val) in ddict.items():
+                if val is None or len(val) == 0:
+                    self.values.pop(key, None)
+                elif isinstance(val, str):
+                    self.values[key] = val.encode('utf-8')
+                else:
+                    self.values[key] = bytes(val)
+        self.put_done.set()
+        return self.put_rc
+
+
+def _load_pydaos(shim):
+    """Load the pydaos package from the source tree with a stand-in shim,
+    under another name so that it does not replace an installed pydaos"""
+    path = os.path.join(os.path.dirname(__file__), "..")
+    sys.modules["pydaos_standin.pydaos_shim_3"] = shim
+    spec = importlib.util.spec_from_file_location(
+        "pydaos_standin", os.path.join(path, "__init__.py"),
+        submodule_search_locations=[path])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["pydaos_standin"] = module
+    spec.loader.exec_module(module)
+    return sys.modules["pydaos_standin.pydaos_core"]
+
+
+SHIM = StandInShim()
+pydaos_core = _load_pydaos(SHIM)
+
+
+class FakeTime():
+    """Clock for the cache TTL, moved by the test"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class KVTestCase(unittest.TestCase):
+    def setUp(self):
+        SHIM.values.clear()
+        SHIM.puts = []
+        SHIM.gets = 0
+        SHIM.put_rc = 0
+        SHIM.put_done.clear()
+        self.kv = pydaos_core.KVObj(1, pydaos_core.ObjID(0, 1), None)
+
+
+class KVCacheTestCase(KVTestCase):
+    def setUp(self):
+        super().setUp()
+        self.time = pydaos_core.time
+        pydaos_core.time = FakeTime()
+
+    def tearDown(self):
+        pydaos_core.time = self.time
+
+    def test_lru(self):
+        cache = self.kv.enable_cache(max_entries=2)
+        self.kv.bput({"a": b"1", "b": b"2", "c": b"3"})
+        assert len(cache) == 2
+        assert cache.evictions == 1
+
+        # the oldest write was evicted, then reading it evicts the least
+        # recently used of the others
+        assert self.kv["c"] == b"3"
+        assert self.kv["a"] == b"1"
+        assert SHIM.gets == 1
+        assert self.kv["b"] == b"2"
+        assert SHIM.gets == 2
+        assert self.kv["a"] == b"1"
+        assert SHIM.gets == 2
+        assert (cache.hits, cache.misses, cache.evictions) == (2, 2, 3)
+
+    def test_ttl(self):
+        cache = self.kv.enable_cache(ttl=10)
+        self.kv["a"] = b"1"
+        pydaos_core.time.now += 9
+        assert self.kv["a"] == b"1"
+        assert SHIM.gets == 0
+
+        # written by another client
+        SHIM.values["a"] = b"2"
+        pydaos_core.time.now += 2
+        assert self.kv["a"] == b"2"
+        assert SHIM.gets == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_failed_bput(self):
+        cache = self.kv.enable_cache()
+        self.kv.bput({"a": b"1", "b": b"2"})
+        assert len(cache) == 2
+
+        SHIM.put_rc = -1005
+        with pytest.raises(pydaos_core.PyDError):
+            self.kv.bput({"a": b"3"})
+        assert len(cache) == 1
+        assert self.kv["a"] == b"1"
+        assert self.kv["b"] == b"2"
+        assert SHIM.gets == 1
+
+        # deletes are cached too
+        SHIM.put_rc = 0
+        del self.kv["a"]
+        with pytest.raises(KeyError):
+            self.kv.get("a")
+        assert SHIM.gets == 2
+
+
+class KVBatchTestCase(KVTestCase):
+    def test_count(self):
+        batch = self.kv.batch(max_count=3, max_delay=None)
+        for key in range(5):
+            batch[str(key)] = str(key)
+        assert SHIM.puts == [{"0": "0", "1": "1", "2": "2"}]
+        assert batch.get("4") == b"4"
+        assert batch.get("1") == b"1"
+
+        del batch["1"]
+        assert SHIM.puts[1:] == [{"3": "3", "4": "4", "1": None}]
+        assert sorted(SHIM.values) == ["0", "2", "3", "4"]
+        with pytest.raises(KeyError):
+            batch.get("1")
+        batch.flush()
+        assert len(SHIM.puts) == 2
+
+    def test_bytes(self):
+        with self.kv.batch(max_bytes=9, max_delay=None) as batch:
+            batch["a"] = b"123"
+            batch["a"] = b"1234"
+            batch["b"] = bytearray(b"12")
+            assert SHIM.puts == []
+            batch["c"] = b"1"
+            assert SHIM.puts == [{"a": b"1234", "b": b"12", "c": b"1"}]
+            batch["d"] = b"1"
+        assert SHIM.puts[1:] == [{"d": b"1"}]
+
+    def test_timer(self):
+        batch = self.kv.batch(max_delay=0.01)
+        batch["a"] = b"1"
+        assert SHIM.put_done.wait(5)
+        assert SHIM.values == {"a": b"1"}
+
+    def test_timer_error(self):
+        batch = self.kv.batch(max_delay=0.01)
+        SHIM.put_rc = -1005
+        batch["a"] = b"1"
+        assert SHIM.put_done.wait(5)
+
+        # reported by the next write, once
+        SHIM.put_rc = 0
+        with pytest.raises(pydaos_core.PyDError):
+            batch["b"] = b"2"
+        batch["b"] = b"2"
+        batch.flush()
+        assert SHIM.values == {"b": b"2"}
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -25,6 +25,8 @@ from __future__ import print_function
 import os
 import copy
 import sys
+import threading
+from collections import deque
 
 from storage_estimator.vos_structures import VosObject, AKey, DKey, Container, Containers, VosValue, Overhead, ValType, KeyType
 from storage_estimator.util import CommonBase
@@ -146,6 +148,7 @@ class DFS(CommonBase):
     def __init__(self):
         super(DFS, self).__init__()
         self._objects = []
+        self._files = dict()
         self._chunk_size = 1048576
         self._io_size = 131072
 
@@ -169,8 +172,25 @@ class DFS(CommonBase):
     def get_container(self):
         container = Container(objects=self._objects)
 
+        for file_size in sorted(self._files):
+            file_object = self._create_file_obj(
+                file_size, self._files[file_size])
+            container.add_value(file_object)
+
         return container
 
+    def flush(self, sink):
+        for vos_object in self._objects:
+            sink(vos_object.dump())
+        self._objects = []
+
+    def flush_files(self, sink):
+        for file_size in sorted(self._files):
+            file_object = self._create_file_obj(
+                file_size, self._files[file_size])
+            sink(file_object.dump())
+        self._files = dict()
+
     def copy(self):
         new_dfs = DFS()
         new_dfs._io_size = copy.deepcopy(self._io_size)
@@ -178,11 +198,13 @@ class DFS(CommonBase):
         new_dfs._dkey0 = copy.deepcopy(self._dkey0)
         new_dfs._dfs_inode_akey = copy.deepcopy(self._dfs_inode_akey)
         new_dfs._objects = copy.deepcopy(self._objects)
+        new_dfs._files = copy.deepcopy(self._files)
 
         return new_dfs
 
     def reset(self):
         self._objects = []
+        self._files = dict()
 
     def add_obj(self):
         oid = len(self._objects)
@@ -224,6 +246,11 @@ class DFS(CommonBase):
     def update_object_count(self, oid, count):
         self._objects[oid].set_count(count)
 
+    def merge(self, dfs):
+        self._objects.extend(dfs._objects)
+        for file_size, count in dfs._files.items():
+            self._files[file_size] = self._files.get(file_size, 0) + count
+
     def _create_default_dkey0(self):
         akey = AKey(
             key_type=KeyType.INTEGER,
@@ -291,7 +318,7 @@ class DFS(CommonBase):
 
         return file_object
 
-    def create_file_obj(self, file_size, identical_files=1):
+    def _create_file_obj(self, file_size, identical_files):
         file_object = VosObject()
         file_object.add_value(self._dkey0)
         file_object.set_count(identical_files)
@@ -299,14 +326,223 @@ class DFS(CommonBase):
         file_object = self._add_chunk_size_elements(file_object, file_size)
         file_object = self._add_chunk_size_remainder(file_object, file_size)
 
-        self._objects.append(file_object)
+        return file_object
+
+    def create_file_obj(self, file_size, identical_files=1):
+        # The layout of a file only depends on its size, so files are
+        # only counted here and every size becomes a single object with
+        # the count of files of that size when the container is built.
+        self._files[file_size] = self._files.get(
+            file_size, 0) + identical_files
+
+
+class WorkQueue(object):
+    def __init__(self, num_workers):
+        self._queues = [deque() for _ in range(num_workers)]
+        self._pending = 0
+        self._aborted = False
+        self._cond = threading.Condition()
+
+    def put(self, worker, paths):
+        if not paths:
+            return
+        with self._cond:
+            self._pending += len(paths)
+            self._queues[worker].extend(paths)
+            self._cond.notify_all()
+
+    def task_done(self, worker, paths):
+        with self._cond:
+            self._pending += len(paths) - 1
+            self._queues[worker].extend(paths)
+            if paths or self._pending == 0:
+                self._cond.notify_all()
+
+    def abort(self):
+        with self._cond:
+            self._aborted = True
+            self._cond.notify_all()
+
+    def _try_get(self, worker):
+        # Take the newest path of our own queue, otherwise steal the oldest
+        # path of somebody else's queue, as it is likely to be a bigger
+        # subtree. deque pop() and popleft() are atomic.
+        try:
+            return self._queues[worker].pop()
+        except IndexError:
+            pass
+
+        num_queues = len(self._queues)
+        for i in range(1, num_queues):
+            try:
+                return self._queues[(worker + i) % num_queues].popleft()
+            except IndexError:
+                pass
+
+        return None
+
+    def get(self, worker):
+        if self._aborted:
+            return None
+
+        path = self._try_get(worker)
+        if path is not None:
+            return path
+
+        with self._cond:
+            while True:
+                if self._aborted:
+                    return None
+                path = self._try_get(worker)
+                if path is not None or self._pending == 0:
+                    return path
+                self._cond.wait()
+
+
+class DirectoryWalker(CommonBase):
+    def __init__(self, worker, work, dfs, sink=None):
+        super(DirectoryWalker, self).__init__()
+        self._worker = worker
+        self._work = work
+        self._dfs = dfs
+        self._sink = sink
+        self._subdirs = []
+        self._oid = 0
+        self.error = None
+        self.count_files = 0
+        self.count_dir = 0
+        self.count_sym = 0
+        self.count_error = 0
+        self.file_size = 0
+        self.sym_size = 0
+        self.name_size = 0
+
+    def get_dfs(self):
+        return self._dfs
+
+    def run(self):
+        try:
+            self._walk()
+        except Exception as err:
+            # Stop the other walkers, the explorer raises the error once
+            # they are done.
+            self.error = err
+            self._work.abort()
+
+    def _walk(self):
+        while True:
+            file_path = self._work.get(self._worker)
+            if file_path is None:
+                return
+
+            self._subdirs = []
+            try:
+                self._oid = self._dfs.add_obj()
+                self._debug('entering {0}'.format(file_path))
+                self._read_directory(file_path)
+                if self._sink:
+                    self._dfs.flush(self._sink)
+            finally:
+                self._work.task_done(self._worker, self._subdirs)
+
+    def _read_directory_3(self, file_path):
+        with os.scandir(file_path) as it:
+            count = 0
+
+            for entry in it:
+                self.name_size += len(entry.name.encode("utf-8"))
+                if entry.is_symlink():
+                    self._process_symlink(entry)
+                    count += 1
+                elif entry.is_dir():
+                    self._process_dir(entry)
+                    count += 1
+                elif entry.is_file():
+                    self._process_file(entry)
+                    count += 1
+                else:
+                    self._error(
+                        'found unknown object (skipped): {0}'.format(
+                            entry.name))
+            if count == 0:
+                self._process_empty_dir()
+
+    def _read_directory_2(self, file_path):
+        items = os.listdir(file_path)
+
+        if not items:
+            self._process_empty_dir()
+
+        for item in items:
+            target = os.path.join(file_path, item)
+
+            entry = Entry(item, target)
+            self.name_size += len(entry.name.encode("utf-8"))
+
+            if os.path.islink(target):
+                self._process_symlink(entry)
+            elif os.path.isdir(target):
+                self._process_dir(entry)
+            elif os.path.isfile(target):
+                self._process_file(entry)
+            else:
+                print(
+                    'Error: found unknown object (skipped): {0}'.format(
+                        entry.name))
+
+    def _read_directory(self, file_path):
+        try:
+            if sys.version_info < (3, 5):
+                self._read_directory_2(file_path)
+            else:
+                self._read_directory_3(file_path)
+
+        except OSError:
+            self._error('permission denied (skipped): {0}'.format(file_path))
+            self._process_error(file_path)
+        except Exception as err:
+            self._error('opening dir {0}'.format(err))
+            self._process_error(file_path)
+
+    def _process_empty_dir(self):
+        self._dfs.remove_obj(self._oid)
+
+    def _process_error(self, file_path):
+        self._debug(
+            'a adding dummy entry {0} for {1}'.format(
+                self._oid, file_path))
+        self._dfs.add_dummy(self._oid, 'unknown')
+        self.count_error += 1
+
+    def _process_symlink(self, entry):
+        self._debug('symlink:   {0}'.format(entry.name))
+        info = entry.stat(follow_symlinks=False)
+        self._dfs.add_symlink(self._oid, entry.name, info.st_size)
+        self.sym_size += info.st_size
+        self.count_sym += 1
+
+    def _process_dir(self, entry):
+        self._debug('directory: {0}'.format(entry.name))
+        self._dfs.add_dir(self._oid, entry.name)
+        # Symlinks are never followed, so the path of the entry is already
+        # as canonical as its parent's.
+        self._subdirs.append(entry.path)
+        self.count_dir += 1
+
+    def _process_file(self, entry):
+        self._debug('file:      {0}'.format(entry.name))
+        info = entry.stat(follow_symlinks=False)
+        self._dfs.add_file(self._oid, entry.name, info.st_size)
+        self.file_size += info.st_size
+        self.count_files += 1
 
 
 class FileSystemExplorer(CommonBase):
     def __init__(self, path):
         super(FileSystemExplorer, self).__init__()
         self._path = path
-        self._queue = []
+        self._num_threads = 1
+        self._sink = None
         self._count_files = 0
         self._count_dir = 0
         self._count_sym = 0
@@ -315,7 +551,6 @@ class FileSystemExplorer(CommonBase):
         self._sym_size = 0
         self._name_size = 0
 
-        self._oid = 0
         self._dfs = DFS()
         self._avg = AverageFS()
 
@@ -331,6 +566,19 @@ class FileSystemExplorer(CommonBase):
         self._dfs.set_chunk_size(chunk_size)
         self._avg.set_chunk_size(chunk_size)
 
+    def set_num_threads(self, num_threads):
+        self._check_positive_number(num_threads)
+        self._num_threads = num_threads
+
+    def set_object_sink(self, sink):
+        """Hand the objects to sink as the directories are read
+
+        The objects are then not kept by the DFS returned by get_dfs(). The
+        objects of the files are handed over once the walk is done, as
+        files of the same size share an object.
+        """
+        self._sink = sink
+
     # TODO: Get the D-Key 0 information from the DAOS Array Object
     def set_dfs_file_meta(self, dkey):
         self.dfs.set_dfs_file_meta(dkey)
@@ -405,112 +653,66 @@ class FileSystemExplorer(CommonBase):
 
         return self._avg.get_dfs()
 
-    def _read_directory_3(self, file_path):
-        with os.scandir(file_path) as it:
-            count = 0
-
-            for entry in it:
-                self._name_size += len(entry.name.encode("utf-8"))
-                if entry.is_symlink():
-                    self._process_symlink(entry)
-                    count += 1
-                elif entry.is_dir():
-                    self._process_dir(entry)
-                    count += 1
-                elif entry.is_file():
-                    self._process_file(entry)
-                    count += 1
-                else:
-                    self._error(
-                        'found unknown object (skipped): {0}'.format(
-                            entry.name))
-            if count == 0:
-                self._process_empty_dir()
-
-    def _read_directory_2(self, file_path):
-        items = os.listdir(file_path)
-
-        if not items:
-            self._process_empty_dir()
-
-        for item in items:
-            target = os.path.join(file_path, item)
-
-            entry = Entry(item, target)
-            self._name_size += len(entry.name.encode("utf-8"))
-
-            if os.path.islink(target):
-                self._process_symlink(entry)
-            elif os.path.isdir(target):
-                self._process_dir(entry)
-            elif os.path.isfile(target):
-                self._process_file(entry)
-            else:
-                print(
-                    'Error: found unknown object (skipped): {0}'.format(
-                        entry.name))
-
-    def _read_directory(self, file_path):
-        try:
-            if sys.version_info < (3, 5):
-                self._read_directory_2(file_path)
-            else:
-                self._read_directory_3(file_path)
+    def _merge_walker(self, walker):
+        self._dfs.merge(walker.get_dfs())
+        self._count_files += walker.count_files
+        self._count_dir += walker.count_dir
+        self._count_sym += walker.count_sym
+        self._count_error += walker.count_error
+        self._file_size += walker.file_size
+        self._sym_size += walker.sym_size
+        self._name_size += walker.name_size
 
-        except OSError:
-            self._error('permission denied (skipped): {0}'.format(file_path))
-            self._process_error(file_path)
-        except Exception as err:
-            self._error('opening dir {0}'.format(err))
-            self._process_error(file_path)
+    def _get_walker_sink(self):
+        if not self._sink:
+            return None
 
-    def _process_empty_dir(self):
-        self._dfs.remove_obj(self._oid)
+        lock = threading.Lock()
 
-    def _process_error(self, file_path):
-        self._debug(
-            'a adding dummy entry {0} for {1}'.format(
-                self._oid, file_path))
-        self._dfs.add_dummy(self._oid, 'unknown')
-        self._count_error += 1
-
-    def _process_symlink(self, entry):
-        self._debug('symlink:   {0}'.format(entry.name))
-        info = entry.stat(follow_symlinks=False)
-        self._dfs.add_symlink(self._oid, entry.name, info.st_size)
-        self._sym_size += info.st_size
-        self._count_sym += 1
-
-    def _process_dir(self, entry):
-        self._debug('directory: {0}'.format(entry.name))
-        self._dfs.add_dir(self._oid, entry.name)
-        self._enqueue_path(entry.path)
-        self._count_dir += 1
+        def sink(payload):
+            with lock:
+                self._sink(payload)
 
-    def _process_file(self, entry):
-        self._debug('file:      {0}'.format(entry.name))
-        info = entry.stat(follow_symlinks=False)
-        self._dfs.add_file(self._oid, entry.name, info.st_size)
-        self._file_size += info.st_size
-        self._count_files += 1
-
-    def _enqueue_path(self, path):
-        path = os.path.realpath(path)
-        self._queue.append(path)
+        return sink
 
     def _traverse_directories(self):
         self._reset_stats()
         self._dfs.reset()
-        self._enqueue_path(self._path)
 
-        while(self._queue):
-            file_path = self._queue.pop(0)
-            self._oid = self._dfs.add_obj()
-            self._debug('entering {0}'.format(file_path))
-            self._read_directory(file_path)
+        work = WorkQueue(self._num_threads)
+        work.put(0, [os.path.realpath(self._path)])
+
+        sink = self._get_walker_sink()
+        walkers = []
+        for worker in range(self._num_threads):
+            walker = DirectoryWalker(worker, work, self._dfs.copy(), sink)
+            walker.set_verbose(self._verbose)
+            walkers.append(walker)
+
+        if self._num_threads == 1:
+            walkers[0].run()
+        else:
+            threads = []
+            for walker in walkers:
+                thread = threading.Thread(target=walker.run)
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+            for thread in threads:
+                thread.join()
+
+        for walker in walkers:
+            if walker.error is not None:
+                raise walker.error
+
+        for walker in walkers:
+            self._merge_walker(walker)
+
+        if self._sink:
+            self._dfs.flush(self._sink)
+            self._dfs.flush_files(self._sink)
 
     def _reset_stats(self):
-        self._oid = 0
         self._count_files = 0
         self._count_dir = 0
         self._count_sym = 0
@@ -42,8 +42,7 @@ class ProcessCSV(ProcessBase):
         fse = self._ingest_csv()
         config_yaml = self._get_yaml_from_dfs(fse)
 
-        yaml_str = self._dump_yaml(config_yaml)
-        self._create_file(self._args.output, yaml_str)
+        self._create_output(self._args.output, config_yaml)
         self._process_yaml(config_yaml)
 
     def _ingest_csv(self):
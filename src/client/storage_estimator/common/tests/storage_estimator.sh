@@ -86,6 +86,7 @@ daos_storage_estimator.py read_yaml -v -m "${VOS_SIZE}" "${DFS_SAMPLE}"
 print_header "Storage Estimator: explore_fs"
 
 FS_YAML="${TEST_DIR}/test_fs_data.yaml"
+FS_JSONL="${TEST_DIR}/test_fs_data.jsonl"
 
 daos_storage_estimator.py explore_fs -h
 daos_storage_estimator.py explore_fs -v "${TEST_DIR}"
@@ -96,6 +97,8 @@ daos_storage_estimator.py explore_fs -v -x "${TEST_DIR}"
 daos_storage_estimator.py explore_fs -v -x -m "${VOS_SIZE}" "${TEST_DIR}"
 daos_storage_estimator.py explore_fs -v -x "${TEST_DIR}" -o "${FS_YAML}"
 daos_storage_estimator.py read_yaml "${FS_YAML}"
+daos_storage_estimator.py explore_fs -v "${TEST_DIR}" -o "${FS_JSONL}"
+daos_storage_estimator.py read_yaml "${FS_JSONL}"
 
 
 print_header "Storage Estimator: Successful"
@@ -24,9 +24,13 @@ import pytest
 import unittest
 import yaml
 import os
+import tempfile
+import shutil
 
 from storage_estimator.vos_structures import VosObject, AKey, DKey, Container, Containers, VosValue, Overhead, ValType, KeyType, VosValueError
-from storage_estimator.explorer import FileSystemExplorer
+from storage_estimator.explorer import FileSystemExplorer, DFS
+from storage_estimator.vos_size import MetaOverhead
+from storage_estimator.util import LayoutWriter, read_layout
 from .util import FileGenerator
 
 
@@ -72,6 +76,41 @@ class VosValueTestCase(unittest.TestCase):
         assert want == got
 
 
+def _create_tree(order, node_size, record_size, dynamic=[]):
+    tree = {
+        "order": order,
+        "leaf_node_size": node_size,
+        "int_node_size": node_size,
+        "record_msize": record_size,
+        "node_rec_msize": 8,
+        "num_dynamic": len(dynamic)}
+
+    if dynamic:
+        tree["dynamic"] = [{"order": order, "size": size}
+                           for order, size in dynamic]
+
+    return tree
+
+def _create_meta():
+    trees = {
+        "container": _create_tree(16, 800, 80),
+        "object": _create_tree(16, 800, 144, [(1, 96), (4, 240)]),
+        "dkey": _create_tree(16, 1000, 80, [(1, 96), (2, 144)]),
+        "akey": _create_tree(16, 1000, 80, [(1, 96), (2, 144)]),
+        "single_value": _create_tree(16, 800, 192),
+        "array": _create_tree(23, 1216, 120, [(1, 96)])}
+
+    return {"root": 4496, "scm_cutoff": 4096, "trees": trees}
+
+
+def _get_layout_stats(containers, num_pools=16):
+    overheads = MetaOverhead(None, num_pools, _create_meta())
+    for container in containers:
+        overheads.load_container(container)
+
+    return overheads.get_stats().stats
+
+
 @pytest.fixture(scope="class")
 def vos_test_data(request):
     class VosTestData:
@@ -670,6 +709,271 @@ class FSTestCase(unittest.TestCase):
 
         assert got == want
 
+    def test_create_dfs_threads(self):
+        akey = self._create_inode_akey("DFS_INODE", 64)
+        results = []
+
+        for num_threads in [1, 4]:
+            fse = FileSystemExplorer(self.root_dir)
+            fse.set_dfs_inode(akey)
+            fse.set_io_size(131072)
+            fse.set_chunk_size(1048576)
+            fse.set_num_threads(num_threads)
+            fse.explore()
+            container = fse.get_dfs().get_container()
+            results.append(self._process_stats(container.dump()))
+
+        assert results[0] == results[1]
+
+        with pytest.raises(ValueError) as err:
+            fse.set_num_threads(0)
+        assert "must be a positive not zero value" in str(err.value)
+
+    def test_object_sink(self):
+        akey = self._create_inode_akey("DFS_INODE", 64)
+        results = []
+
+        for num_threads in [1, 4]:
+            objects = []
+            fse = FileSystemExplorer(self.root_dir)
+            fse.set_dfs_inode(akey)
+            fse.set_num_threads(num_threads)
+            fse.set_object_sink(objects.append)
+            fse.explore()
+            with pytest.raises(VosValueError):
+                fse.get_dfs().get_container().dump()
+            results.append(self._process_stats({"objects": objects}))
+
+        fse = FileSystemExplorer(self.root_dir)
+        fse.set_dfs_inode(akey)
+        fse.explore()
+        want = self._process_stats(fse.get_dfs().get_container().dump())
+
+        assert results == [want, want]
+
+    def test_estimate_order(self):
+        akey = self._create_inode_akey("DFS_INODE", 64)
+        results = []
+        temp_path = tempfile.mkdtemp()
+
+        # enough directories, of different sizes, for the placement to
+        # matter
+        test_files = []
+        for i in range(40):
+            for j in range(i % 5 + 1):
+                test_files.append({"type": "file",
+                                   "path": "tree/dir{0}/file{1}".format(i, j),
+                                   "size": 4096 * (i + 1)})
+        self.fg.crete_mock_fs(test_files)
+
+        try:
+            for num_threads in [1, 4]:
+                fse = FileSystemExplorer(self.root_dir)
+                fse.set_dfs_inode(akey)
+                fse.set_num_threads(num_threads)
+                fse.explore()
+                container = fse.get_dfs().get_container().dump()
+                results.append(_get_layout_stats([container], 3))
+
+                # the same objects in the opposite order
+                reverse = dict(container)
+                reverse["objects"] = container["objects"][::-1]
+                results.append(_get_layout_stats([reverse], 3))
+
+                # the same layout through a yaml file
+                yaml_str = yaml.safe_dump({"containers": [container]})
+                containers = yaml.safe_load(yaml_str)["containers"]
+                results.append(_get_layout_stats(containers, 3))
+
+                # and streamed to a layout file while exploring
+                file_name = os.path.join(temp_path, "fs.jsonl")
+                writer = LayoutWriter(file_name, 3)
+                writer.add_container({"count": 1, "csum_size": 0,
+                                      "csum_gran": 16384})
+                fse = FileSystemExplorer(self.root_dir)
+                fse.set_dfs_inode(akey)
+                fse.set_num_threads(num_threads)
+                fse.set_object_sink(writer.add_object)
+                fse.explore()
+                writer.close()
+
+                overheads = MetaOverhead(None, 3, _create_meta())
+                for record in read_layout(file_name):
+                    if "container" in record:
+                        overheads.add_container(record["container"])
+                    elif "object" in record:
+                        overheads.load_object(record["object"])
+                results.append(overheads.get_stats().stats)
+        finally:
+            shutil.rmtree(temp_path)
+
+        for stats in results[1:]:
+            assert stats == results[0]
+
+    def test_sink_error(self):
+        akey = self._create_inode_akey("DFS_INODE", 64)
+
+        def sink(payload):
+            raise IOError("No space left on device")
+
+        for num_threads in [1, 4]:
+            fse = FileSystemExplorer(self.root_dir)
+            fse.set_dfs_inode(akey)
+            fse.set_num_threads(num_threads)
+            fse.set_object_sink(sink)
+            with pytest.raises(IOError) as err:
+                fse.explore()
+            assert "No space left on device" in str(err.value)
+
+    def test_identical_files(self):
+        dfs = DFS()
+        oid = dfs.add_obj()
+        dfs.add_dir(oid, "dir")
+        for name in ["file1", "file2", "file3"]:
+            dfs.add_file(oid, name, 4096)
+        dfs.add_file(oid, "file4", 2621440)
+
+        container = dfs.get_container().dump()
+        counts = [obj["count"] for obj in container["objects"]]
+        assert counts == [1, 3, 1]
+
+        got = self._process_stats(container)
+        assert got["objects"] == 3
+        assert got["dkeys"] == 5 + 2 + 4
+
+
+class MetaOverheadTestCase(unittest.TestCase):
+    def _get_stats(self, num_pools, seed=None):
+        current_dir = os.path.dirname(__file__)
+        test_file = os.path.join(current_dir, "test_data.yaml")
+        reference = yaml.safe_load(open(test_file, "r"))
+
+        overheads = MetaOverhead(None, num_pools, _create_meta())
+        if seed is not None:
+            overheads.set_seed(seed)
+        for container in reference.get("containers"):
+            overheads.load_container(container)
+
+        return overheads.get_stats().stats
+
+    def test_seed(self):
+        want = self._get_stats(16)
+        assert want == self._get_stats(16)
+        assert want == self._get_stats(16, 0)
+        assert self._get_stats(16, 5) == self._get_stats(16, 5)
+
+        # A single pool receives everything, whatever the placement
+        assert self._get_stats(1, 1) == self._get_stats(1, 2)
+
+    def test_layout_stream(self):
+        current_dir = os.path.dirname(__file__)
+        test_file = os.path.join(current_dir, "test_data.yaml")
+        reference = yaml.safe_load(open(test_file, "r"))
+
+        temp_path = tempfile.mkdtemp()
+        try:
+            file_name = os.path.join(temp_path, "test_data.jsonl")
+            writer = LayoutWriter(file_name, 16)
+            for container in reference.get("containers"):
+                writer.add_container(container)
+            writer.close()
+            records = list(read_layout(file_name))
+        finally:
+            shutil.rmtree(temp_path)
+
+        assert records[0] == {"num_shards": 16}
+        assert records[1]["container"]["csum_gran"] == 16384
+        assert "objects" not in records[1]["container"]
+
+        overheads = MetaOverhead(None, 16, _create_meta())
+        for record in records[1:]:
+            if "container" in record:
+                overheads.add_container(record["container"])
+            else:
+                overheads.load_object(record["object"])
+
+        assert overheads.get_stats().stats == self._get_stats(16)
+
+        with pytest.raises(RuntimeError) as err:
+            overheads = MetaOverhead(None, 16, _create_meta())
+            overheads.load_object(records[2]["object"])
+        assert "No container for object spec" in str(err.value)
+
+    def test_layout_truncated(self):
+        temp_path = tempfile.mkdtemp()
+        try:
+            file_name = os.path.join(temp_path, "test_data.jsonl")
+            writer = LayoutWriter(file_name, 4)
+            writer.add_container({"count": 1, "objects": [{"count": 1}] * 3})
+            writer.close()
+            with open(file_name, "r") as f:
+                lines = f.readlines()
+            assert lines[-1] == '{"end":true,"objects":3}\n'
+
+            # a file cut short loses its end record, or some objects
+            for end, message in [(len(lines) - 1, "no end record"),
+                                 (len(lines) - 2, "no end record"),
+                                 (0, "is empty")]:
+                with open(file_name, "w") as f:
+                    f.writelines(lines[:end])
+                with pytest.raises(Exception) as err:
+                    list(read_layout(file_name))
+                assert message in str(err.value)
+
+            with open(file_name, "w") as f:
+                f.writelines(lines[:2] + lines[3:])
+            with pytest.raises(Exception) as err:
+                list(read_layout(file_name))
+            assert "has 2 objects, 3 expected" in str(err.value)
+
+            # an aborted layout is not complete either
+            writer = LayoutWriter(file_name, 4)
+            writer.add_container({"count": 1, "objects": [{"count": 1}]})
+            writer.abort()
+            with pytest.raises(Exception) as err:
+                list(read_layout(file_name))
+            assert "no end record" in str(err.value)
+        finally:
+            shutil.rmtree(temp_path)
+
+    def test_split_windows(self):
+        overheads = MetaOverhead(None, 10, {})
+
+        got = overheads.split_windows(2, [])
+        assert got == [(0, 10, 2)]
+
+        got = overheads.split_windows(0, [(3, 4)])
+        assert got == [(0, 3, 0), (3, 7, 1), (7, 10, 0)]
+
+        got = overheads.split_windows(1, [(8, 4), (0, 1)])
+        assert got == [(0, 1, 3), (1, 2, 2), (2, 8, 1), (8, 10, 2)]
+
+    def test_identical_objects(self):
+        value = {"count": 1, "size": 64}
+        akey = {"count": 1, "type": "hashed", "size": 4,
+                "value_type": "single_value", "values": [value]}
+        dkey = {"count": 1, "type": "hashed", "size": 8, "akeys": [akey]}
+        obj = {"count": 1, "dkeys": [dkey]}
+        many = dict(obj, count=400)
+
+        def get_counts(objects):
+            overheads = MetaOverhead(None, 4, _create_meta())
+            overheads.add_container({"count": 1})
+            for obj_spec in objects:
+                overheads.load_object(obj_spec)
+            counts = overheads.containers[0]["counts"]
+            return [sum(counts[:idx + 1]) for idx in range(0, 4)]
+
+        # Identical objects are not all placed on the same pool
+        counts = get_counts([obj] * 400)
+        assert sum(counts) == 400
+        assert min(counts) > 50
+
+        # and neither are the objects of a spec with a count
+        assert get_counts([many]) == [100, 100, 100, 100]
+        assert get_counts([dict(obj, count=6)]) in \
+            [[2, 2, 1, 1], [1, 2, 2, 1], [1, 1, 2, 2], [2, 1, 1, 2]]
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -24,12 +24,96 @@
 from __future__ import print_function
 
 import os
+import json
 import yaml
 
 from storage_estimator.dfs_sb import VOS_SIZE, get_dfs_sb_obj
 from storage_estimator.vos_size import MetaOverhead
 from storage_estimator.vos_structures import Containers
 
+LAYOUT_SUFFIX = '.jsonl'
+
+
+class LayoutWriter(object):
+    """Write a layout as JSON lines
+
+    The first line holds the number of shards, then every line holds either
+    a container, without its objects, or an object of the last container.
+    The last line holds the number of objects written, so that a truncated
+    file is detected by read_layout().
+    """
+
+    def __init__(self, file_name, num_shards):
+        self._file = open(file_name, 'w')
+        self._objects = 0
+        self._write({'num_shards': num_shards})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':')))
+        self._file.write('\n')
+
+    def add_container(self, container):
+        attributes = dict(
+            (key, value) for key, value in container.items()
+            if key != 'objects')
+        self._write({'container': attributes})
+
+        for vos_object in container.get('objects', []):
+            self.add_object(vos_object)
+
+    def add_object(self, vos_object):
+        self._write({'object': vos_object})
+        self._objects += 1
+
+    def close(self):
+        """Write the end of the layout and close the file"""
+        self._write({'end': True, 'objects': self._objects})
+        self._file.close()
+
+    def abort(self):
+        """Close the file without ending the layout"""
+        self._file.close()
+
+
+def read_layout(file_name):
+    """Iterate over the records of a layout written by LayoutWriter
+
+    The number of shards comes first. The end record is checked against the
+    objects read but not returned, an exception is raised if it is missing.
+    """
+    objects = 0
+    first = True
+    end = None
+    with open(file_name, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if first and 'num_shards' not in record:
+                raise Exception(
+                    'No number of shards in {0}'.format(file_name))
+            if end is not None:
+                raise Exception(
+                    'Layout record after the end of {0}'.format(file_name))
+            first = False
+            if 'end' in record:
+                end = record
+                continue
+            if 'object' in record:
+                objects += 1
+            yield record
+
+    if first:
+        raise Exception('Layout {0} is empty'.format(file_name))
+    if end is None:
+        raise Exception(
+            'Layout {0} is truncated, no end record'.format(file_name))
+    if end.get('objects') != objects:
+        raise Exception(
+            'Layout {0} has {1} objects, {2} expected'.format(
+                file_name, objects, end.get('objects')))
+
 
 class CommonBase(object):
     def __init__(self):
@@ -238,6 +322,30 @@ class ProcessBase(CommonBase):
 
         return data
 
+    def _is_layout_stream(self, file_name):
+        return file_name.endswith(LAYOUT_SUFFIX)
+
+    def _create_layout_file(self, file_name, config_yaml):
+        self._print_destination_file(file_name)
+        try:
+            writer = LayoutWriter(
+                file_name, config_yaml.get('num_shards', 1))
+            for container in config_yaml.get('containers', []):
+                writer.add_container(container)
+            writer.close()
+
+        except OSError as err:
+            raise Exception(
+                'Failed to open file {0} {1}'.format(
+                    file_name, err))
+
+    def _create_output(self, file_name, config_yaml):
+        if file_name and self._is_layout_stream(file_name):
+            self._create_layout_file(file_name, config_yaml)
+        else:
+            yaml_str = self._dump_yaml(config_yaml)
+            self._create_file(file_name, yaml_str)
+
     def _create_file(self, file_name, buf):
         try:
             if not file_name:
@@ -255,13 +363,52 @@ class ProcessBase(CommonBase):
                 'Failed to open file {0} {1}'.format(
                     file_name, err))
 
-    def _process_yaml(self, config_yaml):
-        num_shards = config_yaml.get('num_shards', 1)
+    def _create_overheads(self, num_shards):
         self._debug('using {0} vos pools'.format(num_shards))
 
         overheads = MetaOverhead(self._args, num_shards, self._meta)
 
         overheads.set_scm_cutoff(self._scm_cutoff)
+        if 'seed' in self._args:
+            self._debug('using placement seed {0}'.format(self._args.seed))
+            overheads.set_seed(self._args.seed)
+
+        return overheads
+
+    def _process_layout(self, file_name):
+        self._debug('loading layout file {0}'.format(file_name))
+        try:
+            records = read_layout(file_name)
+            first = next(records)
+            overheads = self._create_overheads(first['num_shards'])
+
+            self._debug('working...')
+            for record in records:
+                self._process_record(overheads, record)
+
+        except (OSError, IOError) as err:
+            raise Exception(
+                'Failed to open file {0} {1}'.format(
+                    file_name, err))
+
+        if not overheads.containers:
+            raise Exception(
+                'No container in {0}. Nothing to do'.format(file_name))
+
+        self._debug('')
+        overheads.print_report()
+
+    def _process_record(self, overheads, record):
+        if 'object' in record:
+            overheads.load_object(record['object'])
+        elif 'container' in record:
+            overheads.add_container(record['container'])
+        else:
+            raise Exception('Unknown layout record {0}'.format(record))
+
+    def _process_yaml(self, config_yaml):
+        num_shards = config_yaml.get('num_shards', 1)
+        overheads = self._create_overheads(num_shards)
 
         if 'containers' not in config_yaml:
             raise Exception(
@@ -24,7 +24,8 @@
 from __future__ import print_function
 from __future__ import division
 import yaml
-import random
+import hashlib
+import json
 import math
 
 
@@ -100,7 +101,7 @@ class Stats(object):
     def merge(self, child):
         """add child stats to this object"""
         for key in self.stats:
-            self.stats[key] += child.get(key)
+            self.stats[key] += child.stats[key]
 
     def get(self, key):
         """get a stat"""
@@ -145,35 +146,63 @@ class MetaOverhead(object):
         self.args = args
         self.meta = meta_yaml
         self.num_pools = num_pools
-        self.pools = []
-        for _index in range(0, self.num_pools):
-            self.pools.append({"trees": [], "dup": 1, "key": "container",
-                               "count": 0})
+        self.containers = []
+        self.pool_count = 0
+        self.csum_size = 0
         self.next_cont = 1
         self.next_object = 1
+        self._seed = 0
+        self._occurrences = {}
         self._scm_cutoff = meta_yaml.get("scm_cutoff", 4096)
         csummers = meta_yaml.get("csummers", {})
 
     def set_scm_cutoff(self, scm_cutoff):
         self._scm_cutoff = scm_cutoff
 
+    def set_seed(self, seed):
+        """Set the seed of the placement of the objects over the pools"""
+        self._seed = seed
+
+    def get_start_pool(self, obj_spec):
+        """Pick the pool holding the first dkeys of an object
+
+        The pool depends on the seed, on the object itself and on how many
+        identical objects came before it in the container.  Identical
+        objects are spread over the pools, and as they cannot be told apart
+        the estimate does not depend on the order of the objects in the
+        layout.
+        """
+        key = json.dumps(obj_spec, sort_keys=True, separators=(",", ":"))
+        occurrence = self._occurrences.get(key, 0)
+        self._occurrences[key] = occurrence + 1
+        digest = hashlib.md5("{0}:{1}:{2}".format(
+            self._seed, occurrence, key).encode("utf-8")).hexdigest()
+        return int(digest[:16], 16) % self.num_pools
+
     def init_container(self, cont_spec):
         """Handle a container specification"""
         if "objects" not in cont_spec:
             raise RuntimeError("No objects in container spec %s" % cont_spec)
 
-        for pool in self.pools:
-            pool["count"] += int(cont_spec.get("count", 1))
-            cont = {"dup": int(cont_spec.get("count", 1)), "key": "object",
-                    "count": 0,
-                    "csum_size": int(cont_spec.get("csum_size", 0)),
-                    "csum_gran": int(cont_spec.get("csum_gran", 1048576)),
-                    "trees": []}
-            pool["trees"].append(cont)
+        self.add_container(cont_spec)
 
         for obj_spec in cont_spec.get("objects"):
             self.init_object(obj_spec)
 
+    def add_container(self, cont_spec):
+        """Start a container, whose objects are loaded separately"""
+        # Every pool holds a copy of the container. Rather than keeping a
+        # tree per pool, keep the number of objects each pool receives, as
+        # a difference array, and the stats of everything below them.
+        self.pool_count += int(cont_spec.get("count", 1))
+        cont = {"dup": int(cont_spec.get("count", 1)),
+                "csum_size": int(cont_spec.get("csum_size", 0)),
+                "csum_gran": int(cont_spec.get("csum_gran", 1048576)),
+                "counts": [0] * (self.num_pools + 1),
+                "stats": Stats()}
+        self.containers.append(cont)
+        self._occurrences = {}
+
     def init_object(self, obj_spec):
         """Handle an object specification"""
         if "dkeys" not in obj_spec:
@@ -186,40 +215,103 @@ class MetaOverhead(object):
 
     def init_dkeys(self, oid, obj_spec):
         """Handle akey specification"""
-        pool_idx = random.randint(0, self.num_pools - 1)
+        pool_idx = self.get_start_pool(obj_spec)
+        cont = self.containers[-1]
+        self.csum_size = cont["csum_size"]
+        obj_stats = Stats()
+        full_total = 0
+        windows = []
 
         for dkey_spec in obj_spec.get("dkeys"):
             if "akeys" not in dkey_spec:
                 raise RuntimeError("No akeys in dkey spec %s" % dkey_spec)
             check_key_type(dkey_spec)
             dkey_count = int(dkey_spec.get("count", 1))
-            num_pools = self.num_pools
-            full_count = dkey_count // num_pools
-            partial_count = dkey_count % num_pools
+            if dkey_count == 0:
+                continue
+
+            # The dkeys are spread round robin from pool_idx, so every pool
+            # gets full_count of them and partial_count pools one more.
+            # The subtree of a dkey is the same in every pool, so it is
+            # only calculated once.
+            full_count = dkey_count // self.num_pools
+            partial_count = dkey_count % self.num_pools
+            full_total += full_count
+            if partial_count:
+                windows.append((pool_idx, partial_count))
             if full_count == 0:
-                num_pools = partial_count
-
-            for idx in range(0, num_pools):
-                pool = self.pools[pool_idx]
-                pool_idx = (pool_idx + 1) % self.num_pools
-                cont = pool["trees"][-1]
-                if cont["trees"] == [] or cont["trees"][-1]["oid"] != oid:
-                    obj = {"dup": int(obj_spec.get("count", 1)), "key": "dkey",
-                           "count": 0, "trees": [], "oid": oid}
-                    cont["trees"].append(obj)
-                    cont["count"] += int(obj_spec.get("count", 1))
-                dup = full_count
-                if partial_count > idx:
-                    dup += 1
-                obj = cont["trees"][-1]
-                dkey = {"dup": dup, "key": "akey", "count": 0, "trees": [],
-                        "type": dkey_spec.get("type", "hashed"),
-                        "size": int(dkey_spec.get("size", 0)),
-                        "overhead": dkey_spec.get("overhead", "user")}
-                obj["trees"].append(dkey)
-                obj["count"] += dup
-                for akey_spec in dkey_spec.get("akeys"):
-                    self.init_akey(cont, dkey, akey_spec)
+                pool_idx = (pool_idx + partial_count) % self.num_pools
+
+            dkey = {"dup": 1, "key": "akey", "count": 0, "trees": [],
+                    "type": dkey_spec.get("type", "hashed"),
+                    "size": int(dkey_spec.get("size", 0)),
+                    "overhead": dkey_spec.get("overhead", "user")}
+            for akey_spec in dkey_spec.get("akeys"):
+                self.init_akey(cont, dkey, akey_spec)
+
+            dkey_stats = Stats()
+            self.calc_tree(dkey_stats, dkey)
+            dkey_stats.mult(dkey_count)
+            obj_stats.merge(dkey_stats)
+
+        # The objects of the spec start on successive pools from pool_idx,
+        # so each one holds the same trees shifted by its offset.
+        obj_count = int(obj_spec.get("count", 1))
+        full_count, partial_count = divmod(obj_count, self.num_pools)
+        shifts = [(shift, full_count + int(shift < partial_count))
+                  for shift in range(0, min(obj_count, self.num_pools))]
+        for start, end, dkeys in self.split_windows(full_total, windows):
+            if dkeys == 0:
+                continue
+            # Every pool with dkeys of the object holds an object tree
+            node_stats = Stats()
+            self.calc_node(node_stats, {"key": "dkey", "count": dkeys})
+            node_stats.mult(end - start)
+            obj_stats.merge(node_stats)
+            for shift, count in shifts:
+                self.add_objects(cont, start + shift, end + shift, count)
+
+        obj_stats.mult(obj_count)
+        cont["stats"].merge(obj_stats)
+
+    def add_objects(self, cont, start, end, count):
+        """Add count objects to the pools from start to end, wrapping around"""
+        if start >= self.num_pools:
+            start -= self.num_pools
+            end -= self.num_pools
+        if end > self.num_pools:
+            cont["counts"][0] += count
+            cont["counts"][end - self.num_pools] -= count
+            end = self.num_pools
+        cont["counts"][start] += count
+        cont["counts"][end] -= count
+
+    def split_windows(self, base, windows):
+        """Split the pools in ranges receiving the same number of items
+
+        windows is a list of (pool_idx, count) wrapping around the pools,
+        each adding one item to count pools on top of base. Returns a list
+        of (start, end, items) covering all the pools.
+        """
+        events = {0: 0, self.num_pools: 0}
+        for pool_idx, count in windows:
+            end = pool_idx + count
+            events[pool_idx] = events.get(pool_idx, 0) + 1
+            if end > self.num_pools:
+                events[0] += 1
+                end -= self.num_pools
+                events[end] = events.get(end, 0) - 1
+                events[self.num_pools] -= 1
+            else:
+                events[end] = events.get(end, 0) - 1
+
+        ranges = []
+        items = base
+        points = sorted(events)
+        for idx in range(0, len(points) - 1):
+            items += events[points[idx]]
+            ranges.append((points[idx], points[idx + 1], items))
+        return ranges
 
     def init_akey(self, cont, dkey, akey_spec):
         """Handle akey specification"""
@@ -272,11 +364,15 @@ class MetaOverhead(object):
         """calculate metadata for update(s)"""
         self.init_container(cont_spec)
 
+    def load_object(self, obj_spec):
+        """calculate metadata of an object of the last container"""
+        if not self.containers:
+            raise RuntimeError("No container for object spec %s" % obj_spec)
+        self.init_object(obj_spec)
+
     def calc_subtrees(self, stats, parent):
         """Calculate for subtrees"""
         for tree in parent["trees"]:
-            if parent["key"] == "container":
-                self.csum_size = tree["csum_size"]
             self.calc_tree(stats, tree)
 
     def get_dynamic(self, key, num_values):
@@ -300,9 +396,8 @@ class MetaOverhead(object):
                 return item["size"], item["size"], 1
         raise "Bug parsing dynamic tree order information!!!"
 
-    def calc_tree(self, stats, tree):
-        """calculate the totals"""
-        tree_stats = Stats()
+    def calc_node(self, stats, tree):
+        """calculate the totals of a tree, without its subtrees"""
         key = tree["key"]
         num_values = tree["count"]
         record_size = self.meta["trees"][key]["record_msize"]
@@ -317,26 +412,65 @@ class MetaOverhead(object):
         if key == "akey" or key == "single_value" or key == "array":
             # key refers to child tree
             if tree["overhead"] == "user":
-                tree_stats.add_user_meta(num_values * tree["size"])
+                stats.add_user_meta(num_values * tree["size"])
             else:
-                tree_stats.add_meta(key, num_values * tree["size"])
+                stats.add_meta(key, num_values * tree["size"])
             overhead += self.csum_size * num_values
-        tree_stats.add_meta(key, overhead)
+        stats.add_meta(key, overhead)
         if key == "array" or key == "single_value":
-            tree_stats.add_user_value(tree)
-            tree_stats.add_meta(key, tree["meta_size"])
+            stats.add_user_value(tree)
+            stats.add_meta(key, tree["meta_size"])
+
+    def calc_tree(self, stats, tree):
+        """calculate the totals"""
+        tree_stats = Stats()
+        self.calc_node(tree_stats, tree)
+        if tree["key"] == "array" or tree["key"] == "single_value":
             stats.merge(tree_stats)
             return
         self.calc_subtrees(tree_stats, tree)
         tree_stats.mult(tree["dup"])
         stats.merge(tree_stats)
 
-    def print_report(self):
-        """Calculate and pretty print a report"""
+    def calc_container(self, stats, cont):
+        """calculate the totals of a container over all the pools"""
+        cont_stats = Stats()
+        cont_stats.merge(cont["stats"])
+
+        pools = {}
+        num_objects = 0
+        for pool_idx in range(0, self.num_pools):
+            num_objects += cont["counts"][pool_idx]
+            pools[num_objects] = pools.get(num_objects, 0) + 1
+
+        for num_objects, num_pools in pools.items():
+            node_stats = Stats()
+            self.calc_node(node_stats, {"key": "object",
+                                        "count": num_objects})
+            node_stats.mult(num_pools)
+            cont_stats.merge(node_stats)
+
+        cont_stats.mult(cont["dup"])
+        stats.merge(cont_stats)
+
+    def get_stats(self):
+        """Calculate the totals of all the pools"""
         stats = Stats()
 
-        for pool in range(0, self.num_pools):
-            stats.add_meta("pool", int(self.meta.get("root")))
-            self.calc_tree(stats, self.pools[pool])
+        # Every pool holds the same containers
+        pool_stats = Stats()
+        pool_stats.add_meta("pool", int(self.meta.get("root")))
+        self.calc_node(pool_stats, {"key": "container",
+                                    "count": self.pool_count})
+        pool_stats.mult(self.num_pools)
+        stats.merge(pool_stats)
 
+        for cont in self.containers:
+            self.calc_container(stats, cont)
+
+        return stats
+
+    def print_report(self):
+        """Calculate and pretty print a report"""
+        stats = self.get_stats()
         stats.pretty_print()
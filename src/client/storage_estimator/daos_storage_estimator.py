@@ -4,10 +4,10 @@ from __future__ import print_function
 import argparse
 import sys
 
-from storage_estimator.dfs_sb import get_dfs_example, print_daos_version, get_dfs_inode_akey
+from storage_estimator.dfs_sb import get_dfs_example, print_daos_version, get_dfs_inode_akey, get_dfs_sb_obj
 from storage_estimator.parse_csv import ProcessCSV
 from storage_estimator.explorer import FileSystemExplorer
-from storage_estimator.util import ProcessBase
+from storage_estimator.util import ProcessBase, LayoutWriter
 
 tool_description = '''DAOS estimation tool
 This CLI is able to estimate the SCM/NVMe ratios
@@ -41,19 +41,45 @@ class ProcessFS(ProcessBase):
         super(ProcessFS, self).__init__(args)
 
     def run(self):
+        if args.output and self._is_layout_stream(args.output) \
+                and not args.average:
+            self._run_stream()
+            return
+
         fse = self._get_estimate_from_fs()
         config_yaml = self._get_yaml_from_dfs(fse, args.average)
-        yaml_str = self._dump_yaml(config_yaml)
-        self._create_file(args.output, yaml_str)
+        self._create_output(args.output, config_yaml)
         self._process_yaml(config_yaml)
 
-    def _get_estimate_from_fs(self):
+    def _run_stream(self):
+        # Write the objects as the directories are read, then estimate from
+        # the file, so that memory does not grow with the tree.
+        self._print_destination_file(args.output)
+        writer = LayoutWriter(args.output, args.num_shards)
+        try:
+            writer.add_container({
+                'count': 1,
+                'csum_size': self._csum_size,
+                'csum_gran': self._chunk_size})
+            writer.add_object(get_dfs_sb_obj().dump())
+            self._get_estimate_from_fs(writer.add_object)
+        except BaseException:
+            # Leave the layout without an end, it cannot be estimated
+            writer.abort()
+            raise
+        writer.close()
+
+        self._process_layout(args.output)
+
+    def _get_estimate_from_fs(self, sink=None):
         inode_akey = get_dfs_inode_akey()
         fse = FileSystemExplorer(args.path[0])
         fse.set_verbose(args.verbose)
         fse.set_io_size(self.get_io_size())
         fse.set_chunk_size(self.get_chunk_size())
         fse.set_dfs_inode(inode_akey)
+        fse.set_num_threads(args.threads)
+        fse.set_object_sink(sink)
         fse.explore()
         fse.print_stats()
 
@@ -76,6 +102,10 @@ class ProcessYAML(ProcessBase):
         super(ProcessYAML, self).__init__(args)
 
     def run(self):
+        if self._is_layout_stream(args.config[0]):
+            self._process_layout(args.config[0])
+            return
+
         config_yaml = self._load_yaml_from_file(args.config[0])
         self._process_yaml(config_yaml)
 
@@ -200,8 +230,19 @@ explore.add_argument(
     '--output',
     dest='output',
     type=str,
-    help='Output file name',
+    help='Output file name, either .yaml or a .jsonl layout file',
     default='')
+explore.add_argument(
+    '-t',
+    '--threads',
+    type=int,
+    help='Number of threads used to walk the directory tree',
+    default=8)
+explore.add_argument(
+    '--seed',
+    type=int,
+    help='Seed of the placement of the objects over the VOS pools',
+    default=0)
 
 explore.set_defaults(func=process_fs)
 
@@ -214,7 +255,8 @@ yaml_file.add_argument(
     action='store_true',
     help='Explain what is being done')
 yaml_file.add_argument('config', metavar='CONFIG', type=str, nargs=1,
-                       help='Path to the input yaml configuration file')
+                       help='Path to the input yaml configuration file, '
+                       'or to a .jsonl layout file')
 yaml_file.add_argument('-a', '--alloc_overhead', type=int,
                        help='Vos alloc overhead', default=16)
 yaml_file.add_argument(
@@ -235,6 +277,11 @@ yaml_file.add_argument(
     metavar='META',
     help='[optional] Input metadata file',
     default='')
+yaml_file.add_argument(
+    '--seed',
+    type=int,
+    help='Seed of the placement of the objects over the VOS pools',
+    default=0)
 yaml_file.set_defaults(func=process_yaml)
 
 # parse a csv file
@@ -299,8 +346,13 @@ csv_file.add_argument(
     '-o', '--output',
     dest='output',
     type=str,
-    help='Output file name',
+    help='Output file name, either .yaml or a .jsonl layout file',
     default='')
+csv_file.add_argument(
+    '--seed',
+    type=int,
+    help='Seed of the placement of the objects over the VOS pools',
+    default=0)
 csv_file.set_defaults(func=process_csv)
 
 # parse the args and call whatever function was selected
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# Copyright (C) 2020 Intel Corporation
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted for any purpose (including commercial purposes)
+# provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice,
+#    this list of conditions, and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions, and the following disclaimer in the
+#    documentation and/or materials provided with the distribution.
+#
+# 3. In addition, redistributions of modified forms of the source or binary
+#    code must carry prominent notices stating that the original code was
+#    changed and the date of the change.
+#
+#  4. All publications or advertising materials mentioning features or use of
+#     this software are asked, but not required, to acknowledge that it was
+#     developed by Intel Corporation and credit the contributors.
+#
+# 5. Neither the name of Intel Corporation, nor the name of any Contributor
+#    may be used to endorse or promote products derived from this software
+#    without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF
+# THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Benchmarks for the CaRT log parsing code.
+
+Run against an existing log file, or against a generated log containing a
+representative mix of descriptor, RPC, memory and plain log lines.
+"""
+
+import os
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+import cart_logparse
+
+# pylint: disable=line-too-long
+TEMPLATES = [('fi', 'DBUG', "src/cart/crt_context.c:{lineno} crt_context_create({ptr}) Registered new 'crt_context' from {parent}"),
+             ('fi', 'DBUG', 'src/cart/crt_context.c:{lineno} crt_context_destroy({ptr}) Deregistered'),
+             ('rpc', 'DBUG', 'src/cart/crt_rpc.c:{lineno} crt_rpc_priv_alloc({ptr}) [opc=0x{opc:x} rpcid=0x{rpcid:x} rank:tag=0:0] allocated.'),
+             ('rpc', 'DBUG', 'src/cart/crt_rpc.c:{lineno} crt_req_send({ptr}) [opc=0x{opc:x} rpcid=0x{rpcid:x} rank:tag=0:0] submitted.'),
+             ('hg', 'DBUG', 'src/cart/crt_hg.c:{lineno} crt_hg_req_destroy({ptr}) [opc=0x{opc:x} rpcid=0x{rpcid:x} rank:tag=0:0] destroying'),
+             ('mem', 'DBUG', "src/object/cli_obj.c:{lineno} obj_req_create() alloc(7) 'obj_auxi': 376 at {ptr}."),
+             ('mem', 'DBUG', "src/object/cli_obj.c:{lineno} obj_req_fini() free 'obj_auxi' at {ptr}."),
+             ('object', 'DBUG', 'src/object/cli_obj.c:{lineno} obj_shard_open() {uuid}: open shard {shard} of {oid} pid={pid}'),
+             ('pool', 'INFO', 'src/pool/cli.c:{lineno} dc_pool_connect() {uuid}[0]: connecting: hdl={ptr} flags=2'),
+             ('vos', 'ERR', 'src/vos/vos_io.c:{lineno} akey_fetch() Failed to fetch {region}: DER_NONEXIST(-1005)')]
+# pylint: enable=line-too-long
+
+def make_log(fname, lines, pids):
+    """Write a generated log file with lines split across a number of pids"""
+    rand = random.Random(1)
+    with open(fname, 'w') as fd:
+        for idx in range(lines):
+            (fac, level, template) = rand.choice(TEMPLATES)
+            pid = 1000 + rand.randrange(pids)
+            ptr = '0x{:x}'.format(rand.randrange(0x1000000, 0x7fffffff))
+            msg = template.format(lineno=rand.randrange(1, 3000),
+                                  ptr=ptr,
+                                  parent=ptr,
+                                  opc=rand.randrange(0x1000000, 0x1000020),
+                                  rpcid=rand.randrange(1 << 48),
+                                  uuid='{:08x}'.format(rand.randrange(1 << 32)),
+                                  shard=rand.randrange(64),
+                                  oid='{}.{}.0'.format(idx, rand.randrange(9)),
+                                  pid=pid,
+                                  region='0x0-0x{:x}'.format(rand.randrange(1 << 20)))
+            fd.write('{:02d}/{:02d}-{:02d}:{:02d}:{:02d}.{:02d} node-{} '
+                     'DAOS[{}/{}] {:<4} {:<4} {}\n'.format(
+                         1 + idx % 12, 1 + idx % 28, idx % 24, idx % 60,
+                         idx % 60, idx % 100, pid % 4, pid, pid + 1, fac,
+                         level, msg))
+
+def bench_load(fname, use_mmap=False):
+    """Time loading, and then decoding every line of a file
+
+    The decoded lines are kept, so the memory reported for decoding is that
+    of holding every line after use.  Memory use is measured on a second
+    load, as tracing allocations affects the timings.  The pages of a mapped
+    file are not traced, so no memory is reported for loading with use_mmap.
+
+    Files are loaded without an index, so that every load scans the file
+    and no index file is left next to it.
+    """
+
+    start = time.perf_counter()
+    log_iter = cart_logparse.LogIter(fname, use_index=False, use_mmap=use_mmap)
+    load_time = time.perf_counter() - start
+
+    lines = []
+    start = time.perf_counter()
+    for line in log_iter.new_iter():
+        line.get_msg()
+        lines.append(line)
+    decode_time = time.perf_counter() - start
+    count = len(lines)
+    lines = None
+    log_iter = None
+
+    tracemalloc.start()
+    log_iter = cart_logparse.LogIter(fname, use_index=False, use_mmap=use_mmap)
+    (load_mem, _) = tracemalloc.get_traced_memory()
+    lines = []
+    for line in log_iter.new_iter():
+        line.get_msg()
+        lines.append(line)
+    (decode_mem, _) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print('Lines:  {}'.format(count))
+    if use_mmap:
+        print('Load:   {:.2f} seconds, {:.2f} us/line, mapped'.format(
+            load_time, load_time * 1000000 / count))
+    else:
+        print('Load:   {:.2f} seconds, {:.2f} us/line, '
+              '{:.0f} bytes/line'.format(load_time, load_time * 1000000 / count,
+                                         load_mem / count))
+    print('Decode: {:.2f} seconds, {:.2f} us/line, {:.0f} bytes/line'.format(
+        decode_time, decode_time * 1000000 / count, decode_mem / count))
+
+class _EagerLine():
+    """Reference log line, decoding every field on creation
+
+    This is how LogLine decoded lines before it was made lazy, and is used
+    as the baseline for it.
+    """
+
+    # pylint: disable=too-few-public-methods,too-many-instance-attributes
+
+    def __init__(self, line):
+        fields = line.split()
+        idx = 29 + len(fields[1]) + len(fields[2])
+        pid = fields[2][5:-1].split("/")
+        self.pid = int(pid[0])
+        self._preamble = line[:idx]
+        self.fac = fields[3]
+        self.level = cart_logparse.LOG_LEVELS[fields[4]]
+        self.ts = fields[0]
+        self._fields = fields[5:]
+        self.function = None
+        self.descriptor = None
+        try:
+            if self._fields[1][-2:] == '()':
+                self.trace = False
+                self.function = self._fields[1][:-2]
+            else:
+                self.trace = self._fields[1][-1:] == ')'
+        except IndexError:
+            self.trace = False
+
+        if self.trace:
+            if self.level in (3, 7) and self.fac in ('rpc', 'hg'):
+                del self._fields[2:5]
+            fn_str = self._fields[1]
+            start_idx = fn_str.find('(')
+            self.function = fn_str[:start_idx]
+            desc = fn_str[start_idx+1:-1]
+            if desc == '(nil)':
+                self.descriptor = ''
+            else:
+                self.descriptor = desc
+        self._msg = ' '.join(self._fields)
+
+    def get_msg(self):
+        """Return the message part of the line"""
+        return ' '.join(self._fields[1:])
+
+def _parse_lines(cls, texts, decode):
+    """Create a line of type cls for each text, optionally decoding it"""
+    lines = []
+    for text in texts:
+        line = cls(text)
+        if decode:
+            line.get_msg()
+        lines.append(line)
+    return lines
+
+def bench_eager(fname):
+    """Compare LogLine against decoding every field up front
+
+    Each log line in the file is created as a LogLine, and as an _EagerLine,
+    both with and without then decoding the message.  The memory reported
+    is that used by the lines, in addition to the text they were created
+    from.
+    """
+
+    texts = []
+    with open(fname, 'r', encoding='utf-8', errors='replace') as fd:
+        for text in fd:
+            fields = text.split(' ', 5)
+            if len(fields) == 6 and len(fields[0]) == 17:
+                texts.append(text)
+    if not texts:
+        return
+
+    for decode in (False, True):
+        results = []
+        for cls in (_EagerLine, cart_logparse.LogLine):
+            start = time.perf_counter()
+            lines = _parse_lines(cls, texts, decode)
+            parse_time = time.perf_counter() - start
+            lines = None
+
+            tracemalloc.start()
+            lines = _parse_lines(cls, texts, decode)
+            (parse_mem, _) = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            lines = None
+            results.append((parse_time * 1000000 / len(texts),
+                            parse_mem / len(texts)))
+
+        ((eager_time, eager_mem), (lazy_time, lazy_mem)) = results
+        if decode:
+            label = 'Eager decoded:'
+        else:
+            label = 'Eager:'
+        print('{:<14} {:.2f} us/line, {:.0f} bytes/line, LogLine {:.2f} '
+              'us/line ({:.1f}x), {:.0f} bytes/line ({:.1f}x)'.format(
+                  label, eager_time, eager_mem, lazy_time,
+                  eager_time / lazy_time, lazy_mem, eager_mem / lazy_mem))
+
+def _sequential_anon(line):
+    """Reference get_anon_msg(), trying each expression in turn"""
+
+    fields = []
+    for entry in line._fields[2:]:
+        field = entry
+        for (regex, fmt) in ((line.re_region, '0x...-0x...'),
+                             (line.re_pointer, '0x...{}'),
+                             (line.re_pid, 'pid=<pid>'),
+                             (line.re_uuid, 'uuid{}'),
+                             (line.re_uuid_rank, 'uuid/rank{}'),
+                             (line.re_uiod, 'uoid.{}'),
+                             (line.re_rpcid, 'rpcid=<rpcid>')):
+            match = regex.fullmatch(entry)
+            if match:
+                field = fmt.format(*match.groups()[:1])
+                break
+        fields.append(field)
+    return '{}() {}'.format(line.function, ' '.join(fields))
+
+def bench_anon(fname):
+    """Time anonymising the message of every line of a file
+
+    Compares get_anon_msg() against trying each expression in turn.
+    """
+
+    log_iter = cart_logparse.LogIter(fname, use_index=False)
+    lines = list(log_iter.new_iter())
+    # Decode the lines up front so only the anonymising is timed.
+    for line in lines:
+        line.get_msg()
+
+    start = time.perf_counter()
+    expected = [_sequential_anon(line) for line in lines]
+    seq_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = [line.get_anon_msg() for line in lines]
+    anon_time = time.perf_counter() - start
+    if result != expected:
+        print('ERROR: get_anon_msg() does not match')
+        return
+
+    print('Anon:   {:.2f} us/line sequential, {:.2f} us/line ({:.1f}x)'.format(
+        seq_time * 1000000 / len(lines), anon_time * 1000000 / len(lines),
+        seq_time / anon_time))
+
+def run():
+    """Run the benchmarks"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=100000,
+                        help='Number of lines to generate')
+    parser.add_argument('--pids', type=int, default=4,
+                        help='Number of pids to generate')
+    parser.add_argument('--mmap', action='store_true',
+                        help='Read the file through a memory map')
+    parser.add_argument('file', nargs='?',
+                        help='Log file to use, rather than generating one')
+    args = parser.parse_args()
+
+    fname = args.file
+    if not fname:
+        tmp = tempfile.NamedTemporaryFile(prefix='cart_logbench_',
+                                          suffix='.log',
+                                          delete=False)
+        fname = tmp.name
+        tmp.close()
+        make_log(fname, args.lines, args.pids)
+
+    try:
+        bench_load(fname, use_mmap=args.mmap)
+        bench_eager(fname)
+        bench_anon(fname)
+    finally:
+        if not args.file:
+            os.unlink(fname)
+
+if __name__ == '__main__':
+    run()
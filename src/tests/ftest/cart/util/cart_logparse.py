@@ -45,7 +45,14 @@ This provides a way of querying CaRT logfiles for processing.
 from collections import OrderedDict
 import bz2
 import os
+import mmap
 import re
+import sys
+import json
+import bisect
+import argparse
+import tempfile
+import multiprocessing
 
 class InvalidPid(Exception):
     """Exception to be raised when invalid pid is requested"""
@@ -64,6 +71,26 @@ LOG_LEVELS = {'FATAL' :1,
               'INFO'  :7,
               'DBUG'  :8}
 
+# Suffix of the index files saved alongside large log files.
+INDEX_SUFFIX = '.cart_index'
+# Increase this when the format of the index file changes.
+INDEX_VERSION = 2
+# Interval, in lines, between file positions saved in the index.
+INDEX_STRIDE = 10000
+# Amount of uncompressed data in each independently compressed block.
+COMPRESS_BLOCK_SIZE = 1024*1024*4
+# Size of reads when following a log file.
+TAIL_READ_SIZE = 1024*1024
+
+# Replacement text for each group of LogLine.re_anon.
+ANON_FORMATS = {'region': '0x...-0x...',
+                'pointer': '0x...{}',
+                'pid': 'pid=<pid>',
+                'uuid': 'uuid{}',
+                'uuid_rank': 'uuid/rank{}',
+                'uiod': 'uoid.{}',
+                'rpcid': 'rpcid=<rpcid>'}
+
 # Make a reverse lookup from log level to name.
 LOG_NAMES = {}
 for name in LOG_LEVELS:
@@ -76,6 +103,10 @@ class LogRaw():
     This is used for lines that cannot be identified as cart log lines,
     for example mercury logs being sent to the same file.
     """
+
+    # rpc is set by StateIter.
+    __slots__ = ('line', 'trace', 'rpc')
+
     def __init__(self, line):
         self.line = line.rstrip('\n')
         self.trace = False
@@ -95,8 +126,21 @@ class LogLine():
 
     It allows for queries such as 'string in line' which will match against
     the message only, and != which will match the entire line.
+
+    To keep per-line memory and parse cost down only the raw line and the
+    preamble values are decoded up front.  The rest of the line is split the
+    first time the message or function name is used, and all decoded values
+    are cached.
+
+    index is the line number in the file, if known, which can be used to read
+    the line again with LogIter.get_lines().
     """
 
+    __slots__ = ('_line', 'pid', 'fac', 'level', 'trace', 'function',
+                 'descriptor', '_field_list', '_msg_str', '_preamble_str',
+                 'filename', 'lineno', 'parent', 'pdesc', 'pparent', 'rpc',
+                 'rpc_opcode', 'index')
+
     # Match an address range, a region in memory.
     re_region = re.compile(r"(0|0x[0-9a-f]{1,16})-(0x[0-9a-f]{1,16})")
     # Match a pointer, with optional ) . or , suffix.
@@ -113,82 +157,147 @@ class LogLine():
     # Match a RPCID from RPC_TRACE macro.
     re_rpcid = re.compile(r"rpcid=0x[0-9a-f]{1,16}")
 
-    def __init__(self, line):
-        fields = line.split()
-        # Work out the end of the fixed-width portion, and the beginning of the
-        # message.  The hostname and pid fields are both variable width
-        idx = 29 + len(fields[1]) + len(fields[2])
+    # Match any of the above in one pass, for get_anon_msg().  The first
+    # alternative which matches takes precedence, and the name of the last
+    # group says which one it was.
+    re_anon = re.compile(r"(?P<region>(?:0|0x[0-9a-f]{1,16})-0x[0-9a-f]{1,16})"
+                         r"|0x[0-9a-f]{1,16}(?P<pointer>[).,]?)"
+                         r"|(?P<pid>pid=\d+)"
+                         r"|[0-9a-f]{8}(?P<uuid>:?)"
+                         r"|[0-9,a-f]{8}\[\d+\](?P<uuid_rank>:?)"
+                         r"|\d{1,20}\.\d{1,20}.(?P<uiod>\d{1,10})"
+                         r"|(?P<rpcid>rpcid=0x[0-9a-f]{1,16})")
+
+    def __init__(self, line, index=None):
+        # Only split as far as the function name, the rest of the message is
+        # split on first use.
+        fields = line.split(None, 7)
+        self._line = line
+        self.index = index
+        self._field_list = None
+        self._msg_str = None
+        self._preamble_str = None
         pidtid = fields[2][5:-1]
         pid = pidtid.split("/")
         self.pid = int(pid[0])
-        self._preamble = line[:idx]
-        self.fac = fields[3]
+        self.fac = sys.intern(fields[3])
         try:
             self.level = LOG_LEVELS[fields[4]]
         except KeyError:
             raise InvalidLogFile(fields[4])
 
-        self.ts = fields[0]
-        self._fields = fields[5:]
+        # Trace lines have the descriptor in brackets after the function name,
+        # non-trace lines have empty brackets.
         try:
-            if self._fields[1][-2:] == '()':
-                self.trace = False
-                self.function = self._fields[1][:-2]
-            elif self._fields[1][-1:] == ')':
-                self.trace = True
-            else:
-                self.trace = False
+            fn_str = fields[6]
+            self.trace = fn_str[-1:] == ')' and fn_str[-2:] != '()'
         except IndexError:
             # Catch truncated log lines.
             self.trace = False
 
-        if self.trace:
-            if self.level == 7 or self.level == 3:
-                if self.fac == 'rpc' or self.fac == 'hg':
-                    del self._fields[2:5]
-
-        if self.trace:
-            fn_str = self._fields[1]
-            start_idx = fn_str.find('(')
-            self.function = fn_str[:start_idx]
-            desc = fn_str[start_idx+1:-1]
-            if desc == '(nil)':
-                self.descriptor = ''
-            else:
-                self.descriptor = desc
-        self._msg = ' '.join(self._fields)
-
-    def to_str(self, mark=False):
-        """Convert the object to a string"""
-        pre = self._preamble.split(' ', 3)
-        preamble = ' '.join([pre[0], pre[3]])
-        if mark:
-            return '{} ** {}'.format(preamble, self._msg)
-        return '{}    {}'.format(preamble, self._msg)
-
     def __getattr__(self, attr):
+        # Called for slots which have not been set yet, so decode and cache
+        # the value.
+        if attr in ('function', 'descriptor'):
+            # These are set when the line is split, if it has them.
+            if self._field_list is None:
+                self._split()
+                return getattr(self, attr)
         if attr == 'parent':
             if self._fields[2] == 'Registered':
                 # This is a bit of a hack but handle the case where descriptor
                 # names contain spaces.
                 if self._fields[6] == 'from':
-                    return self._fields[7]
-                return self._fields[6]
+                    self.parent = self._fields[7]
+                else:
+                    self.parent = self._fields[6]
+                return self.parent
             if self._fields[2] == 'Link':
-                return self._fields[5]
+                self.parent = self._fields[5]
+                return self.parent
         if attr == 'filename':
             try:
                 (filename, _) = self._fields[0].split(':')
+                self.filename = filename
                 return filename
             except ValueError:
                 pass
         elif attr == 'lineno':
             try:
                 (_, lineno) = self._fields[0].split(':')
-                return int(lineno)
+                self.lineno = int(lineno)
+                return self.lineno
             except ValueError:
                 pass
-        raise AttributeError
+        raise AttributeError(attr)
+
+    def _split(self):
+        """Split the whole line, and save the fields and the function name
+        and descriptor"""
+        fields = self._line.split()
+
+        # Trace lines have the descriptor in brackets after the function name,
+        # non-trace lines have empty brackets.  Truncated lines have neither.
+        if len(fields) > 6:
+            fn_str = fields[6]
+            if self.trace:
+                start_idx = fn_str.find('(')
+                self.function = sys.intern(fn_str[:start_idx])
+                desc = fn_str[start_idx+1:-1]
+                if desc == '(nil)':
+                    self.descriptor = ''
+                else:
+                    self.descriptor = desc
+            elif fn_str[-2:] == '()':
+                self.function = sys.intern(fn_str[:-2])
+
+        fields = fields[5:]
+        if self.trace:
+            if self.level == 7 or self.level == 3:
+                if self.fac == 'rpc' or self.fac == 'hg':
+                    del fields[2:5]
+        self._field_list = fields
+
+    @property
+    def _fields(self):
+        if self._field_list is None:
+            self._split()
+        return self._field_list
+
+    @property
+    def _msg(self):
+        if self._msg_str is None:
+            self._msg_str = ' '.join(self._fields)
+        return self._msg_str
+
+    @property
+    def _preamble(self):
+        if self._preamble_str is None:
+            # Work out the end of the fixed-width portion, and the beginning
+            # of the message.  The hostname and pid fields are both variable
+            # width
+            fields = self._line.split(None, 3)
+            idx = 29 + len(fields[1]) + len(fields[2])
+            self._preamble_str = self._line[:idx]
+        return self._preamble_str
+
+    @property
+    def ts(self):
+        """The timestamp of the line"""
+        return self._line[:17]
+
+    def to_str(self, mark=False):
+        """Convert the object to a string"""
+        pre = self._preamble.split(' ', 3)
+        preamble = ' '.join([pre[0], pre[3]])
+        if mark:
+            return '{} ** {}'.format(preamble, self._msg)
+        return '{}    {}'.format(preamble, self._msg)
+
+    def get_text(self):
+        """Return the text of the line as read from the log, which
+        LogLine() can be created from again"""
+        return self._line
 
     def get_msg(self):
         """Return the message part of a line, stripping up to and
@@ -209,40 +318,13 @@ class LogLine():
 
         fields = []
         for entry in self._fields[2:]:
-            field = None
-
-            r = self.re_region.fullmatch(entry)
-            if r:
-                field = '0x...-0x...'
-
-            if not field:
-                r = self.re_pointer.fullmatch(entry)
-                if r:
-                    field = '0x...{}'.format(r.group(1))
-            if not field:
-                r = self.re_pid.fullmatch(entry)
-                if r:
-                    field = 'pid=<pid>'
-            if not field:
-                r = self.re_uuid.fullmatch(entry)
-                if r:
-                    field = 'uuid{}'.format(r.group(1))
-            if not field:
-                r = self.re_uuid_rank.fullmatch(entry)
-                if r:
-                    field = 'uuid/rank{}'.format(r.group(1))
-            if not field:
-                r = self.re_uiod.fullmatch(entry)
-                if r:
-                    field = 'uoid.{}'.format(r.group(1))
-            if not field:
-                r = self.re_rpcid.fullmatch(entry)
-                if r:
-                    field = 'rpcid=<rpcid>'
-            if field:
-                fields.append(field)
+            match = self.re_anon.fullmatch(entry)
+            if match:
+                field = ANON_FORMATS[match.lastgroup].format(
+                    match.group(match.lastgroup))
             else:
-                fields.append(entry)
+                field = entry
+            fields.append(field)
 
         return '{}() {}'.format(self.function, ' '.join(fields))
 
@@ -252,6 +334,11 @@ class LogLine():
         This only matches on the actual string part of the message, not the
         timestamp/pid/faculty parts.
         """
+        fields = self._fields
+        if fields and ' ' not in item:
+            # The item can only match within the last field so avoid
+            # re-creating the message.
+            return fields[-1].endswith(item)
         return self._msg.endswith(item)
 
     def get_field(self, idx):
@@ -356,68 +443,90 @@ class StateIter():
     Implement a new iterator() for LogIter() that tracks descriptors
     and adds two new attributes, pdesc and pparent which are the local
     descriptor with the reuse-count appended.
+
+    Descriptor state is kept separately for each pid, so the iterator can
+    be used either for a single pid or for every pid in the file at once.
+
+    If keep_reuse is False then re-use counts are dropped when a descriptor
+    is deregistered, so that memory use does not grow with the number of
+    descriptors seen, at the cost of pdesc not being unique.
     """
-    def __init__(self, li):
-        self.reuse_table = {}
-        self.active_desc = {}
+    def __init__(self, li, keep_reuse=True):
+        self.reuse_tables = {}
+        self.active_descs = {}
         self.li = li
         self._l = None
+        self._keep_reuse = keep_reuse
 
     def __iter__(self):
 
-        # Dict, indexed by pointer, containing re-use index for that pointer.
-        self.reuse_table = {}
-        # Conversion from active pointer to line where it was created.
-        self.active_desc = {}
+        # Dicts, indexed by pid then pointer, containing re-use index for that
+        # pointer.
+        self.reuse_tables = {}
+        # Conversion from active pointer to line where it was created, indexed
+        # by pid.
+        self.active_descs = {}
 
         self._l = iter(self.li)
         return self
 
     def __next__(self):
-        line = next(self._l)
+        return self.update(next(self._l))
+
+    def update(self, line):
+        """Update the descriptor state from a line, and return it"""
 
         if not line.trace:
             line.rpc = False
             return line
 
+        try:
+            reuse_table = self.reuse_tables[line.pid]
+            active_desc = self.active_descs[line.pid]
+        except KeyError:
+            reuse_table = self.reuse_tables[line.pid] = {}
+            active_desc = self.active_descs[line.pid] = {}
+
         if line.is_new() or line.is_new_rpc():
-            if line.descriptor in self.reuse_table:
-                self.reuse_table[line.descriptor] += 1
+            if line.descriptor in reuse_table:
+                reuse_table[line.descriptor] += 1
                 line.pdesc = '{}_{}'.format(line.descriptor,
-                                            self.reuse_table[line.descriptor])
+                                            reuse_table[line.descriptor])
             else:
-                self.reuse_table[line.descriptor] = 0
+                reuse_table[line.descriptor] = 0
                 line.pdesc = line.descriptor
-            self.active_desc[line.descriptor] = line
+            active_desc[line.descriptor] = line
             if line.is_new():
-                if line.parent in self.active_desc:
-                    line.pparent = self.active_desc[line.parent].pdesc
+                if line.parent in active_desc:
+                    line.pparent = active_desc[line.parent].pdesc
                 else:
                     line.pparent = line.parent
                 line.rpc = False
             else:
                 line.rpc = True
         elif line.is_link():
-            if line.parent in self.active_desc:
-                line.pparent = self.active_desc[line.parent].pdesc
+            if line.parent in active_desc:
+                line.pparent = active_desc[line.parent].pdesc
             else:
                 line.pparent = line.parent
             line.pdesc = line.descriptor
             line.rpc = False
         else:
-            if line.descriptor in self.active_desc:
-                line.rpc = self.active_desc[line.descriptor].rpc
+            if line.descriptor in active_desc:
+                line.rpc = active_desc[line.descriptor].rpc
                 if not line.rpc:
-                    line.pparent = self.active_desc[line.descriptor].pparent
-                line.pdesc = self.active_desc[line.descriptor].pdesc
-                line.rpc_opcode = self.active_desc[line.descriptor].get_field(3)
+                    line.pparent = active_desc[line.descriptor].pparent
+                line.pdesc = active_desc[line.descriptor].pdesc
+                line.rpc_opcode = active_desc[line.descriptor].get_field(3)
             else:
                 line.pdesc = line.descriptor
                 line.rpc = False
 
             if (line.is_dereg() or line.is_dereg_rpc()) and \
-               line.descriptor in self.active_desc:
-                del self.active_desc[line.descriptor]
+               line.descriptor in active_desc:
+                del active_desc[line.descriptor]
+                if not self._keep_reuse:
+                    del reuse_table[line.descriptor]
 
         return line
 
@@ -429,6 +538,164 @@ class StateIter():
 
 # pylint: disable=too-few-public-methods
 
+class LogTail():
+    """Follow a log file which is still being written
+
+    Each call to read() returns the log lines added to the file since the
+    previous call, with descriptors tracked as for a stateful LogIter.  A
+    partial line at the end of the file is held back until it is complete,
+    and if the file is truncated it is read again from the start.
+
+    The position of every INDEX_STRIDE line is recorded so that lines already
+    returned can be read again with get_lines().
+    """
+
+    def __init__(self, fname):
+        self.fname = fname
+        self._fd = open(fname, 'rb')
+        self._rfd = None
+        self._reset()
+
+    def _reset(self):
+        """Start reading from the start of the file"""
+        self._fd.seek(0)
+        self._partial = b''
+        self._state = StateIter(None, keep_reuse=False)
+        self._index = 0
+        self._position = 0
+        self._line_pos = []
+
+    def _decode(self, data, report=True):
+        """Decode a line, falling back to latin-1 if not valid utf-8"""
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError:
+            line = data.decode('latin-1')
+            if report:
+                print('ERROR: Invalid data in {} on following line'.format(
+                    self.fname))
+                print(line)
+            return line
+
+    def read(self):
+        """Yield the complete log lines added since the last call"""
+
+        if os.fstat(self._fd.fileno()).st_size < self._fd.tell():
+            print('{} was truncated, reading from the start'.format(
+                self.fname))
+            self._reset()
+
+        while True:
+            data = self._fd.read(TAIL_READ_SIZE)
+            if not data:
+                return
+            lines = (self._partial + data).split(b'\n')
+            self._partial = lines.pop()
+            for data in lines:
+                if self._index % INDEX_STRIDE == 0:
+                    self._line_pos.append(self._position)
+                self._index += 1
+                self._position += len(data) + 1
+                line = _new_line(self._decode(data) + '\n', self._index)
+                if isinstance(line, LogRaw):
+                    continue
+                yield self._state.update(line)
+
+    def get_lines(self, first, last):
+        """Return a list of lines from first to last inclusive
+
+        Only lines already returned by read() are available.
+        """
+
+        if self._rfd is None:
+            self._rfd = open(self.fname, 'rb')
+        last = min(last, self._index)
+        slot = (first - 1) // INDEX_STRIDE
+        if slot >= len(self._line_pos):
+            return []
+        self._rfd.seek(self._line_pos[slot])
+        index = slot * INDEX_STRIDE + 1
+        lines = []
+        while index <= last:
+            data = self._rfd.readline()
+            if index >= first:
+                lines.append(_new_line(self._decode(data, report=False),
+                                       index))
+            index += 1
+        return lines
+
+    def get_line_dict(self, indexes):
+        """Return a dict of line number to line for a number of lines"""
+        return _get_line_dict(self, indexes)
+
+    def close(self):
+        """Close the file"""
+        self._fd.close()
+        if self._rfd:
+            self._rfd.close()
+
+def _index_file(fname):
+    """Return the name of the index file for a log"""
+    return '{}{}'.format(fname, INDEX_SUFFIX)
+
+def _index_key(fname):
+    """Return the values which tie an index file to the log contents"""
+    i = os.stat(fname)
+    return {'version': INDEX_VERSION,
+            'size': i.st_size,
+            'mtime': i.st_mtime_ns}
+
+def _new_line(line, index=None):
+    """Return a LogLine, or LogRaw for non-log lines"""
+    fields = line.split(' ', 5)
+    if len(fields) < 6 or len(fields[0]) != 17:
+        return LogRaw(line)
+    return LogLine(line, index)
+
+def _get_line_dict(log, indexes):
+    """Return a dict of line number to line, for a number of lines
+
+    The lines are read with log.get_lines(), in one call for all the lines
+    between each pair of saved positions, rather than one call per line.
+    """
+    wanted = sorted(set(indexes))
+    lines = {}
+    start = 0
+    while start < len(wanted):
+        slot = (wanted[start] - 1) // INDEX_STRIDE
+        end = start
+        while end + 1 < len(wanted) and \
+              (wanted[end + 1] - 1) // INDEX_STRIDE == slot:
+            end += 1
+        first = wanted[start]
+        window = log.get_lines(first, wanted[end])
+        for index in wanted[start:end + 1]:
+            if index - first < len(window):
+                lines[index] = window[index - first]
+        start = end + 1
+    return lines
+
+def _write_index(fname, data):
+    """Save the index file for a log
+
+    The data is written to a temporary file and renamed into place so that
+    concurrent readers never see a partial file.  Failure to save the index,
+    for example because the directory is read-only, is not an error.
+    """
+    data['key'] = _index_key(fname)
+    dirname = os.path.dirname(os.path.abspath(fname))
+    try:
+        (fd, tmp_name) = tempfile.mkstemp(dir=dirname, suffix=INDEX_SUFFIX)
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, 'w') as ofd:
+            json.dump(data, ofd)
+        os.chmod(tmp_name, 0o644)
+        os.rename(tmp_name, _index_file(fname))
+    except OSError:
+        os.unlink(tmp_name)
+
 class LogIter():
     """Class for parsing CaRT log files
 
@@ -436,8 +703,19 @@ class LogIter():
     is rewindable, and there are options for automatically skipping lines.
     """
 
-    def __init__(self, fname, check_encoding=False):
-        """Load a file, and check how many processes have written to it"""
+    def __init__(self, fname, check_encoding=False, use_index=True,
+                 use_mmap=False):
+        """Load a file, and check how many processes have written to it
+
+        For files which are too large to be held in memory the pid data
+        and a sparse table of line positions is saved to an index file next
+        to the log, and re-used on later loads, unless use_index is False.
+
+        If use_mmap is True then uncompressed files of any size are mapped
+        into memory rather than read through a text file, with lines only
+        being decoded when they are returned.  Invalid utf-8 data is reported
+        as it is found, rather than by reading the file on load.
+        """
 
         # Depending on file size either pre-read entire file into memory,
         # or do a first pass checking the pid list.  This allows the same
@@ -456,36 +734,73 @@ class LogIter():
         if i.st_size < (1024*1024*20):
             check_encoding = True
 
+        # Raw file handle, for compressed files read from a block offset.
+        self._raw_fd = None
+
+        # Start offset and first line index of each block of compressed files
+        # written by compress_log().
+        self._blocks = []
+
+        # Memory map of the file, and the offsets of lines in it which have
+        # been reported as not being valid utf-8.
+        self._mmap = None
+        self._bad_offsets = set()
+
         if fname.endswith('.bz2'):
             # Allow direct operation on bz2 files.  Supports multiple pids
-            # per file as normal, however does not try and seek to file
-            # positions, rather walks the entire file for each pid.
+            # per file as normal.  Files written by compress_log() can be
+            # read from the start of any block, otherwise the entire file is
+            # walked for each pid.
             self._fd = bz2.open(fname, 'rt')
             self.bz2 = True
+        elif use_mmap and i.st_size:
+            self._fd = open(fname, 'rb')
+            self._mmap = mmap.mmap(self._fd.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
         else:
+            # Large files are read by seeking to positions found by
+            # _load_pids(), so only split lines on newlines to match it.
+            newline = None
+            if i.st_size > (1024*1024*20):
+                newline = '\n'
             if check_encoding:
                 try:
-                    self._fd = open(fname, 'r', encoding='utf-8')
+                    self._fd = open(fname, 'r', encoding='utf-8',
+                                    newline=newline)
                     self._fd.read()
                 except UnicodeDecodeError as err:
                     print('ERROR: Invalid data in server.log on following line')
-                    self._fd = open(fname, 'r', encoding='latin-1')
+                    self._fd = open(fname, 'r', encoding='latin-1',
+                                    newline=newline)
                     self._fd.read(err.start - 200)
                     data = self._fd.read(199)
                     lines = data.splitlines()
                     print(lines[-1])
                 self._fd.seek(0)
             else:
-                self._fd = open(fname, 'r', encoding='utf-8')
+                self._fd = open(fname, 'r', encoding='utf-8', newline=newline)
 
         self.fname = fname
         self._data = []
+        self._pids = OrderedDict()
+
+        # File position of every INDEX_STRIDE line, for large files.
+        self._line_pos = []
+        # Separate file handles used for random access, and the line index
+        # the next read from them returns, for compressed files.
+        self._rfd = None
+        self._rraw_fd = None
+        self._rindex = None
 
         i = os.fstat(self._fd.fileno())
-        self.__from_file = bool(i.st_size > (1024*1024*20)) or self.bz2
+        self.__from_file = bool(i.st_size > (1024*1024*20)) or self.bz2 or \
+                           self._mmap is not None
 
         if self.__from_file:
-            self._load_pids()
+            if not use_index or not self._read_index():
+                self._load_pids()
+                if use_index:
+                    self._write_index()
         else:
             self._load_data()
 
@@ -500,6 +815,7 @@ class LogIter():
         self._iter_count = 0
         self._iter_pid = None
         self._iter_last_index = 0
+        self._iter_base = 0
 
     def _load_data(self):
         """Load all data into memory"""
@@ -508,13 +824,13 @@ class LogIter():
 
         index = 0
         for line in self._fd:
-            fields = line.split(' ', 8)
+            fields = line.split(' ', 5)
             index += 1
             l_pid = None
             if len(fields) < 6 or len(fields[0]) != 17 or fields[0][2] != '/':
                 self._data.append(LogRaw(line))
             else:
-                l_obj = LogLine(line)
+                l_obj = LogLine(line, index)
                 l_pid = l_obj.pid
                 self._data.append(l_obj)
                 if l_pid in pids:
@@ -526,21 +842,40 @@ class LogIter():
         self._pids = pids
 
     def _load_pids(self):
-        """Iterate through the file, loading data on pids"""
+        """Iterate through the file, loading data on pids
+
+        Uncompressed files are scanned as bytes, so the saved positions are
+        byte offsets, which both text files and the memory map can seek to.
+        """
+
+        if self.bz2:
+            self._scan_pids(self._fd, ' ', '/')
+        elif self._mmap is not None:
+            self._mmap.seek(0)
+            self._scan_pids(iter(self._mmap.readline, b''), b' ', b'/')
+        else:
+            with open(self.fname, 'rb') as fd:
+                self._scan_pids(fd, b' ', b'/')
+
+    def _scan_pids(self, lines, space, slash):
+        """Load data on pids from an iterator of str or bytes lines"""
 
         pids = OrderedDict()
 
         index = 0
         position = 0
-        for line in self._fd:
-            fields = line.split(' ', 8)
+        line_pos = []
+        for line in lines:
+            if index % INDEX_STRIDE == 0:
+                line_pos.append(position)
+            fields = line.split(space, 5)
             index += 1
             l_pid = None
             if len(fields) < 6 or len(fields[0]) != 17:
                 position += len(line)
                 continue
             pidtid = fields[2][5:-1]
-            pid = pidtid.split("/")
+            pid = pidtid.split(slash)
             l_pid = int(pid[0])
             if l_pid in pids:
                 pids[l_pid]['line_count'] += 1
@@ -551,6 +886,58 @@ class LogIter():
             pids[l_pid]['last_index'] = index
             position += len(line)
         self._pids = pids
+        self._line_pos = line_pos
+
+    def _index_file(self):
+        """Return the name of the index file for the log"""
+        return _index_file(self.fname)
+
+    def _index_key(self):
+        """Return the values which tie an index file to the log contents"""
+        return _index_key(self.fname)
+
+    def _open_block(self, block):
+        """Re-open a compressed file from the start of a block"""
+        self._fd.close()
+        if self._raw_fd:
+            self._raw_fd.close()
+        self._raw_fd = open(self.fname, 'rb')
+        self._raw_fd.seek(self._blocks[block][0])
+        # Only split lines on newlines, to match the index.
+        self._fd = bz2.open(self._raw_fd, 'rt', newline='\n')
+
+    def can_seek(self):
+        """Return True if lines for a pid can be read without reading from
+        the start of the file"""
+        return self.__from_file and (not self.bz2 or bool(self._blocks))
+
+    def _read_index(self):
+        """Load pid data from the index file
+
+        Returns True if the index file was present and up to date.
+        """
+        try:
+            with open(self._index_file(), 'r') as fd:
+                data = json.load(fd)
+        except (OSError, ValueError):
+            return False
+
+        if data.get('key') != self._index_key():
+            return False
+
+        pids = OrderedDict()
+        for (pid, info) in data['pids']:
+            pids[pid] = info
+        self._pids = pids
+        self._line_pos = data['line_pos']
+        if self.bz2:
+            self._blocks = data.get('blocks', [])
+        return True
+
+    def _write_index(self):
+        """Save pid data to the index file"""
+        _write_index(self.fname, {'pids': list(self._pids.items()),
+                                  'line_pos': self._line_pos})
 
     def new_iter(self,
                  pid=None,
@@ -560,6 +947,7 @@ class LogIter():
         """Rewind file iterator, and set options
 
         If pid is set the the iterator will only return lines matching the pid
+        If stateful is True then descriptors are tracked for each pid.
         If trace_only is True then the iterator will only return trace lines.
         if raw is set then all lines in the file are returned, even non-log
         lines.
@@ -572,7 +960,11 @@ class LogIter():
                 raise InvalidPid
 
             if self.__from_file:
-                if self.bz2:
+                if self._blocks:
+                    block = self._blocks[self._iter_pid['block']]
+                    self._iter_last_index = self._iter_pid['last_index'] - \
+                                            block[1] + 1
+                elif self.bz2:
                     self._iter_last_index = self._iter_pid['last_index']
                 else:
                     self._iter_last_index = self._iter_pid['last_index'] - \
@@ -589,8 +981,6 @@ class LogIter():
         self._raw = raw
 
         if stateful:
-            if not pid:
-                raise InvalidPid
             return StateIter(self)
 
         return self
@@ -598,26 +988,83 @@ class LogIter():
     def __iter__(self):
         self._iter_index = 0
         self._iter_count = 0
+        # Line number of the line before the first one read.
+        self._iter_base = 0
         if self.__from_file:
-            if not self._pid or self.bz2:
+            if self._blocks:
+                if self._pid:
+                    block = self._iter_pid['block']
+                    self._iter_base = self._blocks[block][1] - 1
+                    self._open_block(block)
+                else:
+                    self._open_block(0)
+            elif self._mmap is not None:
+                if self._pid:
+                    self._iter_base = self._iter_pid['first_index'] - 1
+                    self._mmap.seek(self._iter_pid['file_pos'])
+                else:
+                    self._mmap.seek(0)
+            elif not self._pid or self.bz2:
                 self._fd.seek(0)
             else:
+                self._iter_base = self._iter_pid['first_index'] - 1
                 self._fd.seek(self._iter_pid['file_pos'])
         else:
             self._offset = 0
         return self
 
+    def _decode(self, data, end=None):
+        """Decode a line read from the memory map
+
+        end is the offset of the end of the line, and defaults to the current
+        position of the map.  Lines which are not valid utf-8 are reported
+        once, and decoded as latin-1.
+        """
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError as err:
+            if end is None:
+                end = self._mmap.tell()
+            start = end - len(data)
+            line = data.decode('latin-1')
+            if start not in self._bad_offsets:
+                self._bad_offsets.add(start)
+                print('ERROR: Invalid data in {} at offset {} on following '
+                      'line'.format(self.fname, start + err.start))
+                print(line.rstrip('\n'))
+            return line
+
     def __lnext(self):
         """Helper function for __next__"""
 
+        if self._mmap is not None:
+            data = self._mmap.readline()
+            if not data:
+                raise StopIteration
+            fields = data.split(b' ', 5)
+            if len(fields) < 6 or len(fields[0]) != 17:
+                if self._pid or not self._raw:
+                    return None
+                return LogRaw(self._decode(data))
+            if self._pid and \
+               int(fields[2][5:-1].split(b'/')[0]) != self._pid:
+                return None
+            return LogLine(self._decode(data),
+                           self._iter_base + self._iter_index)
+
         if self.__from_file:
             line = self._fd.readline()
             if not line:
                 raise StopIteration
-            fields = line.split(' ', 8)
+            fields = line.split(' ', 5)
             if len(fields) < 6 or len(fields[0]) != 17:
                 return LogRaw(line)
-            return LogLine(line)
+            # When iterating over a single pid avoid the cost of parsing
+            # lines from other pids.
+            if self._pid and \
+               int(fields[2][5:-1].split('/')[0]) != self._pid:
+                return None
+            return LogLine(line, self._iter_base + self._iter_index)
 
         try:
             line = self._data[self._offset]
@@ -637,6 +1084,9 @@ class LogIter():
 
             line = self.__lnext()
 
+            if line is None:
+                continue
+
             if not self._raw and isinstance(line, LogRaw):
                 continue
 
@@ -660,4 +1110,177 @@ class LogIter():
     def get_pids(self):
         """Return an array of pids appearing in the file"""
         return self._pids.keys()
+
+    def get_lines(self, first, last):
+        """Return a list of lines from first to last inclusive
+
+        Line numbers are based from 1, and include non-log lines, which are
+        returned as LogRaw objects.  For large files reading starts from the
+        nearest saved position, rather than the start of the file, and does
+        not affect any iterator in progress.
+        """
+
+        if not self.__from_file:
+            return self._data[first-1:last]
+
+        if self._mmap is not None:
+            return self._get_mmap_lines(first, last)
+
+        if self._rfd is None:
+            if self.bz2:
+                self._rfd = bz2.open(self.fname, 'rt')
+            else:
+                self._rfd = open(self.fname, 'r',
+                                 encoding=self._fd.encoding, newline='\n')
+
+        # Compressed files can only be read forwards, so carry on from the
+        # end of the last call rather than decompressing the same data again
+        # if that is no further back than a seek would go.
+        slot = (first - 1) // INDEX_STRIDE
+        if self._blocks:
+            block = bisect.bisect_right([b[1] for b in self._blocks], first) - 1
+            index = self._blocks[block][1]
+            if self._rindex is not None and index <= self._rindex <= first:
+                index = self._rindex
+            else:
+                self._rfd.close()
+                if self._rraw_fd:
+                    self._rraw_fd.close()
+                self._rraw_fd = open(self.fname, 'rb')
+                self._rraw_fd.seek(self._blocks[block][0])
+                self._rfd = bz2.open(self._rraw_fd, 'rt', newline='\n')
+        elif self.bz2:
+            if self._rindex is not None and self._rindex <= first:
+                index = self._rindex
+            else:
+                self._rfd.seek(0)
+                index = 1
+        elif slot >= len(self._line_pos):
+            self._rfd.seek(0)
+            index = 1
+        else:
+            self._rfd.seek(self._line_pos[slot])
+            index = slot * INDEX_STRIDE + 1
+
+        lines = []
+        while index <= last:
+            line = self._rfd.readline()
+            if not line:
+                break
+            if index >= first:
+                lines.append(_new_line(line, index))
+            index += 1
+        if self.bz2:
+            self._rindex = index
+        return lines
+
+    def get_line_dict(self, indexes):
+        """Return a dict of line number to line for a number of lines"""
+        if not self.__from_file:
+            return {index: self._data[index-1] for index in indexes}
+        return _get_line_dict(self, indexes)
+
+    def _get_mmap_lines(self, first, last):
+        """Return a list of lines from the memory map
+
+        Lines are found directly in the map so the iterator position is not
+        affected.
+        """
+
+        slot = (first - 1) // INDEX_STRIDE
+        if slot < len(self._line_pos):
+            position = self._line_pos[slot]
+            index = slot * INDEX_STRIDE + 1
+        else:
+            position = 0
+            index = 1
+
+        size = len(self._mmap)
+        lines = []
+        while index <= last and position < size:
+            end = self._mmap.find(b'\n', position) + 1
+            if end == 0:
+                end = size
+            if index >= first:
+                data = self._mmap[position:end]
+                lines.append(_new_line(self._decode(data, end), index))
+            position = end
+            index += 1
+        return lines
 # pylint: enable=too-many-instance-attributes
+
+def _read_blocks(fd, block_size, count):
+    """Read up to count blocks of whole lines from fd"""
+    blocks = []
+    for _ in range(count):
+        lines = fd.readlines(block_size)
+        if not lines:
+            break
+        blocks.append(lines)
+    return blocks
+
+def compress_log(fname, block_size=COMPRESS_BLOCK_SIZE):
+    """Compress a log file into a seekable bz2 file
+
+    The log is written as a series of independent bz2 streams each holding
+    whole lines, which standard bz2 tools read as a single file.  An index
+    file is saved alongside, recording the offset of each block and the
+    block where each pid first appears, so that LogIter can start reading
+    the lines for a pid without decompressing the file up to that point.
+
+    Blocks are compressed in parallel.  The original file is removed, and
+    the name of the compressed file is returned.
+    """
+
+    out_name = '{}.bz2'.format(fname)
+    pids = OrderedDict()
+    blocks = []
+    index = 0
+    procs = multiprocessing.cpu_count()
+    with open(fname, 'rb') as fd, open(out_name, 'wb') as ofd, \
+         multiprocessing.Pool(procs) as pool:
+        while True:
+            # Limit the number of blocks read at once to bound memory use.
+            data = _read_blocks(fd, block_size, procs * 2)
+            if not data:
+                break
+            compressed = pool.map(bz2.compress,
+                                  [b''.join(lines) for lines in data])
+            for (lines, cdata) in zip(data, compressed):
+                blocks.append([ofd.tell(), index + 1])
+                for line in lines:
+                    index += 1
+                    fields = line.split(b' ', 5)
+                    if len(fields) < 6 or len(fields[0]) != 17:
+                        continue
+                    try:
+                        l_pid = int(fields[2][5:-1].split(b'/')[0])
+                    except ValueError:
+                        continue
+                    if l_pid in pids:
+                        pids[l_pid]['line_count'] += 1
+                    else:
+                        pids[l_pid] = {'line_count': 1,
+                                       'first_index': index,
+                                       'block': len(blocks) - 1}
+                    pids[l_pid]['last_index'] = index
+                ofd.write(cdata)
+    os.unlink(fname)
+    _write_index(out_name, {'pids': list(pids.items()),
+                            'line_pos': [],
+                            'blocks': blocks})
+    return out_name
+
+def run():
+    """Compress log files into the seekable bz2 format"""
+    parser = argparse.ArgumentParser(
+        description='Compress CaRT log files so they can be read by pid')
+    parser.add_argument('file', nargs='+',
+                        help='input file, removed once compressed')
+    args = parser.parse_args()
+    for fname in args.file:
+        out_name = compress_log(fname)
+        print('{} -> {}'.format(fname, out_name))
+
+if __name__ == '__main__':
+    run()
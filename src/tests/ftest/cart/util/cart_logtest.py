@@ -39,8 +39,14 @@
 This provides consistency checking for CaRT log files.
 """
 
+import os
+import io
+import sys
+import glob
 import time
 import argparse
+import contextlib
+import multiprocessing
 HAVE_TABULATE = True
 try:
     import tabulate
@@ -269,23 +275,50 @@ mismatch_free_ok = {'crt_finalize': ('crt_gdata.cg_addr'),
 
 wf = None
 
+def _format_line(line, sev, msg):
+    """Format a log line in gcc error format"""
+    return "{}:{}:1: {}: {} '{}'".format(line.filename,
+                                         line.lineno,
+                                         sev,
+                                         msg,
+                                         line.get_anon_msg())
+
 def show_line(line, sev, msg):
     """Output a log line in gcc error format"""
 
     # Only report each individual line once.
 
-    log = "{}:{}:1: {}: {} '{}'".format(line.filename,
-                                        line.lineno,
-                                        sev,
-                                        msg,
-                                        line.get_anon_msg())
+    log = _format_line(line, sev, msg)
     if log in shown_logs:
         return
-    print(log)
+    # Worker processes leave printing to the parent, which filters the
+    # issues again so that each is only shown once across all workers.
+    if not isinstance(wf, IssueCollector):
+        print(log)
     if wf:
         wf.add(line, sev, msg)
     shown_logs.add(log)
 
+class IssueCollector():
+    """Record issues for later merging
+
+    Used in place of a WarningsFactory in worker processes, so that issues
+    can be passed back to the parent and merged into a single report.  Issues
+    are not printed in the worker, instead the position in the output where
+    they would have been is saved, so the parent can print them in place.
+    """
+
+    def __init__(self, output):
+        self.issues = []
+        self._output = output
+
+    def add(self, line, sev, message):
+        """Record an issue"""
+        self.issues.append((line, sev, message, self._output.tell()))
+
+    def reset_pending(self):
+        """Pending issues are tracked by the parent, so nothing to do"""
+
 class hwm_counter():
     """Class to track integer values, with high-water mark"""
 
@@ -323,8 +356,459 @@ class hwm_counter():
             return
         self.__val -= val
 
+class RpcTally():
+    """RPC state machine tally for a single pid"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self._op_state_counters = {}
+        self._c_states = {}
+        self._c_state_names = set()
+
+        # Use to convert from descriptor to opcode.
+        self._current_opcodes = {}
+
+    def add_line(self, line):
+        """Update the tally from a single log line"""
+        rpc_state = None
+        opcode = None
+
+        function = getattr(line, 'function', None)
+        if not function:
+            return
+        if line.is_new_rpc():
+            rpc_state = 'ALLOCATED'
+            opcode = line.get_field(-4)
+            if opcode == 'per':
+                opcode = line.get_field(-8)
+        elif line.is_dereg_rpc():
+            rpc_state = 'DEALLOCATED'
+        elif line.endswith('submitted.'):
+            rpc_state = 'SUBMITTED'
+        elif function == 'crt_hg_req_send' and \
+             line.get_field(-6) == ('sent'):
+            rpc_state = 'SENT'
+
+        elif line.is_callback():
+            rpc_state = 'COMPLETED'
+            result = line.get_field(13).split('(')[0]
+            self._c_state_names.add(result)
+            opcode = self._current_opcodes[line.descriptor]
+            try:
+                self._c_states[opcode][result] += 1
+            except KeyError:
+
+                self._c_states[opcode] = Counter()
+                self._c_states[opcode][result] += 1
+        else:
+            return
+
+        rpc = line.descriptor
+
+        if rpc_state == 'ALLOCATED':
+            self._current_opcodes[rpc] = opcode
+        else:
+            opcode = self._current_opcodes[rpc]
+        if rpc_state == 'DEALLOCATED':
+            del self._current_opcodes[rpc]
+
+        if opcode not in self._op_state_counters:
+            self._op_state_counters[opcode] = {'ALLOCATED' :0,
+                                               'DEALLOCATED': 0,
+                                               'SENT':0,
+                                               'COMPLETED':0,
+                                               'SUBMITTED':0}
+        self._op_state_counters[opcode][rpc_state] += 1
+
+    def report(self):
+        """Output the tally, and any alloc/dealloc imbalance"""
+
+        if not bool(self._op_state_counters):
+            return
+
+        table = []
+        errors = []
+        names = sorted(self._c_state_names)
+        if names:
+            try:
+                names.remove('DER_SUCCESS')
+            except ValueError:
+                pass
+            names.insert(0, 'DER_SUCCESS')
+        headers = ['OPCODE',
+                   'ALLOCATED',
+                   'SUBMITTED',
+                   'SENT',
+                   'COMPLETED',
+                   'DEALLOCATED']
+
+        for state in names:
+            headers.append('-{}'.format(state))
+        for (op, counts) in sorted(self._op_state_counters.items()):
+            row = [op,
+                   counts['ALLOCATED'],
+                   counts['SUBMITTED'],
+                   counts['SENT'],
+                   counts['COMPLETED'],
+                   counts['DEALLOCATED']]
+            for state in names:
+                try:
+                    row.append(self._c_states[op].get(state, ''))
+                except KeyError:
+                    row.append('')
+            table.append(row)
+            if counts['ALLOCATED'] != counts['DEALLOCATED']:
+                errors.append("ERROR: Opcode {}: Alloc'd Total = {}, "
+                              "Dealloc'd Total = {}". \
+                              format(op,
+                                     counts['ALLOCATED'],
+                                     counts['DEALLOCATED']))
+
+        if HAVE_TABULATE:
+            print('Opcode State Transition Tally')
+            print(tabulate.tabulate(table,
+                                    headers=headers,
+                                    stralign='right'))
+
+        if errors:
+            for error in errors:
+                print(error)
+
+class Region():
+    """Compact record of a live memory allocation
+
+    Holds what is needed to check the matching free, and the text of the
+    allocation line, so that it can be reported without reading the log
+    again.
+    """
+
+    __slots__ = ('index', 'text', 'fac', 'level', 'size', 'function', 'var')
+
+    def __init__(self, line):
+        self.index = line.index
+        self.text = line.get_text()
+        self.fac = line.fac
+        self.level = line.level
+        self.size = line.calloc_size()
+        self.function = sys.intern(line.function)
+        self.var = sys.intern(line.get_field(3).strip("':"))
+
+    def get_line(self):
+        """Return the allocation line"""
+        return cart_logparse.LogLine(self.text, self.index)
+
 #pylint: disable=too-many-statements
 #pylint: disable=too-many-locals
+#pylint: disable=too-many-branches,too-many-nested-blocks
+class PidCheck():
+    """Consistency checking state machine for a single pid
+
+    Tracks descriptors, RPCs and memory allocations as lines are added, and
+    reports on anything left over once the log has been consumed.
+
+    Live memory allocations are held as Region records, and freed memory as
+    the line numbers of the allocation and free, to report double frees.  If
+    max_freed is set then only that many of the most recently used frees are
+    kept.  Double frees are reported by finish(), which reads all the lines
+    they need from the log again in one pass.
+    """
+
+    def __init__(self, log_test, pid, abort_on_warning, show_memleaks=True,
+                 max_freed=None):
+        self._lt = log_test
+        self.pid = pid
+        self._abort_on_warning = abort_on_warning
+        self._show_memleaks = show_memleaks
+
+        # Dict of active descriptors.
+        self.active_desc = OrderedDict()
+        self.active_desc['root'] = None
+
+        # Dict of active RPCs
+        self.active_rpcs = OrderedDict()
+
+        self.err_count = 0
+        self.warnings_strict = False
+        self.warnings_mode = False
+
+        self.regions = OrderedDict()
+        self.memsize = hwm_counter()
+
+        self.old_regions = OrderedDict()
+        self._max_freed = max_freed
+
+        # The allocation and first free line numbers, and the second free
+        # line, of each double free.
+        self.double_frees = []
+
+        self.error_files = set()
+
+        self.have_debug = False
+
+        self.trace_lines = 0
+        self.non_trace_lines = 0
+
+    def add_line(self, line):
+        """Check a single line from the log"""
+
+        active_desc = self.active_desc
+        active_rpcs = self.active_rpcs
+        regions = self.regions
+        try:
+            msg = ''.join(line._fields[2:])
+            # Warn if a line references the name of the function it was in,
+            # but skip short function names or _internal suffixes.
+            if line.function in msg and len(line.function) > 6 and \
+               '{}_internal'.format(line.function) not in msg:
+                show_line(line, 'NORMAL',
+                          'Logging references function name')
+        except AttributeError:
+            pass
+        if self._abort_on_warning:
+            if line.level <= cart_logparse.LOG_LEVELS['WARN']:
+                show = True
+                if self._lt.hide_fi_calls:
+                    if line.is_fi_site():
+                        show = False
+                        self._lt.fi_triggered = True
+                    elif line.is_fi_alloc_fail():
+                        show = False
+                        self._lt.fi_location = line
+                    elif '-1009' in line.get_msg():
+
+                        fi_location = self._lt.fi_location
+                        if line.filename == fi_location.filename:
+                            src_offset = line.lineno - fi_location.lineno
+                            if src_offset > 0 and src_offset < 5:
+                                show_line(line, 'NORMAL',
+                                          'Logging allocation failure')
+
+                        if not line.get_msg().endswith("DER_NOMEM(-1009): 'Out of memory'"):
+                            show_line(line, 'LOW',
+                                      'Error does not use DF_RC')
+                        # For the fault injection test do not report
+                        # errors for lines that print -DER_NOMEM, as
+                        # this highlights other errors and lines which
+                        # report an error, but not a fault code.
+                        show = False
+                elif line.rpc:
+                    # Ignore the SWIM RPC opcode, as this often sends RPCs
+                    # that fail during shutdown.
+                    if line.rpc_opcode == '0xfe000000':
+                        show = False
+                if line.fac == 'external':
+                    show = False
+                if show:
+                    # Allow WARNING or ERROR messages, but anything higher
+                    # like assert should trigger a failure.
+                    if line.level < cart_logparse.LOG_LEVELS['ERR']:
+                        show_line(line, 'HIGH', 'error in strict mode')
+                    else:
+                        show_line(line, 'NORMAL', 'warning in strict mode')
+                    self.warnings_mode = True
+        if line.trace:
+            self.trace_lines += 1
+            if not self.have_debug and \
+               line.level > cart_logparse.LOG_LEVELS['INFO']:
+                self.have_debug = True
+            desc = line.descriptor
+            if line.is_new():
+                if desc in active_desc:
+                    show_line(active_desc[desc], 'NORMAL',
+                              'not deregistered')
+                    show_line(line, 'NORMAL', 'already exists')
+                    self.err_count += 1
+                if line.parent not in active_desc:
+                    show_line(line, 'error', 'add with bad parent')
+                    if line.parent in regions:
+                        show_line(regions[line.parent].get_line(),
+                                  'NORMAL',
+                                  'used as parent without registering')
+                    self.err_count += 1
+                active_desc[desc] = line
+            elif line.is_link():
+                parent = line.parent
+                if parent not in active_desc:
+                    show_line(line, 'NORMAL', 'link with bad parent')
+                    self.err_count += 1
+                desc = parent
+            elif line.is_new_rpc():
+                active_rpcs[line.descriptor] = line
+            if line.is_dereg():
+                if desc in active_desc:
+                    del active_desc[desc]
+                else:
+                    show_line(line, 'NORMAL', 'invalid desc remove')
+                    self.err_count += 1
+            elif line.is_dereg_rpc():
+                if desc in active_rpcs:
+                    del active_rpcs[desc]
+                else:
+                    show_line(line, 'NORMAL', 'invalid rpc remove')
+                    self.err_count += 1
+            else:
+                if self.have_debug and desc not in active_desc and \
+                   desc not in active_rpcs:
+
+                    show_line(line, 'NORMAL', 'inactive desc')
+                    if line.descriptor in regions:
+                        region = regions[line.descriptor]
+                        show_line(region.get_line(), 'NORMAL',
+                                  'Used as descriptor without registering')
+                    self.error_files.add(line.filename)
+                    self.err_count += 1
+        elif len(line._fields) > 2:
+            # is_calloc() doesn't work on truncated output so only test if
+            # there are more than two fields to work with.
+            self.non_trace_lines += 1
+            if line.is_calloc():
+                pointer = line.get_field(-1).rstrip('.')
+                if pointer in regions:
+                    show_line(regions[pointer].get_line(),
+                              'NORMAL',
+                              'new allocation seen for same pointer')
+                    self.err_count += 1
+                region = Region(line)
+                regions[pointer] = region
+                self.memsize.add(region.size)
+            elif line.is_free():
+                pointer = line.get_field(-1).rstrip('.')
+                # If a pointer is freed then automatically remove the
+                # descriptor
+                if pointer in active_desc:
+                    del active_desc[pointer]
+                if pointer in regions:
+                    region = regions[pointer]
+                    if line.fac != region.fac:
+                        fvar = line.get_field(3).strip("'")
+                        afunc = region.function
+                        avar = region.var
+                        if line.function in mismatch_free_ok and \
+                           fvar in mismatch_free_ok[line.function] and \
+                           afunc in mismatch_alloc_ok and \
+                           avar in mismatch_alloc_ok[afunc]:
+                            pass
+                        else:
+                            show_line(region.get_line(), 'LOW',
+                                      'facility mismatch in alloc/free')
+                            show_line(line, 'LOW',
+                                      'facility mismatch in alloc/free')
+                            self.err_count += 1
+                    if line.level != region.level:
+                        show_line(region.get_line(), 'LOW',
+                                  'level mismatch in alloc/free')
+                        show_line(line, 'LOW',
+                                  'level mismatch in alloc/free')
+                        self.err_count += 1
+                    self.memsize.subtract(region.size)
+                    self.old_regions.pop(pointer, None)
+                    self.old_regions[pointer] = (region.index, line.index)
+                    if self._max_freed is not None and \
+                       len(self.old_regions) > self._max_freed:
+                        self.old_regions.popitem(last=False)
+                    del regions[pointer]
+                elif pointer != '(nil)':
+                    if pointer in self.old_regions:
+                        self.old_regions.move_to_end(pointer)
+                        # Reading the earlier lines from the log can mean
+                        # decompressing it, so report them all at the end.
+                        self.double_frees.append(
+                            self.old_regions[pointer] + (line,))
+                    else:
+                        show_line(line, 'HIGH', 'free of unknown memory')
+                    self.err_count += 1
+            elif line.is_realloc():
+                new_pointer = line.get_field(-3)
+                old_pointer = line.get_field(-1)[:-2].split(':')[-1]
+                if new_pointer != '(nil)' and old_pointer != '(nil)':
+                    self.memsize.subtract(regions[old_pointer].size)
+                region = Region(line)
+                regions[new_pointer] = region
+                self.memsize.add(region.size)
+                if old_pointer not in (new_pointer, '(nil)'):
+                    if old_pointer in regions:
+                        del regions[old_pointer]
+                    else:
+                        show_line(line, 'NORMAL',
+                                  'realloc of unknown memory')
+                        self.err_count += 1
+
+    def status(self):
+        """Return the counts of outstanding state, for reporting progress"""
+        return {'allocations': len(self.regions),
+                'descriptors': len(self.active_desc) - 1,
+                'rpcs': len(self.active_rpcs),
+                'errors': self.err_count}
+
+    def finish(self):
+        """Report on the state at the end of the log, raising on error"""
+
+        active_desc = self.active_desc
+
+        del active_desc['root']
+
+        # This isn't currently used anyway.
+        #if not have_debug:
+        #    print('DEBUG not enabled, No log consistency checking possible')
+
+        total_lines = self.trace_lines + self.non_trace_lines
+        p_trace = self.trace_lines * 1.0 / total_lines * 100
+
+        print("Pid {}, {} lines total, {} trace ({:.2f}%)".format(
+            self.pid,
+            total_lines,
+            self.trace_lines,
+            p_trace))
+
+        if self.memsize.has_data():
+            print("Memsize: {}".format(self.memsize))
+
+        if self.double_frees:
+            indexes = []
+            for (alloc_index, free_index, _) in self.double_frees:
+                indexes.extend([alloc_index, free_index])
+            lines = self._lt.get_line_dict(indexes)
+            for (alloc_index, free_index, line) in self.double_frees:
+                show_line(lines[alloc_index], 'ERROR',
+                          'double-free allocation point')
+                show_line(lines[free_index], 'ERROR',
+                          '1st double-free location')
+                show_line(line, 'ERROR', '2nd double-free location')
+
+        # Special case the fuse arg values as these are allocated by IOF
+        # but freed by fuse itself.
+        # Skip over CaRT issues for now to get this landed, we can enable them
+        # once this is stable.
+        lost_memory = False
+        if self._show_memleaks:
+            for region in self.regions.values():
+                line = region.get_line()
+                pointer = line.get_field(-1).rstrip('.')
+                if pointer in active_desc:
+                    show_line(line, 'NORMAL', 'descriptor not freed')
+                    del active_desc[pointer]
+                else:
+                    show_line(line, 'NORMAL', 'memory not freed')
+                lost_memory = True
+
+        if active_desc:
+            for (_, line) in active_desc.items():
+                show_line(line, 'NORMAL', 'desc not deregistered')
+            raise ActiveDescriptors()
+
+        if self.active_rpcs:
+            for (_, line) in self.active_rpcs.items():
+                show_line(line, 'NORMAL', 'rpc not deregistered')
+        if self.error_files or self.err_count:
+            raise LogError()
+        if lost_memory:
+            raise NotAllFreed()
+        if self.warnings_strict:
+            raise WarningStrict()
+        if self.warnings_mode:
+            raise WarningMode()
+#pylint: enable=too-many-branches,too-many-nested-blocks
+
 class LogTest():
     """Log testing"""
 
@@ -340,6 +824,14 @@ class LogTest():
         self.log_levels = Counter()
         self.log_count = 0
 
+        # Limit on freed memory remembered for each pid, or None.
+        self.max_freed = None
+
+        # State machines for each pid, and the last reported status.
+        self._tallies = OrderedDict()
+        self._checks = OrderedDict()
+        self._status = {}
+
     def __del__(self):
         self.show_common_logs()
 
@@ -383,17 +875,103 @@ class LogTest():
                                             count,
                                             100*count/self.log_count))
 
-    def check_log_file(self, abort_on_warning, show_memleaks=True):
-        """Check a single log file for consistency"""
+    def get_line_dict(self, indexes):
+        """Return a dict of line number to line, read from the log"""
+        return self._li.get_line_dict(indexes)
 
-        for pid in self._li.get_pids():
-            if wf:
-                wf.reset_pending()
-            self.rpc_reporting(pid)
+    def merge_counts(self, other):
+        """Add the logging records from other to this object"""
+        self.log_locs.update(other.log_locs)
+        self.log_fac.update(other.log_fac)
+        self.log_levels.update(other.log_levels)
+        self.log_count += other.log_count
+
+    def check_log_file(self, abort_on_warning, show_memleaks=True, pids=None):
+        """Check a single log file for consistency
+
+        The file is read and parsed exactly once, with every line being
+        passed to the state machines for the pid which logged it.  Once the
+        whole file has been consumed each pid is reported on in turn, and
+        the first error found is raised.
+
+        If pids is set then only the pids listed are checked.
+        """
+
+        self._tallies = OrderedDict()
+        self._checks = OrderedDict()
+
+        if pids is not None and len(pids) == 1:
+            lines = self._li.new_iter(pid=pids[0], stateful=True)
+        else:
+            lines = self._li.new_iter(stateful=True)
+
+        if wf:
+            wf.reset_pending()
+        self.check_lines(lines, abort_on_warning, show_memleaks, pids=pids)
+        self.finish_pids()
+
+    def check_lines(self, lines, abort_on_warning, show_memleaks=True,
+                    pids=None):
+        """Pass lines from a stateful iterator to the per-pid state machines
+
+        May be called repeatedly as more lines become available.  Returns the
+        number of lines checked.
+        """
+
+        tallies = self._tallies
+        checks = self._checks
+        count = 0
+        for line in lines:
+            if pids is not None and line.pid not in pids:
+                continue
+            count += 1
+            self.save_log_line(line)
+            try:
+                check = checks[line.pid]
+            except KeyError:
+                tallies[line.pid] = RpcTally(line.pid)
+                check = PidCheck(self, line.pid, abort_on_warning,
+                                 show_memleaks=show_memleaks,
+                                 max_freed=self.max_freed)
+                checks[line.pid] = check
+            tallies[line.pid].add_line(line)
+            check.add_line(line)
+        return count
+
+    def report_deltas(self, prefix=''):
+        """Report on the changes to the state of each pid since the last call
+
+        Only pids where the outstanding state has changed are reported.
+        """
+
+        for (pid, check) in self._checks.items():
+            status = check.status()
+            old = self._status.get(pid)
+            if status == old:
+                continue
+            if old is None:
+                old = dict.fromkeys(status, 0)
+            self._status[pid] = status
+            changes = ['{} {} ({:+})'.format(status[key], key,
+                                             status[key] - old[key])
+                       for key in status]
+            print('{}Pid {}: {}'.format(prefix, pid, ', '.join(changes)))
+
+    def finish_pids(self):
+        """Report on each pid, raising the first error found"""
+
+        first_error = None
+        for (pid, check) in self._checks.items():
             if wf:
                 wf.reset_pending()
-            self._check_pid_from_log_file(pid, abort_on_warning,
-                                          show_memleaks=show_memleaks)
+            self._tallies[pid].report()
+            try:
+                check.finish()
+            except LogCheckError as error:
+                if not first_error:
+                    first_error = error
+        if first_error:
+            raise first_error
 
     def check_dfuse_io(self):
         """Parse dfuse i/o"""
@@ -423,383 +1001,283 @@ class LogTest():
             for pid in client_pids:
                 print('{}:{}'.format(pid, client_pids[pid]))
 
-#pylint: disable=too-many-branches,too-many-nested-blocks
-    def _check_pid_from_log_file(self, pid, abort_on_warning,
-                                 show_memleaks=True):
-        """Check a pid from a single log file for consistency"""
-
-        # Dict of active descriptors.
-        active_desc = OrderedDict()
-        active_desc['root'] = None
-
-        # Dict of active RPCs
-        active_rpcs = OrderedDict()
-
-        err_count = 0
-        warnings_strict = False
-        warnings_mode = False
-
-        regions = OrderedDict()
-        memsize = hwm_counter()
-
-        old_regions = {}
-
-        error_files = set()
-
-        have_debug = False
-
-        trace_lines = 0
-        non_trace_lines = 0
-
-        for line in self._li.new_iter(pid=pid, stateful=True):
-            self.save_log_line(line)
-            try:
-                msg = ''.join(line._fields[2:])
-                # Warn if a line references the name of the function it was in,
-                # but skip short function names or _internal suffixes.
-                if line.function in msg and len(line.function) > 6 and \
-                   '{}_internal'.format(line.function) not in msg:
-                    show_line(line, 'NORMAL',
-                              'Logging references function name')
-            except AttributeError:
-                pass
-            if abort_on_warning:
-                if line.level <= cart_logparse.LOG_LEVELS['WARN']:
-                    show = True
-                    if self.hide_fi_calls:
-                        if line.is_fi_site():
-                            show = False
-                            self.fi_triggered = True
-                        elif line.is_fi_alloc_fail():
-                            show = False
-                            self.fi_location = line
-                        elif '-1009' in line.get_msg():
-
-                            src_offset = line.lineno - self.fi_location.lineno
-                            if line.filename == self.fi_location.filename:
-                                src_offset = line.lineno - self.fi_location.lineno
-                                if src_offset > 0 and src_offset < 5:
-                                    show_line(line, 'NORMAL',
-                                              'Logging allocation failure')
-
-                            if not line.get_msg().endswith("DER_NOMEM(-1009): 'Out of memory'"):
-                                show_line(line, 'LOW',
-                                          'Error does not use DF_RC')
-                            # For the fault injection test do not report
-                            # errors for lines that print -DER_NOMEM, as
-                            # this highlights other errors and lines which
-                            # report an error, but not a fault code.
-                            show = False
-                    elif line.rpc:
-                        # Ignore the SWIM RPC opcode, as this often sends RPCs
-                        # that fail during shutdown.
-                        if line.rpc_opcode == '0xfe000000':
-                            show = False
-                    if line.fac == 'external':
-                        show = False
-                    if show:
-                        # Allow WARNING or ERROR messages, but anything higher
-                        # like assert should trigger a failure.
-                        if line.level < cart_logparse.LOG_LEVELS['ERR']:
-                            show_line(line, 'HIGH', 'error in strict mode')
-                        else:
-                            show_line(line, 'NORMAL', 'warning in strict mode')
-                        warnings_mode = True
-            if line.trace:
-                trace_lines += 1
-                if not have_debug and \
-                   line.level > cart_logparse.LOG_LEVELS['INFO']:
-                    have_debug = True
-                desc = line.descriptor
-                if line.is_new():
-                    if desc in active_desc:
-                        show_line(active_desc[desc], 'NORMAL',
-                                  'not deregistered')
-                        show_line(line, 'NORMAL', 'already exists')
-                        err_count += 1
-                    if line.parent not in active_desc:
-                        show_line(line, 'error', 'add with bad parent')
-                        if line.parent in regions:
-                            show_line(regions[line.parent], 'NORMAL',
-                                      'used as parent without registering')
-                        err_count += 1
-                    active_desc[desc] = line
-                elif line.is_link():
-                    parent = line.parent
-                    if parent not in active_desc:
-                        show_line(line, 'NORMAL', 'link with bad parent')
-                        err_count += 1
-                    desc = parent
-                elif line.is_new_rpc():
-                    active_rpcs[line.descriptor] = line
-                if line.is_dereg():
-                    if desc in active_desc:
-                        del active_desc[desc]
-                    else:
-                        show_line(line, 'NORMAL', 'invalid desc remove')
-                        err_count += 1
-                elif line.is_dereg_rpc():
-                    if desc in active_rpcs:
-                        del active_rpcs[desc]
-                    else:
-                        show_line(line, 'NORMAL', 'invalid rpc remove')
-                        err_count += 1
-                else:
-                    if have_debug and desc not in active_desc and \
-                       desc not in active_rpcs:
-
-                        show_line(line, 'NORMAL', 'inactive desc')
-                        if line.descriptor in regions:
-                            show_line(regions[line.descriptor], 'NORMAL',
-                                      'Used as descriptor without registering')
-                        error_files.add(line.filename)
-                        err_count += 1
-            elif len(line._fields) > 2:
-                # is_calloc() doesn't work on truncated output so only test if
-                # there are more than two fields to work with.
-                non_trace_lines += 1
-                if line.is_calloc():
-                    pointer = line.get_field(-1).rstrip('.')
-                    if pointer in regions:
-                        show_line(regions[pointer], 'NORMAL',
-                                  'new allocation seen for same pointer')
-                        err_count += 1
-                    regions[pointer] = line
-                    memsize.add(line.calloc_size())
-                elif line.is_free():
-                    pointer = line.get_field(-1).rstrip('.')
-                    # If a pointer is freed then automatically remove the
-                    # descriptor
-                    if pointer in active_desc:
-                        del active_desc[pointer]
-                    if pointer in regions:
-                        if line.fac != regions[pointer].fac:
-                            fvar = line.get_field(3).strip("'")
-                            afunc = regions[pointer].function
-                            avar = regions[pointer].get_field(3).strip("':")
-                            if line.function in mismatch_free_ok and \
-                               fvar in mismatch_free_ok[line.function] and \
-                               afunc in mismatch_alloc_ok and \
-                               avar in mismatch_alloc_ok[afunc]:
-                                pass
-                            else:
-                                show_line(regions[pointer], 'LOW',
-                                          'facility mismatch in alloc/free')
-                                show_line(line, 'LOW',
-                                          'facility mismatch in alloc/free')
-                                err_count += 1
-                        if line.level != regions[pointer].level:
-                            show_line(regions[pointer], 'LOW',
-                                      'level mismatch in alloc/free')
-                            show_line(line, 'LOW',
-                                      'level mismatch in alloc/free')
-                            err_count += 1
-                        memsize.subtract(regions[pointer].calloc_size())
-                        old_regions[pointer] = [regions[pointer], line]
-                        del regions[pointer]
-                    elif pointer != '(nil)':
-                        if pointer in old_regions:
-                            show_line(old_regions[pointer][0], 'ERROR',
-                                      'double-free allocation point')
-                            show_line(old_regions[pointer][1], 'ERROR',
-                                      '1st double-free location')
-                            show_line(line, 'ERROR',
-                                      '2nd double-free location')
-                        else:
-                            show_line(line, 'HIGH', 'free of unknown memory')
-                        err_count += 1
-                elif line.is_realloc():
-                    new_pointer = line.get_field(-3)
-                    old_pointer = line.get_field(-1)[:-2].split(':')[-1]
-                    if new_pointer != '(nil)' and old_pointer != '(nil)':
-                        memsize.subtract(regions[old_pointer].calloc_size())
-                    regions[new_pointer] = line
-                    memsize.add(line.calloc_size())
-                    if old_pointer not in (new_pointer, '(nil)'):
-                        if old_pointer in regions:
-                            del regions[old_pointer]
-                        else:
-                            show_line(line, 'NORMAL',
-                                      'realloc of unknown memory')
-                            err_count += 1
-
-        del active_desc['root']
-
-        # This isn't currently used anyway.
-        #if not have_debug:
-        #    print('DEBUG not enabled, No log consistency checking possible')
-
-        total_lines = trace_lines + non_trace_lines
-        p_trace = trace_lines * 1.0 / total_lines * 100
-
-        print("Pid {}, {} lines total, {} trace ({:.2f}%)".format(pid,
-                                                                  total_lines,
-                                                                  trace_lines,
-                                                                  p_trace))
-
-        if memsize.has_data():
-            print("Memsize: {}".format(memsize))
-
-        # Special case the fuse arg values as these are allocated by IOF
-        # but freed by fuse itself.
-        # Skip over CaRT issues for now to get this landed, we can enable them
-        # once this is stable.
-        lost_memory = False
-        if show_memleaks:
-            for (_, line) in regions.items():
-                pointer = line.get_field(-1).rstrip('.')
-                if pointer in active_desc:
-                    show_line(line, 'NORMAL', 'descriptor not freed')
-                    del active_desc[pointer]
-                else:
-                    show_line(line, 'NORMAL', 'memory not freed')
-                lost_memory = True
-
-        if active_desc:
-            for (_, line) in active_desc.items():
-                show_line(line, 'NORMAL', 'desc not deregistered')
-            raise ActiveDescriptors()
-
-        if active_rpcs:
-            for (_, line) in active_rpcs.items():
-                show_line(line, 'NORMAL', 'rpc not deregistered')
-        if error_files or err_count:
-            raise LogError()
-        if lost_memory:
-            raise NotAllFreed()
-        if warnings_strict:
-            raise WarningStrict()
-        if warnings_mode:
-            raise WarningMode()
-#pylint: enable=too-many-branches,too-many-nested-blocks
-
     def rpc_reporting(self, pid):
         """RPC reporting for RPC state machine, for mutiprocesses"""
-        op_state_counters = {}
-        c_states = {}
-        c_state_names = set()
-
-        # Use to convert from descriptor to opcode.
-        current_opcodes = {}
-
+        tally = RpcTally(pid)
         for line in self._li.new_iter(pid=pid):
-            rpc_state = None
-            opcode = None
-
-            function = getattr(line, 'function', None)
-            if not function:
-                continue
-            if line.is_new_rpc():
-                rpc_state = 'ALLOCATED'
-                opcode = line.get_field(-4)
-                if opcode == 'per':
-                    opcode = line.get_field(-8)
-            elif line.is_dereg_rpc():
-                rpc_state = 'DEALLOCATED'
-            elif line.endswith('submitted.'):
-                rpc_state = 'SUBMITTED'
-            elif function == 'crt_hg_req_send' and \
-                 line.get_field(-6) == ('sent'):
-                rpc_state = 'SENT'
-
-            elif line.is_callback():
-                rpc = line.descriptor
-                rpc_state = 'COMPLETED'
-                result = line.get_field(13).split('(')[0]
-                c_state_names.add(result)
-                opcode = current_opcodes[line.descriptor]
-                try:
-                    c_states[opcode][result] += 1
-                except KeyError:
-
-                    c_states[opcode] = Counter()
-                    c_states[opcode][result] += 1
-            else:
-                continue
+            tally.add_line(line)
+        tally.report()
 
-            rpc = line.descriptor
 
-            if rpc_state == 'ALLOCATED':
-                current_opcodes[rpc] = opcode
-            else:
-                opcode = current_opcodes[rpc]
-            if rpc_state == 'DEALLOCATED':
-                del current_opcodes[rpc]
-
-            if opcode not in op_state_counters:
-                op_state_counters[opcode] = {'ALLOCATED' :0,
-                                             'DEALLOCATED': 0,
-                                             'SENT':0,
-                                             'COMPLETED':0,
-                                             'SUBMITTED':0}
-            op_state_counters[opcode][rpc_state] += 1
-
-        if not bool(op_state_counters):
-            return
-
-        table = []
-        errors = []
-        names = sorted(c_state_names)
-        if names:
-            try:
-                names.remove('DER_SUCCESS')
-            except ValueError:
-                pass
-            names.insert(0, 'DER_SUCCESS')
-        headers = ['OPCODE',
-                   'ALLOCATED',
-                   'SUBMITTED',
-                   'SENT',
-                   'COMPLETED',
-                   'DEALLOCATED']
+# Files larger than this are checked one pid per worker process in batch mode,
+# if possible.
+SPLIT_SIZE = 1024*1024*20
 
-        for state in names:
-            headers.append('-{}'.format(state))
-        for (op, counts) in sorted(op_state_counters.items()):
-            row = [op,
-                   counts['ALLOCATED'],
-                   counts['SUBMITTED'],
-                   counts['SENT'],
-                   counts['COMPLETED'],
-                   counts['DEALLOCATED']]
-            for state in names:
-                try:
-                    row.append(c_states[op].get(state, ''))
-                except KeyError:
-                    row.append('')
-            table.append(row)
-            if counts['ALLOCATED'] != counts['DEALLOCATED']:
-                errors.append("ERROR: Opcode {}: Alloc'd Total = {}, "
-                              "Dealloc'd Total = {}". \
-                              format(op,
-                                     counts['ALLOCATED'],
-                                     counts['DEALLOCATED']))
+class LogResult():
+    """Results from checking a log file, or a subset of the pids in it"""
 
-        if HAVE_TABULATE:
-            print('Opcode State Transition Tally')
-            print(tabulate.tabulate(table,
-                                    headers=headers,
-                                    stralign='right'))
+    def __init__(self, fname, pids):
+        self.fname = fname
+        self.pids = pids
+        self.output = ''
+        self.issues = []
+        self.error = None
+        self.fi_triggered = False
+        self.fi_location = None
+        self.log_locs = Counter()
+        self.log_fac = Counter()
+        self.log_levels = Counter()
+        self.log_count = 0
 
-        if errors:
-            for error in errors:
-                print(error)
+def _check_task(task):
+    """Check a file, or some of the pids in it, from a worker process"""
+
+    # pylint: disable=global-statement
+    global wf
+
+    (index, fname, pids, abort_on_warning, show_memleaks, use_mmap,
+     max_freed) = task
+    # Workers are reused for other tasks, whose issues are de-duplicated by
+    # the parent, so only filter out those already shown for this task.
+    shown_logs.clear()
+    output = io.StringIO()
+    wf = IssueCollector(output)
+    result = LogResult(fname, pids)
+    with contextlib.redirect_stdout(output):
+        test_iter = LogTest(cart_logparse.LogIter(fname, use_mmap=use_mmap))
+        test_iter.max_freed = max_freed
+        try:
+            test_iter.check_log_file(abort_on_warning,
+                                     show_memleaks=show_memleaks,
+                                     pids=pids)
+        except LogCheckError as error:
+            result.error = error
+    result.output = output.getvalue()
+    result.issues = wf.issues
+    result.fi_triggered = test_iter.fi_triggered
+    result.fi_location = test_iter.fi_location
+    result.log_locs = test_iter.log_locs
+    result.log_fac = test_iter.log_fac
+    result.log_levels = test_iter.log_levels
+    result.log_count = test_iter.log_count
+
+    # The summary is reported by the parent, so stop __del__ from doing so.
+    test_iter.log_count = 0
+    return (index, result)
+
+def _index_task(task):
+    """Index a file from a worker process
+
+    Returns the pids in the file if they can each be checked separately,
+    otherwise None.  Loading the file saves its index, so the workers
+    checking each pid do not need to scan the file again.
+    """
+    (fname, use_mmap) = task
+    log_iter = cart_logparse.LogIter(fname, use_mmap=use_mmap)
+    if not log_iter.can_seek():
+        return (fname, None)
+    return (fname, list(log_iter.get_pids()))
+
+def expand_files(names):
+    """Convert a list of files, directories and globs into a list of files"""
+    files = []
+    for name in names:
+        if os.path.isdir(name):
+            entries = sorted(os.listdir(name))
+            paths = [os.path.join(name, entry) for entry in entries]
+        elif os.path.exists(name):
+            paths = [name]
+        else:
+            paths = sorted(glob.glob(name))
+        for path in paths:
+            if path.endswith(cart_logparse.INDEX_SUFFIX):
+                continue
+            if os.path.isfile(path) and path not in files:
+                files.append(path)
+    return files
+
+def check_files(files, jobs=None, abort_on_warning=False, show_memleaks=True,
+                use_mmap=False, max_freed=None):
+    """Check a number of log files in parallel
+
+    Files are checked in a pool of worker processes, with files large
+    enough to be read from disk, and compressed files which can be read by
+    pid, being split so that each pid is checked separately.  These files
+    are first indexed by the workers, which finds the pids and saves the
+    LogIter index file, so the workers checking each pid do not need to scan
+    the file again.  The output and issues from each file are merged, in
+    order, into a single report, with issues being passed to wf as they
+    would be for a single file.
+
+    Returns a list of LogResult objects, in the same order as files.
+    """
+
+    sizes = [os.stat(fname).st_size for fname in files]
+
+    with multiprocessing.Pool(jobs) as pool:
+        split = set((fname, use_mmap) for (fname, size) in zip(files, sizes)
+                    if size > SPLIT_SIZE or fname.endswith('.bz2'))
+        file_pids = dict(pool.imap_unordered(_index_task, split))
+
+        tasks = []
+        task_sizes = []
+        for (fname, size) in zip(files, sizes):
+            if file_pids.get(fname) is not None:
+                for pid in file_pids[fname]:
+                    tasks.append((len(tasks), fname, [pid],
+                                  abort_on_warning, show_memleaks, use_mmap,
+                                  max_freed))
+                    task_sizes.append(size)
+            else:
+                tasks.append((len(tasks), fname, None,
+                              abort_on_warning, show_memleaks, use_mmap,
+                              max_freed))
+                task_sizes.append(size)
+
+        # Start the largest tasks first, so that a single large file does
+        # not hold up the end of the run.
+        tasks.sort(key=lambda task: task_sizes[task[0]], reverse=True)
+
+        results = [None] * len(tasks)
+        for (index, result) in pool.imap_unordered(_check_task, tasks):
+            results[index] = result
+
+    summary = LogTest(None)
+    for result in results:
+        # Print the output of the worker with the issues put back in place,
+        # applying the same de-duplication as for a single file.
+        start = 0
+        for (line, sev, msg, pos) in result.issues:
+            print(result.output[start:pos], end='')
+            start = pos
+            show_line(line, sev, msg)
+        print(result.output[start:], end='')
+        if result.error:
+            print('{}: {}'.format(result.fname, result.error))
+        summary.merge_counts(result)
+    summary.show_common_logs()
+    summary.log_count = 0
+    return results
+
+# Number of frees remembered for each pid when following files, to bound
+# memory use on long running tests.
+FOLLOW_MAX_FREED = 100000
+
+def follow_files(names, interval=60, idle=None, abort_on_warning=False,
+                 show_memleaks=True, max_freed=FOLLOW_MAX_FREED):
+    """Check log files as they are written
+
+    names is a list of files, directories or globs which is re-expanded on
+    each poll, so that log files created after the start are picked up.
+    Issues are reported as the lines causing them are read, and every
+    interval seconds the change in outstanding allocations, descriptors and
+    RPCs for each pid is shown.  Memory use is bounded by only remembering
+    max_freed frees for each pid.
+
+    Runs until interrupted, or until no new data has been written for idle
+    seconds, then reports on each file as for a complete log.  Returns a
+    dict of the first error for each file which had one.
+    """
+
+    follows = OrderedDict()
+    last_data = time.monotonic()
+    try:
+        while True:
+            for fname in expand_files(names):
+                if fname in follows or fname.endswith('.bz2'):
+                    continue
+                tail = cart_logparse.LogTail(fname)
+                test_iter = LogTest(tail)
+                test_iter.max_freed = max_freed
+                follows[fname] = (tail, test_iter)
+            for (fname, (tail, test_iter)) in follows.items():
+                if test_iter.check_lines(tail.read(), abort_on_warning,
+                                         show_memleaks=show_memleaks):
+                    last_data = time.monotonic()
+                test_iter.report_deltas(prefix='{}: '.format(fname))
+            if idle is not None and time.monotonic() - last_data >= idle:
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
 
+    errors = {}
+    summary = LogTest(None)
+    for (fname, (tail, test_iter)) in follows.items():
+        try:
+            test_iter.finish_pids()
+        except LogCheckError as error:
+            print('{}: {}'.format(fname, error))
+            errors[fname] = error
+        tail.close()
+        summary.merge_counts(test_iter)
+        test_iter.log_count = 0
+    summary.show_common_logs()
+    summary.log_count = 0
+    return errors
 
 def run():
-    """Trace a single file"""
+    """Trace a single file, or a set of files in parallel"""
     parser = argparse.ArgumentParser()
     parser.add_argument('--dfuse',
                         help='Summarise dfuse I/O',
                         action='store_true')
-    parser.add_argument('file', help='input file')
+    parser.add_argument('--jobs',
+                        type=int,
+                        help='Number of processes to use for multiple files')
+    parser.add_argument('--mmap',
+                        action='store_true',
+                        help='Read uncompressed files through a memory map')
+    parser.add_argument('--max-freed',
+                        type=int,
+                        help='Number of frees to remember for each pid, to '
+                        'detect double frees')
+    parser.add_argument('--follow',
+                        action='store_true',
+                        help='Check files as they are written')
+    parser.add_argument('--interval',
+                        type=int,
+                        default=60,
+                        help='Seconds between progress reports when following')
+    parser.add_argument('--idle',
+                        type=int,
+                        help='Stop following after this many seconds with '
+                        'no new data')
+    parser.add_argument('file', nargs='+',
+                        help='input file, directory or glob')
     args = parser.parse_args()
+    if args.follow:
+        max_freed = args.max_freed
+        if max_freed is None:
+            max_freed = FOLLOW_MAX_FREED
+        errors = follow_files(args.file, interval=args.interval,
+                              idle=args.idle, max_freed=max_freed)
+        for error in errors.values():
+            if not isinstance(error, (LogError, NotAllFreed)):
+                sys.exit(1)
+        return
+    if len(args.file) != 1 or not os.path.isfile(args.file[0]):
+        if args.dfuse:
+            print('dfuse I/O summary only possible on a single file')
+            return
+        files = expand_files(args.file)
+        if not files:
+            print('No log files found')
+            return
+        results = check_files(files, jobs=args.jobs, use_mmap=args.mmap,
+                              max_freed=args.max_freed)
+        for result in results:
+            if result.error and \
+               not isinstance(result.error, (LogError, NotAllFreed)):
+                sys.exit(1)
+        return
     try:
-        log_iter = cart_logparse.LogIter(args.file)
+        log_iter = cart_logparse.LogIter(args.file[0], use_mmap=args.mmap)
     except IsADirectoryError:
         print('Log tracing on directory not possible')
         return
     test_iter = LogTest(log_iter)
+    test_iter.max_freed = args.max_freed
     if args.dfuse:
         test_iter.check_dfuse_io()
     else:
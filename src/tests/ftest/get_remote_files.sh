@@ -126,11 +126,21 @@ list_tag_files() {
 # Arguments:
 #   $1: local logs to compress
 # Returns:
-#   status of the lbzip2 command
+#   status of the compression command
 #######################################
 compress_files() {
-    # shellcheck disable=SC2086
-    find ${1} -maxdepth 0 -type f -size +1M -print0 | xargs -r0 lbzip2 -v
+    local logparse_path
+    logparse_path="$(dirname "$(readlink -f "${0}")")/cart/cart_logparse.py"
+    if [ -f "${logparse_path}" ]; then
+        # Compress into block indexed bz2 files, which the log checking tools
+        # can read from the start of any process' output.
+        # shellcheck disable=SC2086
+        find ${1} -maxdepth 0 -type f -size +1M ! -name "*.bz2" -print0 | \
+            xargs -r0 "${logparse_path}"
+    else
+        # shellcheck disable=SC2086
+        find ${1} -maxdepth 0 -type f -size +1M -print0 | xargs -r0 lbzip2 -v
+    fi
     return $?
 }
 
@@ -151,7 +161,9 @@ scp_files() {
     do
         file_name=${file##*/}
         archive_name="${file_name%%.*}.$(hostname -s).${file_name#*.}"
-        if scp -r "${file}" "${2}"/"${archive_name}"; then
+        # Preserve the modification time, as the log index files are only
+        # valid for an unchanged log.
+        if scp -rp "${file}" "${2}"/"${archive_name}"; then
             copied+=("${file}")
             if ! rm -fr "${file}"; then
                 echo "  Error removing ${file}"
@@ -185,7 +197,8 @@ run_cartlogtest() {
         # shellcheck disable=SC2045,SC2086
         for file in $(ls -d ${1})
         do
-            if [ -f ${file} ] && [[ ! ${file} == *".cart_logtest."* ]]; then
+            if [ -f ${file} ] && [[ ! ${file} == *".cart_logtest."* ]] && \
+               [[ ! ${file} == *".cart_index" ]]; then
                 logtest_log="${file%.*}.cart_logtest.${file##*.}"
                 if ! ${CART_LOGTEST_PATH} ${file} > ${logtest_log} 2>&1; then
                     echo "  Error: details in ${file}_cart_testlog"
@@ -84,6 +84,7 @@ if [ -d "/mnt/daos" ]; then
     if [ -z "$RUN_TEST_VALGRIND" ]; then
         # Tests that do not run valgrind
         run_test src/client/storage_estimator/common/tests/storage_estimator.sh
+        run_test src/client/pydaos/tests/pydaos.sh
         run_test src/rdb/raft_tests/raft_tests.py
         go_spdk_ctests="${SL_PREFIX}/bin/nvme_control_ctests"
         if test -f "$go_spdk_ctests"; then